@@ -0,0 +1,291 @@
+"""
+Read-only HTTP API over the dashboard data, for tools that used to scrape the Excel downloads.
+
+Serves the same frames, counts and PDF reports as the dashboard, built by utils/dashboard_data.py
+from the utils/sql_*.py queries (or read from the precomputed artifact store):
+
+    GET /versions                                            data version per section
+    GET /<section>/abnormal?years=2023,2024&threshold=5      abnormal frame (kind=filtered|per_part)
+    GET /<section>/summary?years=2023,2024&threshold=5       status / explanation counts
+    GET /reports/<type>?years=2023,2024&boundaries=5,5,5     PDF report (in_house, out_house, packing, complete)
+
+Frames are returned as JSON records, or as Parquet with format=parquet (requires pyarrow).
+
+Every response carries an ETag derived from the request and the data version of the sections
+it was built from (see utils/artifacts.py). A request with a matching If-None-Match gets a 304,
+and a repeated request is answered from the in-process response cache; both only need the
+data versions, which are themselves cached for MSP_API_VERSION_TTL seconds, so unchanged data
+is served without touching the database at all within that window.
+
+Usage:
+    python api.py --port 8502
+    curl -H 'If-None-Match: "..."' 'localhost:8502/packing/abnormal?years=2023,2024&threshold=5'
+"""
+import argparse
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import repository.psql.conn as rc
+import utils.artifacts as ua
+import utils.categorical as uc
+import utils.dashboard_data as dd
+import utils.summary as sm
+
+logger = logging.getLogger("msp.api")
+
+DEFAULT_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config/database-dev.yaml")
+REPORT_TYPES = ["in_house", "out_house", "packing", "complete"]
+FRAME_KINDS = ["", "filtered", "per_part"]
+
+VERSION_TTL = float(os.environ.get("MSP_API_VERSION_TTL", "30"))
+CACHE_ENTRIES = int(os.environ.get("MSP_API_CACHE_ENTRIES", "32"))
+
+
+class ApiError(Exception):
+    """Error answered with its HTTP status and message instead of a 500."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class DataApi:
+    """
+    Builds the API responses from one database config.
+
+    Args:
+        db_credentials: "database" section of the config YAML
+        artifact_root: Precomputed artifact directory (default: ua.ARTIFACT_DIR)
+    """
+
+    def __init__(self, db_credentials, artifact_root=None):
+        self.db_credentials = db_credentials
+        self.artifact_root = artifact_root
+        self._versions = None
+        self._versions_read_at = 0.0
+        self._responses = OrderedDict()
+        self._lock = threading.Lock()
+
+    def data_versions(self):
+        """Data version per section, re-read from table_changes at most every VERSION_TTL seconds."""
+        with self._lock:
+            if self._versions is not None and time.monotonic() - self._versions_read_at < VERSION_TTL:
+                return self._versions
+        with rc.DatabaseConnection(self.db_credentials) as connection:
+            versions = ua.data_versions(dd.connection_query(connection)(ua.DATA_VERSION_SQL))
+        with self._lock:
+            self._versions, self._versions_read_at = versions, time.monotonic()
+        return versions
+
+    def _section_frames(self, section, years, threshold, version):
+        frames = ua.read_frames(section, years, threshold, version, self.artifact_root)
+        if frames is not None:
+            return frames
+        with rc.DatabaseConnection(self.db_credentials) as connection:
+            return dd.load_section_frames(dd.connection_query(connection), section, years, threshold)
+
+    def abnormal(self, section, years, threshold, kind, file_format, version):
+        frames = self._section_frames(section, years, threshold, version)
+        return encode_frame(section_frame(section, frames, kind, threshold), file_format)
+
+    def summary(self, section, years, threshold, version):
+        frames = self._section_frames(section, years, threshold, version)
+        return "application/json", json.dumps(sm.summary_counts(section, frames)).encode()
+
+    def report(self, report_type, years, boundaries, versions):
+        from utils.pdf import generate_report
+
+        pdf_data = ua.read_report(years, boundaries, report_type, versions, self.artifact_root)
+        if pdf_data is None:
+            frames = {
+                section: self._section_frames(section, years, threshold, versions[section])
+                for section, threshold in zip(ua.SECTIONS, boundaries)
+            }
+            pdf_data = generate_report(report_type, years=years, boundaries=[int(b) for b in boundaries],
+                                       **dd.report_inputs(frames))
+        return "application/pdf", bytes(pdf_data)
+
+    def cached_response(self, etag, build):
+        """Response body of an ETag from the in-process cache, built (and stored) on a miss."""
+        with self._lock:
+            if etag in self._responses:
+                self._responses.move_to_end(etag)
+                return self._responses[etag]
+        response = build()
+        with self._lock:
+            self._responses[etag] = response
+            while len(self._responses) > CACHE_ENTRIES:
+                self._responses.popitem(last=False)
+        return response
+
+    def handle(self, path, params):
+        """
+        Resolve a GET request to its ETag and a builder of its body.
+
+        Returns:
+            (etag, build) where build() returns (content type, body bytes)
+        """
+        parts = [part for part in path.split("/") if part]
+        if parts == ["versions"]:
+            versions = self.data_versions()
+            return make_etag(path, {}, versions), lambda: ("application/json", json.dumps(versions).encode())
+
+        if len(parts) == 2 and parts[0] == "reports":
+            report_type = parts[1]
+            if report_type not in REPORT_TYPES:
+                raise ApiError(404, f"Unknown report type {report_type}")
+            years = parse_years(params)
+            boundaries = parse_ints(params, "boundaries", 3)
+            versions = self.data_versions()
+            return make_etag(path, params, versions), lambda: self.report(report_type, years, boundaries, versions)
+
+        if len(parts) == 2 and parts[0] in ua.SECTIONS and parts[1] in ("abnormal", "summary"):
+            section, resource = parts
+            years = parse_years(params)
+            threshold = parse_ints(params, "threshold", 1)[0]
+            version = self.data_versions()[section]
+            etag = make_etag(path, params, {section: version})
+            if resource == "summary":
+                return etag, lambda: self.summary(section, years, threshold, version)
+
+            kind = params.get("kind", [""])[0]
+            file_format = params.get("format", ["json"])[0]
+            if kind not in FRAME_KINDS or (kind == "per_part" and section == "packing"):
+                raise ApiError(400, f"Unknown kind {kind!r} for {section}")
+            if file_format not in ("json", "parquet"):
+                raise ApiError(400, f"Unknown format {file_format!r}")
+            return etag, lambda: self.abnormal(section, years, threshold, kind, file_format, version)
+
+        raise ApiError(404, f"No resource at {path}")
+
+
+def parse_years(params):
+    """[previous, current] as strings, from years=2023,2024 or years=2023&years=2024."""
+    years = [year for value in params.get("years", []) for year in value.split(",") if year]
+    if len(years) != 2 or not all(year.isdigit() for year in years):
+        raise ApiError(400, "years must be two years, e.g. years=2023,2024")
+    return years
+
+
+def parse_ints(params, name, count):
+    values = [value for raw in params.get(name, []) for value in raw.split(",") if value]
+    try:
+        values = [int(value) for value in values]
+    except ValueError:
+        values = []
+    if len(values) != count:
+        raise ApiError(400, f"{name} must be {count} integer(s)")
+    return values
+
+
+def make_etag(path, params, versions):
+    """Strong ETag over the path, the (order-independent) query and the data versions."""
+    key = json.dumps([path, sorted((name, values) for name, values in params.items()), versions], sort_keys=True)
+    return '"{}"'.format(hashlib.sha1(key.encode()).hexdigest())
+
+
+def section_frame(section, frames, kind, threshold):
+    """
+    The frame behind one Excel download of the dashboard, status columns included.
+
+    Args:
+        section: "in_house", "out_house" or "packing"
+        frames: Frame tuple of the section
+        kind: "" (all rows), "filtered" (abnormal rows only) or "per_part" (IQR outliers)
+        threshold: Abnormal threshold in percent
+    """
+    if kind == "per_part":
+        return frames[-1]
+    abnormal_cal = frames[1]
+    if kind == "filtered":
+        if section == "in_house":
+            return abnormal_cal[uc.status_mask(abnormal_cal["Status Abnormal"], "Abnormal")]
+        above, _, below = uc.threshold_statuses(threshold)
+        return abnormal_cal[uc.status_mask(abnormal_cal["Status"], above) | uc.status_mask(abnormal_cal["Status"], below)]
+    return abnormal_cal
+
+
+def encode_frame(df, file_format):
+    """
+    Serialize a frame as JSON records or Parquet.
+
+    Returns:
+        (content type, body bytes)
+    """
+    if file_format == "parquet":
+        buffer = io.BytesIO()
+        try:
+            df.to_parquet(buffer, index=False)
+        except ImportError as e:
+            raise ApiError(501, f"Parquet output is not available: {e}")
+        return "application/vnd.apache.parquet", buffer.getvalue()
+    return "application/json", df.to_json(orient="records", date_format="iso").encode()
+
+
+def make_handler(api):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlsplit(self.path)
+            try:
+                etag, build = api.handle(url.path, parse_qs(url.query))
+                if etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                content_type, body = api.cached_response(etag, build)
+            except ApiError as e:
+                self._send(e.status, "application/json", json.dumps({"error": str(e)}).encode())
+                return
+            except Exception:
+                logger.exception("Error serving %s", self.path)
+                self._send(500, "application/json", json.dumps({"error": "Internal error"}).encode())
+                return
+            self._send(200, content_type, body, etag)
+
+        def _send(self, status, content_type, body, etag=None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            if etag:
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the dashboard frames, counts and reports over HTTP")
+    parser.add_argument("--config", default=DEFAULT_CONFIG, help="Database config YAML")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--artifacts", help=f"Precomputed artifact directory (default: {ua.ARTIFACT_DIR})")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    config = rc.load_config(args.config)
+    if not config:
+        raise SystemExit("Failed to load configuration. Exiting.")
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(DataApi(config["database"], args.artifacts)))
+    print(f"Serving on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
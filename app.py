@@ -6,18 +6,36 @@ import yaml
 from yaml.loader import SafeLoader
 import streamlit_authenticator as stauth
 from streamlit_authenticator.utilities import LoginError
-import utils.sql_in_house as us
-import utils.sql_packing as up
-import utils.sql_out_house as uo
 import utils.visualize as uv
 import utils.formatting as uf
+import utils.categorical as uc
+import utils.prefetch as pf
+import utils.query_runner as qr
+import utils.outlier as ol
+import utils.dashboard_data as dd
+import utils.instrumentation as qi
+import utils.tracing as tr
+import utils.artifacts as ua
+import utils.analytics as an
+import utils.async_query as aq
+import utils.drilldown as dr
+import utils.sql_part_search as sp
+import utils.summary as sm
+import utils.arrow_cache as ac
+import utils.cache_manager as cm
 # import utils.pdf.generate_pdf as ag
 from utils.pdf import generate_report
 import repository.approve as ra
 import os
+import io
 import repository.psql.conn as rc
+import functools
+import logging
 from datetime import datetime
 
+# Fallbacks to a slower path (backend, cache, precomputed artifact unavailable) are logged here
+logger = logging.getLogger("msp.dashboard")
+
 # Page configuration
 st.set_page_config(page_title="TMMIN PBMD - Dashboard", layout="wide")
 st.image("images/toyota.png", width=250)
@@ -61,6 +79,10 @@ if st.session_state["authentication_status"]:
     with col4:
         authenticator.logout()
 
+    if st.session_state["roles"][0] == "archmagus":
+        st.sidebar.toggle("⏱️ Timing overlay", key="timing_overlay",
+                          help="Record a per-stage timing breakdown of every section render")
+
     # Database connection
     conn = st.connection("postgresql", type="sql")
 
@@ -132,18 +154,187 @@ def display_download_buttons(full_excel, filtered_excel, section_name):
         )
 
 
+# Per-part IQR outlier parameters (see utils.outlier.iqr_outliers)
+IQR_PREFIX_LENGTH = 5
+IQR_MULTIPLIER = 1.5
+
+
+# iqr_outliers options per section: out house prices have no missing label and no deviation column
+IQR_OPTIONS = {
+    "in_house": {},
+    "out_house": {"missing_label": None, "deviation": False},
+}
+
+
+# Keyed on (section, years, data version) and the scalar parameters; the raw frame (leading
+# underscore) is not hashed, it is identified by the section's data version
+@st.cache_data(ttl="15m")
+def _cached_per_part_outliers(section, years, version, _raw_costs, prefix_length, multiplier):
+    return ol.iqr_outliers(_raw_costs, prefix_length=prefix_length, multiplier=multiplier, **IQR_OPTIONS[section])
+
+
+def get_per_part_outliers(section, years, raw_costs, prefix_length=IQR_PREFIX_LENGTH, multiplier=IQR_MULTIPLIER):
+    try:
+        version = get_data_versions()[section]
+    except Exception as e:
+        logger.warning("Failed to read the %s data version: %s", section, e)
+        return ol.iqr_outliers(raw_costs, prefix_length=prefix_length, multiplier=multiplier, **IQR_OPTIONS[section])
+    return _cached_per_part_outliers(section, tuple(years), version, raw_costs, int(prefix_length), float(multiplier))
+
+
+# Optional DuckDB backend for the heavy section reads (MSP_ANALYTICS_BACKEND=duckdb)
+@st.cache_resource
+def get_analytics_connection():
+    return an.DuckDBConnection()
+
+
+@st.cache_data(ttl="30s")
+def refresh_analytics_snapshot():
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__)))
+    config = rc.load_config(os.path.join(project_root, "config/database-dev.yaml"))
+    return an.refresh_snapshot(config["database"])
+
+
+# Optional asyncpg pool for the section reads (MSP_QUERY_BACKEND=asyncpg)
+@st.cache_resource
+def get_async_pool():
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__)))
+    config = rc.load_config(os.path.join(project_root, "config/database-dev.yaml"))
+    return aq.AsyncQueryPool(config["database"])
+
+
+# Optional shared Arrow result cache for the section frames (MSP_RESULT_CACHE=arrow)
+@st.cache_resource
+def get_result_cache():
+    return ac.ArrowResultCache(os.environ.get("MSP_ARROW_CACHE_DIR") or None, get_cache_manager())
+
+
+# Memory-bounded cache for frames, counts and export blobs (MSP_CACHE_BUDGET_MB, MSP_CACHE_POLICY)
+@st.cache_resource
+def get_cache_manager():
+    return cm.shared()
+
+
+def frame_cache(ttl):
+    """The shared Arrow result cache when enabled, else the memory-bounded cache manager."""
+    if ac.enabled():
+        try:
+            return get_result_cache().cached(ttl, cacheable=cm.complete_result)
+        except Exception as e:
+            logger.warning("Arrow result cache unavailable, using the cache manager: %s", e)
+    return get_cache_manager().memoize("frames", ttl, cacheable=cm.complete_result)
+
+
+def read_connection():
+    """
+    Connection the section loaders query: the DuckDB snapshot when enabled, else the asyncpg
+    pool when enabled, else the st.connection pool.
+    """
+    if an.enabled():
+        try:
+            refresh_analytics_snapshot()
+            return get_analytics_connection()
+        except Exception as e:
+            logger.warning("Analytics backend unavailable, querying Postgres: %s", e)
+    if aq.enabled():
+        try:
+            return get_async_pool()
+        except Exception as e:
+            logger.warning("Async query backend unavailable, using the default connection: %s", e)
+    return conn
+
+
+# Data version per section, compared against the manifests of the nightly precomputed artifacts
+@st.cache_data(ttl="30s")
+def get_data_versions():
+    return ua.data_versions(conn.query(ua.DATA_VERSION_SQL, ttl=0))
+
+
+def precomputed_frames(section, years, threshold):
+    try:
+        return ua.read_frames(section, years, threshold, get_data_versions()[section])
+    except Exception as e:
+        logger.warning("Failed to read precomputed %s frames: %s", section, e)
+        return None
+
+
+def excel_export(section, kind, years, threshold, build):
+    """Excel download as bytes: the precomputed artifact, else build() through the cache manager."""
+    file_name = f"{section}_{kind + '_' if kind else ''}{years[0]}_{years[1]}.xlsx"
+    try:
+        version = get_data_versions()[section]
+        precomputed = ua.read_file(section, years, threshold, file_name, version)
+        if precomputed is not None:
+            return precomputed
+    except Exception as e:
+        logger.warning("Failed to read precomputed %s: %s", file_name, e)
+        version = None
+
+    def build_bytes():
+        data = build()
+        return data.getvalue() if hasattr(data, "getvalue") else data
+
+    key = cm.cache_key("excel", [file_name, threshold, version], {})
+    return get_cache_manager().get_or_build(key, build_bytes, "excel", ttl="15m")
+
+
+# Status counts per source / destination, counted once per data version and threshold
+@get_cache_manager().memoize("summary", ttl="15m")
+def get_section_summary(section, years, abnormal_threshold, version):
+    loader, dimension = {
+        "out_house": (get_out_house_data, "source"),
+        "packing": (get_packing_data, "destination"),
+    }[section]
+    return sm.status_cube(loader(years, abnormal_threshold)[1], dimension)
+
+
+def section_summary(section, years, abnormal_threshold):
+    try:
+        version = get_data_versions()[section]
+    except Exception as e:
+        logger.warning("Failed to read the %s data version: %s", section, e)
+        version = None
+    return get_section_summary(section, years, abnormal_threshold, version)
+
+
+# Record a timing trace of each section render while the timing overlay is on
+def timed_section(name):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # Fragment reruns do not run the top of the script, so apply the session's switch here
+            qi.set_explain(st.session_state.get("explain_enabled", qi.EXPLAIN_DEFAULT))
+            if not st.session_state.get("timing_overlay"):
+                return func(*args, **kwargs)
+            with tr.trace(name) as trace:
+                result = func(*args, **kwargs)
+            st.session_state.setdefault("section_traces", {})[name] = trace
+            return result
+
+        return wrapper
+
+    return decorator
+
+
 # ======================================== IN HOUSE ========================================
-st.header("IN HOUSE")
 
 
 # Cache query results to prevent redundant database calls
-@st.cache_data(ttl="15m")
+@frame_cache(ttl="15m")
 def get_in_house_data(years, abnormal_threshold):
     try:
-        status_items = conn.query(us.status_product_two_year(years))
-        abnormal_cal = conn.query(us.abnormal_cal(years, abnormal_threshold))
-        full_abnormal_cal = conn.query(us.full_abnormal_cal(years, abnormal_threshold))
-        abnormal_cal_in_house = conn.query(us.abnormal_cal_in_house_per_part(years))
+        precomputed = precomputed_frames("in_house", years, abnormal_threshold)
+        if precomputed is not None:
+            return precomputed
+
+        results = qr.run_queries(
+            read_connection(), dd.in_house_queries(years, abnormal_threshold), prefix="in_house",
+            context={"years": list(years), "threshold": abnormal_threshold},
+        )
+        status_items = uc.categorize_status_items(results["status_items"])
+        abnormal_cal = uc.categorize_in_house(results["abnormal_cal"])
+        full_abnormal_cal = uc.categorize_in_house_full(results["full_abnormal_cal"], abnormal_threshold)
+        abnormal_cal_in_house = get_per_part_outliers("in_house", years, results["per_part_costs"])
         return status_items, abnormal_cal, full_abnormal_cal, abnormal_cal_in_house
     except Exception as e:
         # st.warning(e)
@@ -155,245 +346,259 @@ def get_in_house_data(years, abnormal_threshold):
             return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
 
 
-try:
-    # Get in-house data
-    status_items_impl, abnormal_cal_impl, full_abnormal_cal_impl, abnormal_cal_in_house_per_part = get_in_house_data(
-        years,
-        in_house_input_abnormal)
-
-    # Process data
-    status_items_counts = status_items_impl["Status"].value_counts()
-    full_abnormal_cal_impl["Status Abnormal"] = abnormal_cal_impl["Status Abnormal"]
-    abnormal_cal_counts = abnormal_cal_impl["Status Abnormal"].value_counts()
-    explain_cal_counts = abnormal_cal_impl["Explanation Status"].value_counts()
-
-    # Process abnormal data categories
-    abnormal_categories = {
-        "LVA Status": full_abnormal_cal_impl["LVA Status"].value_counts(),
-        "Non LVA Status": full_abnormal_cal_impl["Non LVA Status"].value_counts(),
-        "Tooling Status": full_abnormal_cal_impl["Tooling Status"].value_counts(),
-        "Process Cost Status": full_abnormal_cal_impl["Process Cost Status"].value_counts(),
-        "Total Cost Status": full_abnormal_cal_impl["Total Cost Status"].value_counts(),
-    }
-
-    # Generate Excel files
-    df_generate = abnormal_cal_impl.drop("Status Abnormal", axis=1)
-    df_generate = df_generate.drop("Explanation Status", axis=1)
-    generate_excel = uf.convert_to_excel_in_house(
-        df_generate, input_previous_year, input_current_year, int(in_house_input_abnormal)
-    )
-
-    abnormal_filtered = abnormal_cal_impl[abnormal_cal_impl["Status Abnormal"] == "Abnormal"].drop(
-        "Status Abnormal", axis=1
-    ).drop("Explanation Status", axis=1)
-    generate_excel_filtered = uf.convert_to_excel_in_house(
-        abnormal_filtered, input_previous_year, input_current_year, int(in_house_input_abnormal)
-    )
-    generate_excel_per_part = uf.convert_to_excel_format_in_house_per_part(abnormal_cal_in_house_per_part,
-                                                                           input_previous_year, input_current_year,
-                                                                           int(in_house_input_abnormal))
-
-    # Display metrics
-    mc = st.columns(3, border=True)
-    with mc[0]:
-        st.subheader("Item Status")
-        display_status_metrics(status_items_counts)
-
-    with mc[1]:
-        st.subheader("Abnormal Number")
-        m = st.columns(2, gap="small")
-        with m[0]:
-            val_above = "Abnormal"
-            st.metric(label=val_above, value=abnormal_cal_counts.get(val_above, 0))
-        with m[1]:
-            st.metric(label="Normal", value=abnormal_cal_counts.get("Normal", 0))
-    with mc[2]:
-        st.subheader("Explanation Status")
-        m = st.columns(3, gap="small")
-        statuses = ["Approved", "Disapproved", "Awaiting"]
-        for i, status in enumerate(statuses):
-            with m[i]:
-                st.metric(label=status, value=explain_cal_counts.get(status, 0))
-
-    # Display pie charts for all categories
-    for category_name, category_data in abnormal_categories.items():
-        uv.pie_char_with_total_counts(category_data, category_name, in_house_input_abnormal)
-
-    n = st.columns(2, gap="medium")
-    # Left column - Top 10 Above
-    with n[0]:
-        st.markdown(f"### Top 10 Above {in_house_input_abnormal}%")
-
-        # Get top 10 above data
-        top_10_above = (
-            full_abnormal_cal_impl.dropna(subset=["Gap Total Cost"])
-            .drop("Status", axis=1, errors="ignore")
-            .sort_values("Gap Total Cost", ascending=False)
-            .head(10)
-        )
-        top_10_above = top_10_above[
-            [
-                "part_no",
-                "part_name",
-                f"Total Cost {input_previous_year}",
-                f"Total Cost {input_current_year}",
-                "Gap Total Cost",
+@st.fragment
+@timed_section("in_house")
+def in_house_section(years, in_house_input_abnormal):
+    input_previous_year, input_current_year = years
+    try:
+        # Get in-house data
+        pf.wait_for(get_in_house_data, years, in_house_input_abnormal)
+        status_items_impl, abnormal_cal_impl, full_abnormal_cal_impl, abnormal_cal_in_house_per_part = get_in_house_data(
+            years,
+            in_house_input_abnormal)
+
+        # Process data
+        with tr.span("process data", "pandas"):
+            status_items_counts = uc.value_counts(status_items_impl["Status"])
+            full_abnormal_cal_impl["Status Abnormal"] = abnormal_cal_impl["Status Abnormal"]
+            abnormal_cal_counts = uc.value_counts(abnormal_cal_impl["Status Abnormal"])
+            explain_cal_counts = uc.value_counts(abnormal_cal_impl["Explanation Status"])
+
+            # Process abnormal data categories
+            abnormal_categories = {
+                column: uc.value_counts(full_abnormal_cal_impl[column]) for column in uc.IN_HOUSE_STATUS_COLUMNS
+            }
+
+        # Generate Excel files
+        df_generate = abnormal_cal_impl.drop("Status Abnormal", axis=1)
+        df_generate = df_generate.drop("Explanation Status", axis=1)
+        generate_excel = excel_export("in_house", "", years, in_house_input_abnormal, lambda: (
+            uf.convert_to_excel_in_house(
+                df_generate, input_previous_year, input_current_year, int(in_house_input_abnormal)
+            )
+        ))
+
+        abnormal_filtered = abnormal_cal_impl[uc.status_mask(abnormal_cal_impl["Status Abnormal"], "Abnormal")].drop(
+            "Status Abnormal", axis=1
+        ).drop("Explanation Status", axis=1)
+        generate_excel_filtered = excel_export("in_house", "filtered", years, in_house_input_abnormal, lambda: (
+            uf.convert_to_excel_in_house(
+                abnormal_filtered, input_previous_year, input_current_year, int(in_house_input_abnormal)
+            )
+        ))
+        generate_excel_per_part = excel_export("in_house", "per_part", years, in_house_input_abnormal, lambda: (
+            uf.convert_to_excel_format_in_house_per_part(abnormal_cal_in_house_per_part, input_previous_year,
+                                                         input_current_year, int(in_house_input_abnormal))
+        ))
+
+        # Display metrics
+        mc = st.columns(3, border=True)
+        with mc[0]:
+            st.subheader("Item Status")
+            display_status_metrics(status_items_counts)
+
+        with mc[1]:
+            st.subheader("Abnormal Number")
+            m = st.columns(2, gap="small")
+            with m[0]:
+                val_above = "Abnormal"
+                st.metric(label=val_above, value=abnormal_cal_counts.get(val_above, 0))
+            with m[1]:
+                st.metric(label="Normal", value=abnormal_cal_counts.get("Normal", 0))
+        with mc[2]:
+            st.subheader("Explanation Status")
+            m = st.columns(3, gap="small")
+            statuses = ["Approved", "Disapproved", "Awaiting"]
+            for i, status in enumerate(statuses):
+                with m[i]:
+                    st.metric(label=status, value=explain_cal_counts.get(status, 0))
+
+        # Display pie charts for all categories
+        for category_name, category_data in abnormal_categories.items():
+            uv.pie_char_with_total_counts(category_data, category_name, in_house_input_abnormal)
+
+        n = st.columns(2, gap="medium")
+        # Left column - Top 10 Above
+        with n[0]:
+            st.markdown(f"### Top 10 Above {in_house_input_abnormal}%")
+
+            # Get top 10 above data
+            top_10_above = (
+                full_abnormal_cal_impl.dropna(subset=["Gap Total Cost"])
+                .drop("Status", axis=1, errors="ignore")
+                .sort_values("Gap Total Cost", ascending=False)
+                .head(10)
+            )
+            top_10_above = top_10_above[
+                [
+                    "part_no",
+                    "part_name",
+                    f"Total Cost {input_previous_year}",
+                    f"Total Cost {input_current_year}",
+                    "Gap Total Cost",
+                ]
             ]
-        ]
-        # Create a container with styling
-        st.dataframe(
-            top_10_above,
-            column_config={
-                "Gap Total Cost": st.column_config.NumberColumn(
-                    "Gap Total Cost (%)", format="%.2f%%", help="Percentage difference from expected price"
-                ),
-                f"Total Cost {input_previous_year}": st.column_config.NumberColumn(
-                    f"Total Cost {input_previous_year} (Rp)", format="Rp %.0f"
-                ),
-                f"Total Cost {input_current_year}": st.column_config.NumberColumn(
-                    f"Total Cost {input_current_year} (Rp)", format="Rp %.0f"
-                ),
-            },
-            use_container_width=True,
-            hide_index=False,
-        )
-
-        with st.container(border=True):
-            # Display metrics for the first entry if available
-            if not top_10_above.empty:
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric(
-                        label=f"Total Cost {input_previous_year}",
-                        value=f"Rp {top_10_above[f'Total Cost {input_previous_year}'].iloc[0]:,.0f}",
-                    )
-
-                with col2:
-                    # Use the correct column name for current price
-                    st.metric(
-                        label="Highest Gap",
-                        value=f"{top_10_above['Gap Total Cost'].iloc[0]:.2f}%",
-                        delta=f"{top_10_above['Gap Total Cost'].iloc[0] - float(in_house_input_abnormal):.2f}%",
-                        delta_color="inverse",
-                    )
-                with col3:
-                    # Use the correct column name for current price
-                    st.metric(
-                        label=f"Total Cost {input_current_year}",
-                        value=f"Rp {top_10_above[f'Total Cost {input_current_year}'].iloc[0]:,.0f}",
-                    )
-
-    with n[1]:
-        st.markdown(f"### Top 10 Below -{in_house_input_abnormal}%")
-
-        # Get top 10 below data
-        top_10_below = (
-            full_abnormal_cal_impl.dropna(subset=["Gap Total Cost"])
-            .drop("Status", axis=1, errors="ignore")
-            .sort_values("Gap Total Cost")
-            .head(10)
-        )
-
-        top_10_below = top_10_below[
-            [
-                "part_no",
-                "part_name",
-                f"Total Cost {input_previous_year}",
-                f"Total Cost {input_current_year}",
-                "Gap Total Cost",
+            # Create a container with styling
+            st.dataframe(
+                top_10_above,
+                column_config={
+                    "Gap Total Cost": st.column_config.NumberColumn(
+                        "Gap Total Cost (%)", format="%.2f%%", help="Percentage difference from expected price"
+                    ),
+                    f"Total Cost {input_previous_year}": st.column_config.NumberColumn(
+                        f"Total Cost {input_previous_year} (Rp)", format="Rp %.0f"
+                    ),
+                    f"Total Cost {input_current_year}": st.column_config.NumberColumn(
+                        f"Total Cost {input_current_year} (Rp)", format="Rp %.0f"
+                    ),
+                },
+                use_container_width=True,
+                hide_index=False,
+            )
+
+            with st.container(border=True):
+                # Display metrics for the first entry if available
+                if not top_10_above.empty:
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric(
+                            label=f"Total Cost {input_previous_year}",
+                            value=f"Rp {top_10_above[f'Total Cost {input_previous_year}'].iloc[0]:,.0f}",
+                        )
+
+                    with col2:
+                        # Use the correct column name for current price
+                        st.metric(
+                            label="Highest Gap",
+                            value=f"{top_10_above['Gap Total Cost'].iloc[0]:.2f}%",
+                            delta=f"{top_10_above['Gap Total Cost'].iloc[0] - float(in_house_input_abnormal):.2f}%",
+                            delta_color="inverse",
+                        )
+                    with col3:
+                        # Use the correct column name for current price
+                        st.metric(
+                            label=f"Total Cost {input_current_year}",
+                            value=f"Rp {top_10_above[f'Total Cost {input_current_year}'].iloc[0]:,.0f}",
+                        )
+
+        with n[1]:
+            st.markdown(f"### Top 10 Below -{in_house_input_abnormal}%")
+
+            # Get top 10 below data
+            top_10_below = (
+                full_abnormal_cal_impl.dropna(subset=["Gap Total Cost"])
+                .drop("Status", axis=1, errors="ignore")
+                .sort_values("Gap Total Cost")
+                .head(10)
+            )
+
+            top_10_below = top_10_below[
+                [
+                    "part_no",
+                    "part_name",
+                    f"Total Cost {input_previous_year}",
+                    f"Total Cost {input_current_year}",
+                    "Gap Total Cost",
+                ]
             ]
-        ]
 
-        st.dataframe(
-            top_10_below,
-            column_config={
-                "Gap Total Cost": st.column_config.NumberColumn(
-                    "Gap Total Cost (%)", format="%.2f%%", help="Percentage difference from expected price"
-                ),
-                f"Total Cost {input_previous_year}": st.column_config.NumberColumn(
-                    f"Total Cost {input_previous_year} (Rp)", format="Rp %.0f"
-                ),
-                f"Total Cost {input_current_year}": st.column_config.NumberColumn(
-                    f"Total Cost {input_current_year} (Rp)", format="Rp %.0f"
-                ),
-            },
-            use_container_width=True,
-            hide_index=False,
-        )
+            st.dataframe(
+                top_10_below,
+                column_config={
+                    "Gap Total Cost": st.column_config.NumberColumn(
+                        "Gap Total Cost (%)", format="%.2f%%", help="Percentage difference from expected price"
+                    ),
+                    f"Total Cost {input_previous_year}": st.column_config.NumberColumn(
+                        f"Total Cost {input_previous_year} (Rp)", format="Rp %.0f"
+                    ),
+                    f"Total Cost {input_current_year}": st.column_config.NumberColumn(
+                        f"Total Cost {input_current_year} (Rp)", format="Rp %.0f"
+                    ),
+                },
+                use_container_width=True,
+                hide_index=False,
+            )
+
+            # Create a container with styling
+            with st.container(border=True):
+                # Display metrics for the first entry if available
+                if not top_10_below.empty:
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric(
+                            label=f"Total Cost {input_previous_year}",
+                            value=f"Rp {top_10_below[f'Total Cost {input_previous_year}'].iloc[0]:,.0f}",
+                        )
+
+                    with col2:
+                        st.metric(
+                            label="Lowest Gap",
+                            value=f"{top_10_below['Gap Total Cost'].iloc[0]:.2f}%",
+                            delta=f"{top_10_below['Gap Total Cost'].iloc[0] + float(in_house_input_abnormal):.2f}%",
+                            delta_color="normal",
+                        )
+
+                    with col3:
+                        st.metric(
+                            label=f"Total Cost {input_current_year}",
+                            value=f"Rp {top_10_below[f'Total Cost {input_current_year}'].iloc[0]:,.0f}",
+                        )
+        # Display download buttons
+
+        section_name = "in_house"
+        cols = st.columns(3, border=True)
+        with cols[0]:
+            st.subheader("Full Excel")
+            st.download_button(
+                label="Download Excel File",
+                data=generate_excel,
+                file_name=f"{section_name}_{input_previous_year}_{input_current_year}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            )
+        with cols[1]:
+            st.subheader("Filtered Excel")
+            st.download_button(
+                label="Download Excel File",
+                data=generate_excel_filtered,
+                file_name=f"{section_name}_filtered_{input_previous_year}_{input_current_year}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            )
+        with cols[2]:
+            st.subheader("Filtered Per Part Excel")
+            st.download_button(
+                label="Download Excel File",
+                data=generate_excel_per_part,
+                file_name=f"{section_name}_per_part_{input_previous_year}_{input_current_year}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            )
 
-        # Create a container with styling
-        with st.container(border=True):
-            # Display metrics for the first entry if available
-            if not top_10_below.empty:
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric(
-                        label=f"Total Cost {input_previous_year}",
-                        value=f"Rp {top_10_below[f'Total Cost {input_previous_year}'].iloc[0]:,.0f}",
-                    )
-
-                with col2:
-                    st.metric(
-                        label="Lowest Gap",
-                        value=f"{top_10_below['Gap Total Cost'].iloc[0]:.2f}%",
-                        delta=f"{top_10_below['Gap Total Cost'].iloc[0] + float(in_house_input_abnormal):.2f}%",
-                        delta_color="normal",
-                    )
-
-                with col3:
-                    st.metric(
-                        label=f"Total Cost {input_current_year}",
-                        value=f"Rp {top_10_below[f'Total Cost {input_current_year}'].iloc[0]:,.0f}",
-                    )
-    # Display download buttons
-
-    section_name = "in_house"
-    cols = st.columns(3, border=True)
-    with cols[0]:
-        st.subheader("Full Excel")
-        st.download_button(
-            label="Download Excel File",
-            data=generate_excel,
-            file_name=f"{section_name}_{input_previous_year}_{input_current_year}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        )
-    with cols[1]:
-        st.subheader("Filtered Excel")
-        st.download_button(
-            label="Download Excel File",
-            data=generate_excel_filtered,
-            file_name=f"{section_name}_filtered_{input_previous_year}_{input_current_year}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        )
-    with cols[2]:
-        st.subheader("Filtered Per Part Excel")
-        st.download_button(
-            label="Download Excel File",
-            data=generate_excel_per_part,
-            file_name=f"{section_name}_per_part_{input_previous_year}_{input_current_year}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        )
+    except Exception as e:
+        st.warning(e)
+    # if "KeyError" in str(e):
+    #     st.warning("There was an issue with your database query. Please check your input parameters.")
+    # else:
+    #     print(e)
+    #     st.error(e)
 
-except Exception as e:
-    st.warning(e)
-# if "KeyError" in str(e):
-#     st.warning("There was an issue with your database query. Please check your input parameters.")
-# else:
-#     print(e)
-#     st.error(e)
 
 # ======================================== OUT HOUSE ========================================
-st.divider()
-st.header("OUT HOUSE")
 
 
 # Cache query results for out house data
-@st.cache_data(ttl="15m")
+@frame_cache(ttl="15m")
 def get_out_house_data(years, abnormal_threshold):
     try:
-        status_items = conn.query(uo.status_product_two_year_out_house(years))
-        abnormal_cal = conn.query(uo.abnormal_cal_out_house(years, abnormal_threshold))
-        abnormal_cal_per_part = conn.query(uo.abnormal_cal_out_house_per_part(years))
+        precomputed = precomputed_frames("out_house", years, abnormal_threshold)
+        if precomputed is not None:
+            return precomputed
+
+        results = qr.run_queries(
+            read_connection(), dd.out_house_queries(years, abnormal_threshold), prefix="out_house",
+            context={"years": list(years), "threshold": abnormal_threshold},
+        )
+        status_items = uc.categorize_status_items(results["status_items"])
+        abnormal_cal = uc.categorize_out_house(results["abnormal_cal"], abnormal_threshold)
+        abnormal_cal_per_part = get_per_part_outliers("out_house", years, results["per_part_prices"])
         return status_items, abnormal_cal, abnormal_cal_per_part
     except Exception as e:
         # st.warning(e)
@@ -404,264 +609,281 @@ def get_out_house_data(years, abnormal_threshold):
             return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
 
 
-try:
-    # Get out house data
-    status_items_out, abnormal_cal_out, abnormal_cal_per_part_out = get_out_house_data(years, out_house_input_abnormal)
-
-    # Process data
-    status_counts_out = status_items_out["Status"].value_counts()
-    abnormal_counts_out = abnormal_cal_out["Status"].value_counts()
-    explain_cal_counts_out = abnormal_cal_out["Explanation Status"].value_counts()
-
-    # Generate Excel files
-    df_generate_out = abnormal_cal_out.drop("Status", axis=1)
-    df_generate_out = df_generate_out.drop("Explanation Status", axis=1)
-    generate_excel_out = uf.convert_to_excel_format_out_house(
-        df_generate_out, input_previous_year, input_current_year, int(out_house_input_abnormal)
-    )
-
-    # Filter for abnormal items
-    abnormal_filter = (abnormal_cal_out["Status"] == f"Abnormal Above {out_house_input_abnormal}%") | (
-            abnormal_cal_out["Status"] == f"Abnormal Below -{out_house_input_abnormal}%"
-    )
-    abnormal_filtered_out = abnormal_cal_out[abnormal_filter].drop("Status", axis=1)
-    abnormal_filtered_out = abnormal_filtered_out.drop("Explanation Status", axis=1)
-    generate_excel_filtered_out = uf.convert_to_excel_format_out_house(
-        abnormal_filtered_out, input_previous_year, input_current_year, int(out_house_input_abnormal)
-    )
-
-    generate_excel_per_part = uf.convert_to_excel_format_out_house_per_part(
-        abnormal_cal_per_part_out, input_previous_year, input_current_year, int(out_house_input_abnormal)
-    )
-
-    # Display metrics
-    mc = st.columns(3, border=True)
-    with mc[0]:
-        st.subheader("Item Status")
-        display_status_metrics(status_counts_out)
-
-    with mc[1]:
-        st.subheader("Abnormal Number")
-        m = st.columns(3, gap="small")
-        statuses = [f"Abnormal Above {out_house_input_abnormal}%", "Normal",
-                    f"Abnormal Below -{out_house_input_abnormal}%"]
-        for i, status in enumerate(statuses):
-            with m[i]:
-                st.metric(label=status, value=abnormal_counts_out.get(status, 0))
-
-    with mc[2]:
-        st.subheader("Explanation Status")
-        m = st.columns(3, gap="small")
-        statuses = ["Approved", "Disapproved", "Awaiting"]
-        for i, status in enumerate(statuses):
-            with m[i]:
-                st.metric(label=status, value=explain_cal_counts_out.get(status, 0))
-
-    # Display pie chart
-    with st.container(border=True):
-        pastel_colors = px.colors.qualitative.Pastel
-        fig = px.pie(
-            abnormal_counts_out,
-            values=abnormal_counts_out.values,
-            names=abnormal_counts_out.index,
-            title="Out House Cost Abnormality Distribution",
-            color=abnormal_counts_out.index,
-            color_discrete_map={
-                "Normal": pastel_colors[0],
-                f"Abnormal Above {out_house_input_abnormal}%": pastel_colors[1],
-                f"Abnormal Below -{out_house_input_abnormal}%": pastel_colors[2],
-            },
+@st.fragment
+@timed_section("out_house")
+def out_house_section(years, out_house_input_abnormal):
+    input_previous_year, input_current_year = years
+    try:
+        # Get out house data
+        pf.wait_for(get_out_house_data, years, out_house_input_abnormal)
+        status_items_out, abnormal_cal_out, abnormal_cal_per_part_out = get_out_house_data(years, out_house_input_abnormal)
+        summary_out = section_summary("out_house", years, out_house_input_abnormal)
+
+        # Process data
+        with tr.span("process data", "pandas"):
+            status_counts_out = uc.value_counts(status_items_out["Status"])
+            abnormal_counts_out = summary_out.status_counts()
+            explain_cal_counts_out = summary_out.explanation_counts()
+
+        # Generate Excel files
+        df_generate_out = abnormal_cal_out.drop("Status", axis=1)
+        df_generate_out = df_generate_out.drop("Explanation Status", axis=1)
+        generate_excel_out = excel_export("out_house", "", years, out_house_input_abnormal, lambda: (
+            uf.convert_to_excel_format_out_house(
+                df_generate_out, input_previous_year, input_current_year, int(out_house_input_abnormal)
+            )
+        ))
+
+        # Filter for abnormal items
+        abnormal_filter = uc.status_mask(abnormal_cal_out["Status"], f"Abnormal Above {out_house_input_abnormal}%") | (
+            uc.status_mask(abnormal_cal_out["Status"], f"Abnormal Below -{out_house_input_abnormal}%")
         )
-        fig.update_traces(textposition="inside", textinfo="percent+label")
-        st.plotly_chart(fig, use_container_width=True)
+        abnormal_filtered_out = abnormal_cal_out[abnormal_filter].drop("Status", axis=1)
+        abnormal_filtered_out = abnormal_filtered_out.drop("Explanation Status", axis=1)
+        generate_excel_filtered_out = excel_export("out_house", "filtered", years, out_house_input_abnormal, lambda: (
+            uf.convert_to_excel_format_out_house(
+                abnormal_filtered_out, input_previous_year, input_current_year, int(out_house_input_abnormal)
+            )
+        ))
+
+        generate_excel_per_part = excel_export("out_house", "per_part", years, out_house_input_abnormal, lambda: (
+            uf.convert_to_excel_format_out_house_per_part(
+                abnormal_cal_per_part_out, input_previous_year, input_current_year, int(out_house_input_abnormal)
+            )
+        ))
+
+        # Display metrics
+        mc = st.columns(3, border=True)
+        with mc[0]:
+            st.subheader("Item Status")
+            display_status_metrics(status_counts_out)
+
+        with mc[1]:
+            st.subheader("Abnormal Number")
+            m = st.columns(3, gap="small")
+            statuses = [f"Abnormal Above {out_house_input_abnormal}%", "Normal",
+                        f"Abnormal Below -{out_house_input_abnormal}%"]
+            for i, status in enumerate(statuses):
+                with m[i]:
+                    st.metric(label=status, value=abnormal_counts_out.get(status, 0))
+
+        with mc[2]:
+            st.subheader("Explanation Status")
+            m = st.columns(3, gap="small")
+            statuses = ["Approved", "Disapproved", "Awaiting"]
+            for i, status in enumerate(statuses):
+                with m[i]:
+                    st.metric(label=status, value=explain_cal_counts_out.get(status, 0))
+
+        # Display pie chart
+        with st.container(border=True):
+            pastel_colors = px.colors.qualitative.Pastel
+            # Statuses without any part would show as empty slices
+            observed_counts_out = abnormal_counts_out[abnormal_counts_out > 0]
+            fig = px.pie(
+                observed_counts_out,
+                values=observed_counts_out.values,
+                names=observed_counts_out.index,
+                title="Out House Cost Abnormality Distribution",
+                color=observed_counts_out.index,
+                color_discrete_map={
+                    "Normal": pastel_colors[0],
+                    f"Abnormal Above {out_house_input_abnormal}%": pastel_colors[1],
+                    f"Abnormal Below -{out_house_input_abnormal}%": pastel_colors[2],
+                },
+            )
+            fig.update_traces(textposition="inside", textinfo="percent+label")
+            st.plotly_chart(fig, use_container_width=True)
+
+        n = st.columns(2, gap="medium")
+
+        # Left column - Top 10 Above
+        with n[0]:
+            st.markdown(f"### Top 10 Above {out_house_input_abnormal}%")
+
+            # Get top 10 above data
+            top_10_above = abnormal_cal_out.dropna(subset=["Gap Price"]).drop("Status", axis=1, errors="ignore").head(10)
+            # Create a container with styling
+            st.dataframe(
+                top_10_above,
+                column_config={
+                    "Gap Price": st.column_config.NumberColumn(
+                        "Gap (%)", format="%.2f%%", help="Percentage difference from expected price"
+                    ),
+                    f"Price {input_previous_year}": st.column_config.NumberColumn(
+                        f"{input_previous_year} (Rp)", format="Rp %.0f"
+                    ),
+                    f"Price {input_current_year}": st.column_config.NumberColumn(
+                        f"{input_current_year} (Rp)", format="Rp %.0f"
+                    ),
+                },
+                use_container_width=True,
+                hide_index=False,
+            )
+
+            with st.container(border=True):
+                # Display metrics for the first entry if available
+                if not top_10_above.empty:
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric(
+                            label=f"Price {input_previous_year}",
+                            value=f"Rp {top_10_above[f'Price {input_previous_year}'].iloc[0]:,.0f}",
+                        )
+
+                    with col2:
+                        # Use the correct column name for current price
+                        st.metric(
+                            label="Highest Gap",
+                            value=f"{top_10_above['Gap Price'].iloc[0]:.2f}%",
+                            delta=f"{top_10_above['Gap Price'].iloc[0] - float(out_house_input_abnormal):.2f}%",
+                            delta_color="inverse",
+                        )
+                    with col3:
+                        # Use the correct column name for current price
+                        st.metric(
+                            label=f"Price {input_current_year}",
+                            value=f"Rp {top_10_above[f'Price {input_current_year}'].iloc[0]:,.0f}",
+                        )
+
+        with n[1]:
+            st.markdown(f"### Top 10 Below -{out_house_input_abnormal}%")
+
+            # Get top 10 below data
+            top_10_below = (
+                abnormal_cal_out.dropna(subset=["Gap Price"])
+                .drop("Status", axis=1, errors="ignore")
+                .sort_values("Gap Price")
+                .head(10)
+            )
+
+            st.dataframe(
+                top_10_below,
+                column_config={
+                    "Gap Price": st.column_config.NumberColumn(
+                        "Gap (%)", format="%.2f%%", help="Percentage difference from expected price"
+                    ),
+                    f"Price {input_previous_year}": st.column_config.NumberColumn(
+                        f"{input_previous_year} (Rp)", format="Rp %.0f"
+                    ),
+                    f"Price {input_current_year}": st.column_config.NumberColumn(
+                        f"{input_current_year} (Rp)", format="Rp %.0f"
+                    ),
+                },
+                use_container_width=True,
+                hide_index=False,
+            )
+
+            # Create a container with styling
+            with st.container(border=True):
+                # Display metrics for the first entry if available
+                if not top_10_below.empty:
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric(
+                            label=f"Price {input_previous_year}",
+                            value=f"Rp {top_10_below[f'Price {input_previous_year}'].iloc[0]:,.0f}",
+                        )
+
+                    with col2:
+                        st.metric(
+                            label="Lowest Gap",
+                            value=f"{top_10_below['Gap Price'].iloc[0]:.2f}%",
+                            delta=f"{top_10_below['Gap Price'].iloc[0] + float(out_house_input_abnormal):.2f}%",
+                            delta_color="normal",
+                        )
+
+                    with col3:
+                        st.metric(
+                            label=f"Price {input_current_year}",
+                            value=f"Rp {top_10_below[f'Price {input_current_year}'].iloc[0]:,.0f}",
+                        )
+        # Source selection
+        with st.container(border=True):
+            st.subheader("Abnormal Number Per Source")
+            sources = summary_out.values()
 
-    n = st.columns(2, gap="medium")
+            # Initialize session state if needed
+            if "selected_source" not in st.session_state:
+                st.session_state["selected_source"] = sources[0] if sources else ""
 
-    # Left column - Top 10 Above
-    with n[0]:
-        st.markdown(f"### Top 10 Above {out_house_input_abnormal}%")
+            selected_source = st.selectbox(
+                "Choose a destination:", sources, index=sources.index(st.session_state["selected_source"])
+            )
+            st.session_state["selected_source"] = selected_source
 
-        # Get top 10 above data
-        top_10_above = abnormal_cal_out.dropna(subset=["Gap Price"]).drop("Status", axis=1, errors="ignore").head(10)
-        # Create a container with styling
-        st.dataframe(
-            top_10_above,
-            column_config={
-                "Gap Price": st.column_config.NumberColumn(
-                    "Gap (%)", format="%.2f%%", help="Percentage difference from expected price"
-                ),
-                f"Price {input_previous_year}": st.column_config.NumberColumn(
-                    f"{input_previous_year} (Rp)", format="Rp %.0f"
-                ),
-                f"Price {input_current_year}": st.column_config.NumberColumn(
-                    f"{input_current_year} (Rp)", format="Rp %.0f"
-                ),
-            },
-            use_container_width=True,
-            hide_index=False,
-        )
+            # Create and display chart
+            if selected_source:
+                chart = uv.create_pie_chart_out_house(summary_out, selected_source, out_house_input_abnormal)
+                st.plotly_chart(chart, use_container_width=True)
 
-        with st.container(border=True):
-            # Display metrics for the first entry if available
-            if not top_10_above.empty:
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric(
-                        label=f"Price {input_previous_year}",
-                        value=f"Rp {top_10_above[f'Price {input_previous_year}'].iloc[0]:,.0f}",
-                    )
-
-                with col2:
-                    # Use the correct column name for current price
-                    st.metric(
-                        label="Highest Gap",
-                        value=f"{top_10_above['Gap Price'].iloc[0]:.2f}%",
-                        delta=f"{top_10_above['Gap Price'].iloc[0] - float(out_house_input_abnormal):.2f}%",
-                        delta_color="inverse",
-                    )
-                with col3:
-                    # Use the correct column name for current price
-                    st.metric(
-                        label=f"Price {input_current_year}",
-                        value=f"Rp {top_10_above[f'Price {input_current_year}'].iloc[0]:,.0f}",
-                    )
-
-    with n[1]:
-        st.markdown(f"### Top 10 Below -{out_house_input_abnormal}%")
-
-        # Get top 10 below data
-        top_10_below = (
-            abnormal_cal_out.dropna(subset=["Gap Price"])
-            .drop("Status", axis=1, errors="ignore")
-            .sort_values("Gap Price")
-            .head(10)
-        )
+                # Calculate and display statistics
+                total_items_oh = summary_out.total(selected_source)
 
-        st.dataframe(
-            top_10_below,
-            column_config={
-                "Gap Price": st.column_config.NumberColumn(
-                    "Gap (%)", format="%.2f%%", help="Percentage difference from expected price"
-                ),
-                f"Price {input_previous_year}": st.column_config.NumberColumn(
-                    f"{input_previous_year} (Rp)", format="Rp %.0f"
-                ),
-                f"Price {input_current_year}": st.column_config.NumberColumn(
-                    f"{input_current_year} (Rp)", format="Rp %.0f"
-                ),
-            },
-            use_container_width=True,
-            hide_index=False,
-        )
+                if total_items_oh > 0:
+                    source_counts = summary_out.status_counts(selected_source)
+                    normal_count_oh = source_counts.get("Normal", 0)
+                    abnormal_above_oh = source_counts.get(f"Abnormal Above {out_house_input_abnormal}%", 0)
+                    abnormal_below_oh = source_counts.get(f"Abnormal Below -{out_house_input_abnormal}%", 0)
 
-        # Create a container with styling
         with st.container(border=True):
-            # Display metrics for the first entry if available
-            if not top_10_below.empty:
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric(
-                        label=f"Price {input_previous_year}",
-                        value=f"Rp {top_10_below[f'Price {input_previous_year}'].iloc[0]:,.0f}",
-                    )
-
-                with col2:
-                    st.metric(
-                        label="Lowest Gap",
-                        value=f"{top_10_below['Gap Price'].iloc[0]:.2f}%",
-                        delta=f"{top_10_below['Gap Price'].iloc[0] + float(out_house_input_abnormal):.2f}%",
-                        delta_color="normal",
-                    )
-
-                with col3:
-                    st.metric(
-                        label=f"Price {input_current_year}",
-                        value=f"Rp {top_10_below[f'Price {input_current_year}'].iloc[0]:,.0f}",
-                    )
-    # Source selection
-    with st.container(border=True):
-        st.subheader("Abnormal Number Per Source")
-        sources = sorted(abnormal_cal_out["source"].unique())
-
-        # Initialize session state if needed
-        if "selected_source" not in st.session_state:
-            st.session_state["selected_source"] = sources[0] if sources else ""
-
-        selected_source = st.selectbox(
-            "Choose a destination:", sources, index=sources.index(st.session_state["selected_source"])
-        )
-        st.session_state["selected_source"] = selected_source
-
-        # Create and display chart
-        if selected_source:
-            chart = uv.create_pie_chart_out_house(abnormal_cal_out, selected_source, out_house_input_abnormal)
-            st.plotly_chart(chart, use_container_width=True)
-
-            # Calculate and display statistics
-            filtered_data = abnormal_cal_out[abnormal_cal_out["source"] == selected_source]
-            total_items_oh = len(filtered_data)
-
-            if total_items_oh > 0:
-                normal_count_oh = filtered_data[filtered_data["Status"] == "Normal"].shape[0]
-                abnormal_above_oh = \
-                    filtered_data[filtered_data["Status"] == f"Abnormal Above {out_house_input_abnormal}%"].shape[
-                        0
-                    ]
-                abnormal_below_oh = filtered_data[
-                    filtered_data["Status"] == f"Abnormal Below -{out_house_input_abnormal}%"
-                    ].shape[0]
-
-    with st.container(border=True):
-        st.subheader(f"{selected_source} Summary Statistics")
-        cols = st.columns(4)
-        cols[0].metric("Total Items", total_items_oh)
-        cols[1].metric("Normal", f"{normal_count_oh} ({normal_count_oh / total_items_oh * 100:.1f}%)")
-        cols[2].metric("Above Threshold", f"{abnormal_above_oh} ({abnormal_above_oh / total_items_oh * 100:.1f}%)")
-        cols[3].metric("Below Threshold", f"{abnormal_below_oh} ({abnormal_below_oh / total_items_oh * 100:.1f}%)")
-
-    # Display download buttons
-    section_name = "out_house"
-    cols = st.columns(3, border=True)
-    with cols[0]:
-        st.subheader("Full Excel")
-        st.download_button(
-            label="Download Excel File",
-            data=generate_excel_out,
-            file_name=f"{section_name}_{input_previous_year}_{input_current_year}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        )
-    with cols[1]:
-        st.subheader("Filtered Excel")
-        st.download_button(
-            label="Download Excel File",
-            data=generate_excel_filtered_out,
-            file_name=f"{section_name}_filtered_{input_previous_year}_{input_current_year}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        )
-    with cols[2]:
-        st.subheader("Filtered Per Part Excel")
-        st.download_button(
-            label="Download Excel File",
-            data=generate_excel_per_part,
-            file_name=f"{section_name}_per_part_{input_previous_year}_{input_current_year}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        )
-except Exception as e:
-    st.warning(e)
-    # if "KeyError" in str(e):
-    #     st.warning("There was an issue with your database query. Please check your input parameters.")
+            st.subheader(f"{selected_source} Summary Statistics")
+            cols = st.columns(4)
+            cols[0].metric("Total Items", total_items_oh)
+            cols[1].metric("Normal", f"{normal_count_oh} ({normal_count_oh / total_items_oh * 100:.1f}%)")
+            cols[2].metric("Above Threshold", f"{abnormal_above_oh} ({abnormal_above_oh / total_items_oh * 100:.1f}%)")
+            cols[3].metric("Below Threshold", f"{abnormal_below_oh} ({abnormal_below_oh / total_items_oh * 100:.1f}%)")
+
+        # Display download buttons
+        section_name = "out_house"
+        cols = st.columns(3, border=True)
+        with cols[0]:
+            st.subheader("Full Excel")
+            st.download_button(
+                label="Download Excel File",
+                data=generate_excel_out,
+                file_name=f"{section_name}_{input_previous_year}_{input_current_year}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            )
+        with cols[1]:
+            st.subheader("Filtered Excel")
+            st.download_button(
+                label="Download Excel File",
+                data=generate_excel_filtered_out,
+                file_name=f"{section_name}_filtered_{input_previous_year}_{input_current_year}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            )
+        with cols[2]:
+            st.subheader("Filtered Per Part Excel")
+            st.download_button(
+                label="Download Excel File",
+                data=generate_excel_per_part,
+                file_name=f"{section_name}_per_part_{input_previous_year}_{input_current_year}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            )
+    except Exception as e:
+        st.warning(e)
+        # if "KeyError" in str(e):
+        #     st.warning("There was an issue with your database query. Please check your input parameters.")
+
 
 # ======================================== PACKING ========================================
-st.divider()
-st.header("PACKING")
 
 
 # Cache query results for packing data
-@st.cache_data(ttl="15m")
+@frame_cache(ttl="15m")
 def get_packing_data(years, abnormal_threshold):
     try:
-        status_items = conn.query(up.status_product_two_year(years))
-        abnormal_cal = conn.query(up.packing_max_abnormal_cal(years, abnormal_threshold))
+        precomputed = precomputed_frames("packing", years, abnormal_threshold)
+        if precomputed is not None:
+            return precomputed
+
+        results = qr.run_queries(
+            read_connection(), dd.packing_queries(years, abnormal_threshold), prefix="packing",
+            context={"years": list(years), "threshold": abnormal_threshold},
+        )
+        status_items = uc.categorize_status_items(results["status_items"])
+        abnormal_cal = uc.categorize_packing(results["abnormal_cal"], abnormal_threshold)
         return status_items, abnormal_cal
     except Exception as e:
         # st.warning(e)
@@ -672,231 +894,490 @@ def get_packing_data(years, abnormal_threshold):
             return pd.DataFrame(), pd.DataFrame()
 
 
-try:
-    # Get packing data
-    status_items_packing, abnormal_cal_packing = get_packing_data(years, packing_input_abnormal)
-
-    # Process data
-
-    status_counts_packing = status_items_packing["Status"].value_counts()
-    abnormal_counts_packing = abnormal_cal_packing["Status"].value_counts()
-    explanation_counts_packing = abnormal_cal_packing["Explanation Status"].value_counts()
-
-    # Generate Excel files
-    generate_excel_packing = uf.convert_to_excel_format_packaging(
-        abnormal_cal_packing, input_previous_year, input_current_year, int(packing_input_abnormal)
-    )
-
-    abnormal_filter_packing = (abnormal_cal_packing["Status"] == f"Abnormal Above {packing_input_abnormal}%") | (
-            abnormal_cal_packing["Status"] == f"Abnormal Below {packing_input_abnormal}%"
-    )
-    abnormal_filtered_packing = abnormal_cal_packing[abnormal_filter_packing]
-    generate_excel_filtered_packing = uf.convert_to_excel_format_packaging(
-        abnormal_filtered_packing, input_previous_year, input_current_year, int(packing_input_abnormal)
-    )
-
-    # Display metrics
-    mc = st.columns(3, border=True)
-    with mc[0]:
-        st.subheader("Item Status")
-        display_status_metrics(status_counts_packing)
-
-    with mc[1]:
-        st.subheader("Abnormal Number")
-        m = st.columns(3, gap="small")
-        statuses = [f"Abnormal Above {packing_input_abnormal}%", "Normal", f"Abnormal Below -{packing_input_abnormal}%"]
-        for i, status in enumerate(statuses):
-            with m[i]:
-                st.metric(label=status, value=abnormal_counts_packing.get(status, 0))
-    with mc[2]:
-        st.subheader("Explanation Status")
-        m = st.columns(3, gap="small")
-        statuses = ["Approved", "Disapproved", "Awaiting"]
-        for i, status in enumerate(statuses):
-            with m[i]:
-                st.metric(label=status, value=explanation_counts_packing.get(status, 0))
-
-    # Destination selection
-    with st.container(border=True):
-        st.subheader("Abnormal Number Per Destination")
-        destinations = sorted(abnormal_cal_packing["destination"].unique())
-
-        # Initialize session state if needed
-        if "selected_destination" not in st.session_state:
-            st.session_state["selected_destination"] = destinations[0] if destinations else ""
-
-        selected_destination = st.selectbox(
-            "Choose a destination:",
-            destinations,
-            index=destinations.index(st.session_state["selected_destination"])
-            if st.session_state["selected_destination"] in destinations
-            else 0,
-        )
-        st.session_state["selected_destination"] = selected_destination
-
-        # Create and display chart
-        if selected_destination:
-            chart = uv.create_pie_chart_packing(abnormal_cal_packing, selected_destination, packing_input_abnormal)
-            st.plotly_chart(chart, use_container_width=True)
-
-            # Calculate and display statistics
-            filtered_data = abnormal_cal_packing[abnormal_cal_packing["destination"] == selected_destination]
-            total_items = len(filtered_data)
-
-            if total_items > 0:
-                normal_count = filtered_data[filtered_data["Status"] == "Normal"].shape[0]
-                abnormal_above = \
-                    filtered_data[filtered_data["Status"] == f"Abnormal Above {packing_input_abnormal}%"].shape[0]
-                abnormal_below = \
-                    filtered_data[filtered_data["Status"] == f"Abnormal Below -{packing_input_abnormal}%"].shape[0]
-
-    with st.container(border=True):
-        st.subheader(f"{selected_destination} Summary Statistics")
-        cols = st.columns(4)
-        cols[0].metric("Total Items", total_items)
-        cols[1].metric("Normal", f"{normal_count} ({normal_count / total_items * 100:.1f}%)")
-        cols[2].metric("Above Threshold", f"{abnormal_above} ({abnormal_above / total_items * 100:.1f}%)")
-        cols[3].metric("Below Threshold", f"{abnormal_below} ({abnormal_below / total_items * 100:.1f}%)")
-
-    n = st.columns(2, gap="medium")
-
-    # Left column - Top 10 Above
-    with n[0]:
-        st.markdown(f"### Top 10 Above {packing_input_abnormal}%")
-
-        # Get top 10 above data
-        top_10_above = (
-            filtered_data.dropna(subset=["Gap Total Cost"])
-            .drop("Status", axis=1, errors="ignore")
-            .sort_values("Gap Total Cost", ascending=False)
-            .head(10)
-        )
-        top_10_above = top_10_above[
-            [
-                "part_no",
-                "part_name",
-                "destination",
-                f"Max Total Cost {input_previous_year}",
-                f"Max Total Cost {input_current_year}",
-                "Gap Total Cost",
+@st.fragment
+@timed_section("packing")
+def packing_section(years, packing_input_abnormal):
+    input_previous_year, input_current_year = years
+    try:
+        # Get packing data
+        pf.wait_for(get_packing_data, years, packing_input_abnormal)
+        status_items_packing, abnormal_cal_packing = get_packing_data(years, packing_input_abnormal)
+        summary_packing = section_summary("packing", years, packing_input_abnormal)
+
+        # Process data
+        with tr.span("process data", "pandas"):
+            status_counts_packing = uc.value_counts(status_items_packing["Status"])
+            abnormal_counts_packing = summary_packing.status_counts()
+            explanation_counts_packing = summary_packing.explanation_counts()
+
+        # Generate Excel files
+        generate_excel_packing = excel_export("packing", "", years, packing_input_abnormal, lambda: (
+            uf.convert_to_excel_format_packaging(
+                abnormal_cal_packing, input_previous_year, input_current_year, int(packing_input_abnormal)
+            )
+        ))
+
+        abnormal_filter_packing = uc.status_mask(
+            abnormal_cal_packing["Status"], f"Abnormal Above {packing_input_abnormal}%"
+        ) | uc.status_mask(abnormal_cal_packing["Status"], f"Abnormal Below -{packing_input_abnormal}%")
+        abnormal_filtered_packing = abnormal_cal_packing[abnormal_filter_packing]
+        generate_excel_filtered_packing = excel_export("packing", "filtered", years, packing_input_abnormal, lambda: (
+            uf.convert_to_excel_format_packaging(
+                abnormal_filtered_packing, input_previous_year, input_current_year, int(packing_input_abnormal)
+            )
+        ))
+
+        # Display metrics
+        mc = st.columns(3, border=True)
+        with mc[0]:
+            st.subheader("Item Status")
+            display_status_metrics(status_counts_packing)
+
+        with mc[1]:
+            st.subheader("Abnormal Number")
+            m = st.columns(3, gap="small")
+            statuses = [f"Abnormal Above {packing_input_abnormal}%", "Normal", f"Abnormal Below -{packing_input_abnormal}%"]
+            for i, status in enumerate(statuses):
+                with m[i]:
+                    st.metric(label=status, value=abnormal_counts_packing.get(status, 0))
+        with mc[2]:
+            st.subheader("Explanation Status")
+            m = st.columns(3, gap="small")
+            statuses = ["Approved", "Disapproved", "Awaiting"]
+            for i, status in enumerate(statuses):
+                with m[i]:
+                    st.metric(label=status, value=explanation_counts_packing.get(status, 0))
+
+        # Destination selection
+        with st.container(border=True):
+            st.subheader("Abnormal Number Per Destination")
+            destinations = summary_packing.values()
+
+            # Initialize session state if needed
+            if "selected_destination" not in st.session_state:
+                st.session_state["selected_destination"] = destinations[0] if destinations else ""
+
+            selected_destination = st.selectbox(
+                "Choose a destination:",
+                destinations,
+                index=destinations.index(st.session_state["selected_destination"])
+                if st.session_state["selected_destination"] in destinations
+                else 0,
+            )
+            st.session_state["selected_destination"] = selected_destination
+
+            # Create and display chart
+            if selected_destination:
+                chart = uv.create_pie_chart_packing(summary_packing, selected_destination, packing_input_abnormal)
+                st.plotly_chart(chart, use_container_width=True)
+
+                # Calculate and display statistics
+                filtered_data = abnormal_cal_packing[
+                    uc.status_mask(abnormal_cal_packing["destination"], selected_destination)
+                ]
+                total_items = summary_packing.total(selected_destination)
+
+                if total_items > 0:
+                    destination_counts = summary_packing.status_counts(selected_destination)
+                    normal_count = destination_counts.get("Normal", 0)
+                    abnormal_above = destination_counts.get(f"Abnormal Above {packing_input_abnormal}%", 0)
+                    abnormal_below = destination_counts.get(f"Abnormal Below -{packing_input_abnormal}%", 0)
+
+        with st.container(border=True):
+            st.subheader(f"{selected_destination} Summary Statistics")
+            cols = st.columns(4)
+            cols[0].metric("Total Items", total_items)
+            cols[1].metric("Normal", f"{normal_count} ({normal_count / total_items * 100:.1f}%)")
+            cols[2].metric("Above Threshold", f"{abnormal_above} ({abnormal_above / total_items * 100:.1f}%)")
+            cols[3].metric("Below Threshold", f"{abnormal_below} ({abnormal_below / total_items * 100:.1f}%)")
+
+        n = st.columns(2, gap="medium")
+
+        # Left column - Top 10 Above
+        with n[0]:
+            st.markdown(f"### Top 10 Above {packing_input_abnormal}%")
+
+            # Get top 10 above data
+            top_10_above = (
+                filtered_data.dropna(subset=["Gap Total Cost"])
+                .drop("Status", axis=1, errors="ignore")
+                .sort_values("Gap Total Cost", ascending=False)
+                .head(10)
+            )
+            top_10_above = top_10_above[
+                [
+                    "part_no",
+                    "part_name",
+                    "destination",
+                    f"Max Total Cost {input_previous_year}",
+                    f"Max Total Cost {input_current_year}",
+                    "Gap Total Cost",
+                ]
+            ]
+            # Create a container with styling
+            st.dataframe(
+                top_10_above,
+                column_config={
+                    "Gap Total Cost": st.column_config.NumberColumn(
+                        "Gap Total Cost (%)", format="%.2f%%", help="Percentage difference from expected price"
+                    ),
+                    f"Max Total Cost {input_previous_year}": st.column_config.NumberColumn(
+                        f"Total Cost {input_previous_year} (Rp)", format="Rp %.0f"
+                    ),
+                    f"Max Total Cost {input_current_year}": st.column_config.NumberColumn(
+                        f"Total Cost {input_current_year} (Rp)", format="Rp %.0f"
+                    ),
+                },
+                use_container_width=True,
+                hide_index=False,
+            )
+
+            with st.container(border=True):
+                # Display metrics for the first entry if available
+                if not top_10_above.empty:
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric(
+                            label=f"Total Cost {input_previous_year}",
+                            value=f"Rp {top_10_above[f'Max Total Cost {input_previous_year}'].iloc[0]:,.0f}",
+                        )
+
+                    with col2:
+                        # Use the correct column name for current price
+                        st.metric(
+                            label="Highest Gap",
+                            value=f"{top_10_above['Gap Total Cost'].iloc[0]:.2f}%",
+                            delta=f"{top_10_above['Gap Total Cost'].iloc[0] - float(packing_input_abnormal):.2f}%",
+                            delta_color="inverse",
+                        )
+                    with col3:
+                        # Use the correct column name for current price
+                        st.metric(
+                            label=f"Total Cost {input_current_year}",
+                            value=f"Rp {top_10_above[f'Max Total Cost {input_current_year}'].iloc[0]:,.0f}",
+                        )
+
+        with n[1]:
+            st.markdown(f"### Top 10 Below -{packing_input_abnormal}%")
+
+            # Get top 10 below data
+            top_10_below = (
+                filtered_data.dropna(subset=["Gap Total Cost"])
+                .drop("Status", axis=1, errors="ignore")
+                .sort_values("Gap Total Cost")
+                .head(10)
+            )
+
+            top_10_below = top_10_below[
+                [
+                    "part_no",
+                    "part_name",
+                    "destination",
+                    f"Max Total Cost {input_previous_year}",
+                    f"Max Total Cost {input_current_year}",
+                    "Gap Total Cost",
+                ]
             ]
-        ]
-        # Create a container with styling
+
+            st.dataframe(
+                top_10_below,
+                column_config={
+                    "Gap Total Cost": st.column_config.NumberColumn(
+                        "Gap Total Cost (%)", format="%.2f%%", help="Percentage difference from expected price"
+                    ),
+                    f"Max Total Cost {input_previous_year}": st.column_config.NumberColumn(
+                        f"Total Cost {input_previous_year} (Rp)", format="Rp %.0f"
+                    ),
+                    f"Max Total Cost {input_current_year}": st.column_config.NumberColumn(
+                        f"Total Cost {input_current_year} (Rp)", format="Rp %.0f"
+                    ),
+                },
+                use_container_width=True,
+                hide_index=False,
+            )
+
+            # Create a container with styling
+            with st.container(border=True):
+                # Display metrics for the first entry if available
+                if not top_10_below.empty:
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric(
+                            label=f"Total Cost {input_previous_year}",
+                            value=f"Rp {top_10_below[f'Max Total Cost {input_previous_year}'].iloc[0]:,.0f}",
+                        )
+
+                    with col2:
+                        st.metric(
+                            label="Lowest Gap",
+                            value=f"{top_10_below['Gap Total Cost'].iloc[0]:.2f}%",
+                            delta=f"{top_10_below['Gap Total Cost'].iloc[0] + float(packing_input_abnormal):.2f}%",
+                            delta_color="normal",
+                        )
+
+                    with col3:
+                        st.metric(
+                            label=f"Total Cost {input_current_year}",
+                            value=f"Rp {top_10_below[f'Max Total Cost {input_current_year}'].iloc[0]:,.0f}",
+                        )
+
+        # Display download buttons
+        display_download_buttons(generate_excel_packing, generate_excel_filtered_packing, "packing")
+    except Exception as e:
+        st.warning(e)
+        # if "KeyError" in str(e):
+        #     st.warning("There was an issue with your database query. Please check your input parameters.")
+
+
+# ======================================== SECTIONS ========================================
+sections = {
+    "IN HOUSE": (in_house_section, get_in_house_data, in_house_input_abnormal),
+    "OUT HOUSE": (out_house_section, get_out_house_data, out_house_input_abnormal),
+    "PACKING": (packing_section, get_packing_data, packing_input_abnormal),
+}
+
+if st.toggle("Load sections on demand", key="on_demand_sections",
+             help="Only query the selected section; the others are prefetched in the background"):
+    selected_section = st.radio("Section", list(sections.keys()), horizontal=True, label_visibility="collapsed")
+    section_fn, _, section_threshold = sections[selected_section]
+
+    st.header(selected_section)
+    section_fn(years, section_threshold)
+
+    # Warm the cache for the remaining sections once the first one is on screen
+    for name, (_, loader, threshold) in sections.items():
+        if name != selected_section:
+            pf.prefetch(loader, years, threshold)
+else:
+    # Dispatch every section's queries at once, then render each as its data arrives
+    for _, loader, threshold in sections.values():
+        pf.prefetch(loader, years, threshold)
+
+    for i, (name, (section_fn, _, section_threshold)) in enumerate(sections.items()):
+        if i > 0:
+            st.divider()
+        st.header(name)
+        section_fn(years, section_threshold)
+
+
+# ======================================== MULTI-YEAR TREND ========================================
+@get_cache_manager().memoize("trend", ttl="15m", cacheable=cm.complete_result)
+def get_trend_data(section, trend_years):
+    try:
+        results = qr.run_queries(read_connection(), {section: dd.trend_queries(trend_years)[section]}, prefix="trend",
+                                 context={"years": list(trend_years)})
+        return dd.pivot_trend(results[section], trend_years)
+    except Exception as e:
+        logger.warning("Failed to load %s trend: %s", section, e)
+        st.warning(f"Failed to load the {section.replace('_', ' ')} trend.")
+        return pd.DataFrame()
+
+
+@st.fragment
+@timed_section("trend")
+def trend_section(years):
+    with st.expander("📈 Multi-Year Trend"):
+        with st.form(key="trend_form", border=False):
+            col1, col2 = st.columns([0.7, 0.3])
+            trend_years_input = col1.text_input("Years (comma separated)", value=", ".join(map(str, years)))
+            trend_data_type = col2.selectbox("Data Type", options=["in_house", "out_house", "packing"])
+            trend_button = st.form_submit_button(label="Show Trend", type="primary")
+
+        if not trend_button:
+            return
+
+        try:
+            trend_years = sorted({int(year) for year in trend_years_input.replace(" ", "").split(",") if year})
+        except ValueError:
+            st.warning("Years must be comma separated numbers, e.g. 2022, 2023, 2024")
+            return
+        if len(trend_years) < 2:
+            st.warning("Enter at least two years")
+            return
+
+        trend = get_trend_data(trend_data_type, tuple(trend_years))
+        if trend.empty:
+            st.info("No data for the selected years")
+            return
+
+        percent_columns = [column for column in trend.columns if column.endswith("%")]
         st.dataframe(
-            top_10_above,
+            trend,
             column_config={
-                "Gap Total Cost": st.column_config.NumberColumn(
-                    "Gap Total Cost (%)", format="%.2f%%", help="Percentage difference from expected price"
-                ),
-                f"Max Total Cost {input_previous_year}": st.column_config.NumberColumn(
-                    f"Total Cost {input_previous_year} (Rp)", format="Rp %.0f"
-                ),
-                f"Max Total Cost {input_current_year}": st.column_config.NumberColumn(
-                    f"Total Cost {input_current_year} (Rp)", format="Rp %.0f"
-                ),
+                column: st.column_config.NumberColumn(column, format="%.2f%%") for column in percent_columns
             },
             use_container_width=True,
-            hide_index=False,
+            hide_index=True,
         )
 
-        with st.container(border=True):
-            # Display metrics for the first entry if available
-            if not top_10_above.empty:
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric(
-                        label=f"Total Cost {input_previous_year}",
-                        value=f"Rp {top_10_above[f'Max Total Cost {input_previous_year}'].iloc[0]:,.0f}",
-                    )
-
-                with col2:
-                    # Use the correct column name for current price
-                    st.metric(
-                        label="Highest Gap",
-                        value=f"{top_10_above['Gap Total Cost'].iloc[0]:.2f}%",
-                        delta=f"{top_10_above['Gap Total Cost'].iloc[0] - float(packing_input_abnormal):.2f}%",
-                        delta_color="inverse",
-                    )
-                with col3:
-                    # Use the correct column name for current price
-                    st.metric(
-                        label=f"Total Cost {input_current_year}",
-                        value=f"Rp {top_10_above[f'Max Total Cost {input_current_year}'].iloc[0]:,.0f}",
-                    )
-
-    with n[1]:
-        st.markdown(f"### Top 10 Below -{packing_input_abnormal}%")
-
-        # Get top 10 below data
-        top_10_below = (
-            filtered_data.dropna(subset=["Gap Total Cost"])
-            .drop("Status", axis=1, errors="ignore")
-            .sort_values("Gap Total Cost")
-            .head(10)
+        buffer = io.BytesIO()
+        with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+            trend.to_excel(writer, index=False, sheet_name="Trend")
+        st.download_button(
+            label="Download Excel File",
+            data=buffer.getvalue(),
+            file_name=f"{trend_data_type}_trend_{trend_years[0]}_{trend_years[-1]}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         )
 
-        top_10_below = top_10_below[
-            [
-                "part_no",
-                "part_name",
-                "destination",
-                f"Max Total Cost {input_previous_year}",
-                f"Max Total Cost {input_current_year}",
-                "Gap Total Cost",
-            ]
-        ]
 
-        st.dataframe(
-            top_10_below,
-            column_config={
-                "Gap Total Cost": st.column_config.NumberColumn(
-                    "Gap Total Cost (%)", format="%.2f%%", help="Percentage difference from expected price"
-                ),
-                f"Max Total Cost {input_previous_year}": st.column_config.NumberColumn(
-                    f"Total Cost {input_previous_year} (Rp)", format="Rp %.0f"
-                ),
-                f"Max Total Cost {input_current_year}": st.column_config.NumberColumn(
-                    f"Total Cost {input_current_year} (Rp)", format="Rp %.0f"
-                ),
-            },
-            use_container_width=True,
-            hide_index=False,
+st.divider()
+trend_section(years)
+
+
+# ======================================== DRILL-DOWN ========================================
+@st.cache_data(ttl="15m")
+def get_drilldown_page(section, years, threshold, filters, descending, after):
+    sql = dr.page_query(section, years, threshold, filters, descending=descending, after=after)
+    return qi.timed_query(read_connection().query, f"drilldown.{section}", sql,
+                          context={"years": list(years), "threshold": threshold})
+
+
+@st.cache_data(ttl="15m")
+def get_drilldown_count(section, years, threshold, filters):
+    return int(read_connection().query(dr.count_query(section, years, threshold, filters)).iloc[0, 0])
+
+
+@st.cache_data(ttl="15m")
+def get_drilldown_dimensions(section, years):
+    sql = dr.dimension_values_query(section, years)
+    return read_connection().query(sql).iloc[:, 0].dropna().tolist() if sql else []
+
+
+def next_drilldown_page(after):
+    st.session_state["drilldown_cursors"].append(after)
+
+
+def previous_drilldown_page():
+    st.session_state["drilldown_cursors"].pop()
+
+
+@st.fragment
+@timed_section("drilldown")
+def drilldown_section(years, thresholds):
+    with st.expander("🔎 Browse All Parts"):
+        col1, col2, col3 = st.columns(3)
+        section = col1.selectbox("Data Type", options=list(thresholds), key="drilldown_data_type")
+        threshold = thresholds[section]
+        spec = dr.SECTIONS[section]
+        status_options = uc.ABNORMAL_FLAGS if section == "in_house" else uc.threshold_statuses(threshold)
+        status = col2.multiselect("Status", options=status_options, key=f"drilldown_status_{section}")
+        explanation = col3.multiselect("Explanation Status", options=uc.EXPLANATION_STATUSES,
+                                       key=f"drilldown_explanation_{section}")
+
+        col1, col2, col3, col4 = st.columns(4)
+        dimension = []
+        if spec["dimension"]:
+            dimension = col1.multiselect(spec["dimension"].title(), options=get_drilldown_dimensions(section, years),
+                                         key=f"drilldown_dimension_{section}")
+        gap_min = col2.number_input("Gap from (%)", value=None, key=f"drilldown_gap_min_{section}")
+        gap_max = col3.number_input("Gap to (%)", value=None, key=f"drilldown_gap_max_{section}")
+        descending = col4.radio("Sort", ["Largest gap first", "Smallest gap first"],
+                                key=f"drilldown_sort_{section}") == "Largest gap first"
+
+        filters = {"status": status, "dimension": dimension, "explanation": explanation,
+                   "gap_min": gap_min, "gap_max": gap_max}
+
+        # Any change of section, period or filter starts again from the first page
+        browse_key = (section, tuple(years), threshold, repr(filters), descending)
+        if st.session_state.get("drilldown_key") != browse_key:
+            st.session_state["drilldown_key"] = browse_key
+            st.session_state["drilldown_cursors"] = [None]
+        cursors = st.session_state["drilldown_cursors"]
+
+        try:
+            page = get_drilldown_page(section, years, threshold, filters, descending, cursors[-1])
+            total = get_drilldown_count(section, years, threshold, filters)
+        except Exception as e:
+            st.warning(f"Failed to load parts: {e}")
+            return
+
+        has_next = len(page) > dr.PAGE_SIZE
+        page = page.head(dr.PAGE_SIZE).drop(columns=dr.key_columns(section))
+        pages = max((total + dr.PAGE_SIZE - 1) // dr.PAGE_SIZE, 1)
+        st.caption(f"Page {len(cursors)} of {pages:,} · {total:,} matching rows")
+        st.dataframe(page, use_container_width=True, hide_index=True)
+
+        col1, col2, _ = st.columns([0.15, 0.15, 0.7])
+        col1.button("◀ Previous", disabled=len(cursors) == 1, on_click=previous_drilldown_page,
+                    key="drilldown_previous", use_container_width=True)
+        col2.button("Next ▶", disabled=not has_next, on_click=next_drilldown_page,
+                    args=(dr.page_key(page, section) if has_next else None,), key="drilldown_next",
+                    use_container_width=True)
+
+
+drilldown_section(years, {"in_house": in_house_input_abnormal, "out_house": out_house_input_abnormal,
+                          "packing": packing_input_abnormal})
+
+
+# ======================================== PART SEARCH ========================================
+@st.cache_data(ttl="5m")
+def search_parts(term, mode):
+    return qi.timed_query(lambda sql: conn.query(sql, params=sp.search_params(term, mode), ttl=0),
+                          f"part_search.{mode}", sp.search_parts(mode))
+
+
+@st.cache_data(ttl="5m")
+def get_part_history(section, part_no):
+    params = {"part_no": part_no}
+    return (conn.query(sp.part_history(section), params=params, ttl=0),
+            conn.query(sp.explanation_timeline(section), params=params, ttl=0))
+
+
+@st.fragment
+@timed_section("part_search")
+def part_search_section():
+    with st.expander("🔍 Part Search"):
+        col1, col2 = st.columns([0.7, 0.3])
+        term = col1.text_input("Part number or part name", key="part_search_term")
+        mode = col2.selectbox(
+            "Match", options=sp.SEARCH_MODES, key="part_search_mode",
+            format_func={"prefix": "Part No starts with", "contains": "Part No contains",
+                         "name": "Part Name (fuzzy)"}.get,
         )
+        if len(term.strip()) < 2:
+            st.caption("Type at least two characters")
+            return
+
+        try:
+            matches = search_parts(term.strip(), mode)
+        except Exception as e:
+            st.warning(f"Search failed: {e}")
+            return
+        if matches.empty:
+            st.info("No matching parts")
+            return
+
+        labels = [f"{row.part_no} · {row.part_name} ({row.section})" for row in matches.itertuples()]
+        selected = st.selectbox(f"{len(matches)} matches", options=range(len(matches)), format_func=labels.__getitem__,
+                                key="part_search_selected")
+        part = matches.iloc[selected]
+        history, timeline = get_part_history(part["section"], part["part_no"])
+
+        st.markdown(f"#### {part['part_no']} · {part['part_name']}")
+        st.dataframe(history, use_container_width=True, hide_index=True)
+        st.markdown("##### Explanations")
+        if timeline.empty:
+            st.caption("No explanations recorded")
+        else:
+            st.dataframe(timeline, use_container_width=True, hide_index=True)
 
-        # Create a container with styling
-        with st.container(border=True):
-            # Display metrics for the first entry if available
-            if not top_10_below.empty:
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric(
-                        label=f"Total Cost {input_previous_year}",
-                        value=f"Rp {top_10_below[f'Max Total Cost {input_previous_year}'].iloc[0]:,.0f}",
-                    )
-
-                with col2:
-                    st.metric(
-                        label="Lowest Gap",
-                        value=f"{top_10_below['Gap Total Cost'].iloc[0]:.2f}%",
-                        delta=f"{top_10_below['Gap Total Cost'].iloc[0] + float(packing_input_abnormal):.2f}%",
-                        delta_color="normal",
-                    )
-
-                with col3:
-                    st.metric(
-                        label=f"Total Cost {input_current_year}",
-                        value=f"Rp {top_10_below[f'Max Total Cost {input_current_year}'].iloc[0]:,.0f}",
-                    )
-
-    # Display download buttons
-    display_download_buttons(generate_excel_packing, generate_excel_filtered_packing, "packing")
-except Exception as e:
-    st.warning(e)
-    # if "KeyError" in str(e):
-    #     st.warning("There was an issue with your database query. Please check your input parameters.")
 
-allowed_update_roles = ["archmagus", "oracles"]
-if st.session_state["roles"][0] in allowed_update_roles:
+part_search_section()
+
+
+# ======================================== REPORT & APPROVE ========================================
+@st.fragment
+@timed_section("report")
+def report_section(years, in_house_input_abnormal, out_house_input_abnormal, packing_input_abnormal):
+    input_previous_year, input_current_year = years
+    for _, loader, threshold in sections.values():
+        pf.wait_for(loader, years, threshold)
+    _, abnormal_cal_impl, full_abnormal_cal_impl, _ = get_in_house_data(years, in_house_input_abnormal)
+    full_abnormal_cal_impl["Status Abnormal"] = abnormal_cal_impl["Status Abnormal"]
+    _, abnormal_cal_out, _ = get_out_house_data(years, out_house_input_abnormal)
+    _, abnormal_cal_packing = get_packing_data(years, packing_input_abnormal)
+
     current_date = datetime.now()
     formatted_date = current_date.strftime("%d%m%y").upper()
     st.divider()
@@ -917,15 +1398,20 @@ if st.session_state["roles"][0] in allowed_update_roles:
 
         # If generate button is clicked, generate the PDF and show download button
         if generate_button:
-            with st.spinner("Generating PDF..."):
-                pdf_data = generate_report(
+            boundaries = [int(in_house_input_abnormal), int(out_house_input_abnormal), int(packing_input_abnormal)]
+            with st.spinner("Generating PDF..."), tr.span(f"generate_report.{data_type}", "pdf"):
+                try:
+                    pdf_data = ua.read_report(years, boundaries, data_type, get_data_versions())
+                except Exception as e:
+                    logger.warning("Failed to read precomputed %s report: %s", data_type, e)
+                    pdf_data = None
+                pdf_data = pdf_data or generate_report(
                     data_type,
                     years=years,
                     df_inhouse=full_abnormal_cal_impl,
                     df_outhouse=abnormal_cal_out,
                     df_packing=abnormal_cal_packing,
-                    boundaries=[int(in_house_input_abnormal), int(out_house_input_abnormal),
-                                int(packing_input_abnormal)]
+                    boundaries=boundaries,
                 )
 
                 # Show download button in the placeholder
@@ -939,14 +1425,13 @@ if st.session_state["roles"][0] in allowed_update_roles:
 
     with col[1]:
         st.subheader("Approve Normal Data")
-        in_house_normal_data = abnormal_cal_impl[abnormal_cal_impl["Status Abnormal"] == "Normal"].drop(
+        in_house_normal_data = abnormal_cal_impl[uc.status_mask(abnormal_cal_impl["Status Abnormal"], "Normal")].drop(
             "Status Abnormal", axis=1
         ).drop("Explanation Status", axis=1)
-        out_house_normal_data = abnormal_cal_out[abnormal_cal_out["Status"] == "Normal"].drop("Status", axis=1).drop(
-            "Explanation Status", axis=1)
-        packing_normal_data = abnormal_cal_packing[abnormal_cal_packing["Status"] == "Normal"].drop("Status",
-                                                                                                    axis=1).drop(
-            "Explanation Status", axis=1)
+        out_house_normal_data = abnormal_cal_out[uc.status_mask(abnormal_cal_out["Status"], "Normal")].drop(
+            "Status", axis=1).drop("Explanation Status", axis=1)
+        packing_normal_data = abnormal_cal_packing[uc.status_mask(abnormal_cal_packing["Status"], "Normal")].drop(
+            "Status", axis=1).drop("Explanation Status", axis=1)
 
         col1, col2, col3 = st.columns(3)
 
@@ -990,3 +1475,148 @@ if st.session_state["roles"][0] in allowed_update_roles:
                         result = ra.approve_packing_data(packing_normal_data, db_connection, input_current_year)
                     except Exception:
                         st.error("❌ Failed to approve the Normal data")
+
+
+allowed_update_roles = ["archmagus", "oracles"]
+if st.session_state["roles"][0] in allowed_update_roles:
+    report_section(years, in_house_input_abnormal, out_house_input_abnormal, packing_input_abnormal)
+
+
+# ======================================== QUERY DIAGNOSTICS ========================================
+@st.fragment
+def query_diagnostics_section():
+    with st.expander("🛠️ Query Diagnostics"):
+        st.toggle(
+            "Capture EXPLAIN (ANALYZE, BUFFERS)", value=qi.EXPLAIN_DEFAULT, key="explain_enabled",
+            help="Re-runs this session's dashboard queries with EXPLAIN; applies to queries executed after enabling"
+        )
+
+        summary = pd.DataFrame(qi.summary())
+        if summary.empty:
+            st.info("No queries recorded yet")
+            return
+
+        st.subheader("Per Query")
+        st.dataframe(
+            summary[["name", "source", "calls", "mean_seconds", "max_seconds", "total_seconds", "rows"]],
+            column_config={
+                "mean_seconds": st.column_config.NumberColumn("Mean (s)", format="%.3f"),
+                "max_seconds": st.column_config.NumberColumn("Max (s)", format="%.3f"),
+                "total_seconds": st.column_config.NumberColumn("Total (s)", format="%.3f"),
+            },
+            use_container_width=True,
+            hide_index=True,
+        )
+
+        st.subheader("Recent Executions")
+        recent = pd.DataFrame(qi.recent()).drop(columns="plan", errors="ignore")
+        st.dataframe(recent, use_container_width=True, hide_index=True)
+
+        explained = summary[summary["plan"].notna()]
+        if not explained.empty:
+            st.subheader("Query Plan")
+            plan_name = st.selectbox("Query", explained["name"].tolist())
+            st.code(explained.loc[explained["name"] == plan_name, "plan"].iloc[0], language="text")
+
+        if st.button("Reset Statistics"):
+            qi.reset()
+            st.rerun(scope="fragment")
+
+
+# ======================================== CACHE STATISTICS ========================================
+@st.fragment
+def cache_statistics_section():
+    with st.expander("🗄️ Cache Statistics"):
+        manager = get_cache_manager()
+        stats = manager.stats()
+
+        hits, misses = int(stats["hits"].sum()), int(stats["misses"].sum())
+        cols = st.columns(4)
+        cols[0].metric("Used", f"{manager.used_bytes / 1e6:,.1f} MB",
+                       help=f"Budget {manager.budget_bytes / 1e6:,.0f} MB, {manager.policy} eviction")
+        cols[1].metric("Entries", int(stats["entries"].sum()))
+        cols[2].metric("Hit Rate", f"{hits / (hits + misses) * 100:.1f}%" if hits + misses else "-")
+        cols[3].metric("Evictions", int(stats["evictions"].sum()))
+
+        if stats.empty:
+            st.info("Nothing cached yet")
+            return
+
+        st.subheader("Per Namespace")
+        st.dataframe(
+            stats.assign(megabytes=stats["bytes"] / 1e6).drop(columns="bytes"),
+            column_config={
+                "hit_rate": st.column_config.NumberColumn("Hit Rate", format="percent"),
+                "megabytes": st.column_config.NumberColumn("Size (MB)", format="%.2f"),
+            },
+            use_container_width=True,
+            hide_index=True,
+        )
+
+        st.subheader("Largest Entries")
+        largest = manager.largest()
+        st.dataframe(
+            largest.assign(megabytes=largest["bytes"] / 1e6).drop(columns="bytes"),
+            column_config={
+                "cost_seconds": st.column_config.NumberColumn("Build (s)", format="%.3f"),
+                "megabytes": st.column_config.NumberColumn("Size (MB)", format="%.2f"),
+            },
+            use_container_width=True,
+            hide_index=True,
+        )
+
+        if st.button("Clear Cache"):
+            manager.clear()
+            st.rerun(scope="fragment")
+
+
+admin_roles = ["archmagus"]
+if st.session_state["roles"][0] in admin_roles:
+    query_diagnostics_section()
+    cache_statistics_section()
+
+
+# ======================================== TIMING OVERLAY ========================================
+@st.fragment
+def timing_overlay_section():
+    with st.expander("⏱️ Timing Breakdown", expanded=True):
+        traces = st.session_state.get("section_traces", {})
+        if not traces:
+            st.info("No section renders recorded yet")
+            return
+
+        # Sections re-rendered on their own (fragment reruns) replace their trace in place
+        st.button("Refresh")
+
+        for name, trace in traces.items():
+            breakdown = pd.DataFrame(trace.breakdown())
+            # Merged prefetch spans can start before the section itself
+            total_ms = (breakdown["start_ms"] + breakdown["duration_ms"]).max()
+            st.subheader(f"{name} — {total_ms:,.0f} ms")
+
+            by_stage = breakdown.groupby("category")["self_ms"].sum().sort_values(ascending=False)
+            st.bar_chart(by_stage, horizontal=True, y_label="ms")
+
+            breakdown["name"] = breakdown["depth"].map(lambda depth: "\u2003" * depth) + breakdown["name"]
+            st.dataframe(
+                breakdown[["name", "category", "thread", "start_ms", "duration_ms", "self_ms"]],
+                column_config={
+                    "start_ms": st.column_config.NumberColumn("Start (ms)", format="%.1f"),
+                    "duration_ms": st.column_config.NumberColumn("Duration (ms)", format="%.1f"),
+                    "self_ms": st.column_config.NumberColumn("Self (ms)", format="%.1f"),
+                },
+                use_container_width=True,
+                hide_index=True,
+            )
+
+        st.download_button(
+            label="Download Chrome Trace",
+            data=tr.to_chrome_json(traces.values()),
+            file_name=f"dashboard_trace_{datetime.now():%Y%m%d_%H%M%S}.json",
+            mime="application/json",
+            help="Open in chrome://tracing or ui.perfetto.dev",
+        )
+
+
+if st.session_state.get("timing_overlay"):
+    timing_overlay_section()
@@ -0,0 +1,305 @@
+"""
+Benchmark runner for the dashboard hot paths.
+
+Covers every query builder in utils/sql_*.py, the six import/update functions and the three
+approve functions in repository/, every convert_to_excel_* function in utils/formatting.py and
+each ReportType in utils/pdf/pdf_factory.py, at several synthetic dataset sizes.
+
+The target database is TRUNCATED and re-seeded (database/generate_data.py) for every size, so
+point --config at a dedicated benchmark database.
+
+Usage:
+    python -m benchmarks.run --config config/database-bench.yaml --sizes 1000 10000
+    python -m benchmarks.run --config config/database-bench.yaml --baseline benchmarks/baseline.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+import database.generate_data as gd
+import repository.approve as ra
+import repository.in_house as ri
+import repository.out_house as ro
+import repository.packing as rp
+import repository.partitions as rpt
+import repository.psql.conn as rc
+import utils.dashboard_data as dd
+import utils.formatting as uf
+import utils.sql_in_house as us
+import utils.sql_out_house as uo
+import utils.sql_packing as up
+
+GROUPS = ["imports", "queries", "excel", "pdf", "approve"]
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+class BenchmarkRunner:
+    def __init__(self, size, repeat):
+        self.size = size
+        self.repeat = repeat
+        self.records = []
+
+    def measure(self, name, func, repeat=None):
+        """
+        Time func() repeat times with its stdout suppressed and record the timings.
+
+        Returns:
+            The return value of the last call
+        """
+        timings = []
+        result = None
+        for _ in range(repeat or self.repeat):
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                result = func()
+                timings.append(time.perf_counter() - start)
+
+        record = {
+            "name": name,
+            "size": self.size,
+            "repeat": len(timings),
+            "min": min(timings),
+            "median": statistics.median(timings),
+            "mean": statistics.fmean(timings),
+        }
+        if isinstance(result, dict) and {"total", "success", "failed"} <= result.keys():
+            record["rows"] = {key: result[key] for key in ("total", "success", "failed")}
+        self.records.append(record)
+        print(f"  {name:<60} {record['median'] * 1000:>10.1f} ms")
+        return result
+
+
+def _import_workbooks(datasets, output_dir):
+    """
+    Write input and update workbooks per table and year.
+
+    The importers read derived in-house columns (lva, non_lva, tooling, process_cost) and the
+    update pages expect status/reason columns on top of the template format.
+    """
+    paths = {}
+    for table, (_, details, _, _) in datasets.items():
+        details = details.copy()
+        if table == "in_house":
+            details["lva"] = details["local_oh"] + details["raw_material"]
+            details["non_lva"] = details["jsp"] + details["msp"]
+            details["tooling"] = details["tooling_oh"] + details["exclusive_investment"]
+            details["process_cost"] = details["total_process_cost"]
+        details["status"] = np.where(details["status"] == "APPROVE", "A", "D")
+        details["reason"] = "Benchmark update"
+
+        for year, year_df in details.groupby("year"):
+            path = os.path.join(output_dir, f"{table}_{year}.xlsx")
+            year_df.drop(columns=["id", "first_year", "last_year", "year_index"]).to_excel(path, index=False)
+            paths[(table, year)] = path
+    return paths
+
+
+def _reset(db_credentials):
+    with rc.DatabaseConnection(db_credentials) as connection:
+        with connection.cursor() as cursor:
+            cursor.execute('TRUNCATE "in_house", "out_house", "packing" CASCADE')
+
+
+def _seed(db_credentials, datasets):
+    _reset(db_credentials)
+    with contextlib.redirect_stdout(io.StringIO()):
+        with rc.DatabaseConnection(db_credentials) as connection:
+            with connection.cursor() as cursor:
+                years = {year for _, details, _, _ in datasets.values() for year in details["year"].unique()}
+                rpt.ensure_year_partitions(cursor, years)
+            for table, (parts, details, explanations, columns) in datasets.items():
+                gd.load_table(connection, table, parts, details, explanations, columns)
+
+
+def bench_imports(runner, db_credentials, datasets, years):
+    importers = {
+        "in_house": (ri.input_in_house_new_data, ri.update_in_house_data),
+        "out_house": (ro.input_out_house_new_data, ro.update_out_house_data),
+        "packing": (rp.input_packing_new_data, rp.update_packing_data),
+    }
+    _reset(db_credentials)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = _import_workbooks(datasets, tmp)
+        for table, (input_data, update_data) in importers.items():
+            # Imports and updates mutate the database, so each runs exactly once
+            for year in years:
+                runner.measure(f"import.{input_data.__name__}[{year}]",
+                               lambda: input_data(paths[(table, year)], rc.DatabaseConnection(db_credentials)),
+                               repeat=1)
+            runner.measure(f"import.{update_data.__name__}",
+                           lambda: update_data(paths[(table, years[-1])], rc.DatabaseConnection(db_credentials)),
+                           repeat=1)
+
+
+def bench_queries(runner, query, years, boundaries):
+    builders = [
+        (us.status_product_two_year, (years,)),
+        (us.abnormal_cal, (years, boundaries[0])),
+        (us.full_abnormal_cal, (years, boundaries[0])),
+        (us.abnormal_cal_in_house_per_part, (years,)),
+        (us.per_part_costs_in_house, (years,)),
+        (uo.status_product_two_year_out_house, (years,)),
+        (uo.abnormal_cal_out_house, (years, boundaries[1])),
+        (uo.abnormal_cal_out_house_per_part, (years,)),
+        (uo.per_part_prices_out_house, (years,)),
+        (up.status_product_two_year, (years,)),
+        (up.packing_max_abnormal_cal, (years, boundaries[2])),
+        (us.total_cost_trend_in_house, (years,)),
+        (uo.price_trend_out_house, (years,)),
+        (up.max_total_cost_trend_packing, (years,)),
+    ]
+    for builder, args in builders:
+        sql = builder(*args)
+        runner.measure(f"sql.{builder.__module__.split('.')[-1]}.{builder.__name__}", lambda: query(sql))
+
+
+def bench_excel(runner, frames, years, boundaries):
+    previous, current = years
+    _, abnormal_cal, _, per_part = frames["in_house"]
+    in_house = abnormal_cal.drop(["Status Abnormal", "Explanation Status"], axis=1)
+    _, abnormal_cal_out, per_part_out = frames["out_house"]
+    out_house = abnormal_cal_out.drop(["Status", "Explanation Status"], axis=1)
+    _, abnormal_cal_packing = frames["packing"]
+
+    exports = [
+        (uf.convert_to_excel_in_house, in_house, boundaries[0]),
+        (uf.convert_to_excel_format_in_house_per_part, per_part, boundaries[0]),
+        (uf.convert_to_excel_format_out_house, out_house, boundaries[1]),
+        (uf.convert_to_excel_format_out_house_per_part, per_part_out, boundaries[1]),
+        (uf.convert_to_excel_format_packaging, abnormal_cal_packing, boundaries[2]),
+    ]
+    for convert, df, threshold in exports:
+        runner.measure(f"excel.{convert.__name__}", lambda: convert(df, previous, current, threshold))
+
+
+def bench_pdf(runner, frames, years, boundaries):
+    from utils.pdf import ReportType, generate_report
+
+    inputs = dd.report_inputs(frames)
+    for report_type in ReportType:
+        runner.measure(f"pdf.{report_type.name}",
+                       lambda: generate_report(report_type, years=years, boundaries=boundaries, **inputs))
+
+
+def bench_approve(runner, db_credentials, frames, years):
+    _, abnormal_cal, _, _ = frames["in_house"]
+    _, abnormal_cal_out, _ = frames["out_house"]
+    _, abnormal_cal_packing = frames["packing"]
+    approvals = [
+        (ra.approve_in_house_data, abnormal_cal[abnormal_cal["Status Abnormal"] == "Normal"]),
+        (ra.approve_out_house_data, abnormal_cal_out[abnormal_cal_out["Status"] == "Normal"]),
+        (ra.approve_packing_data, abnormal_cal_packing[abnormal_cal_packing["Status"] == "Normal"]),
+    ]
+    for approve, df in approvals:
+        runner.measure(f"approve.{approve.__name__}",
+                       lambda: approve(df.copy(), rc.DatabaseConnection(db_credentials), years[-1]),
+                       repeat=1)
+
+
+def run(db_credentials, sizes, years, boundaries, groups, repeat, seed):
+    records = []
+    for size in sizes:
+        print(f"Dataset size: {size} parts per table")
+        runner = BenchmarkRunner(size, repeat)
+        datasets = gd.generate(size, years, seed)
+
+        if "imports" in groups:
+            bench_imports(runner, db_credentials, datasets, years)
+
+        # Read-only groups run against a freshly seeded, import-independent dataset
+        _seed(db_credentials, datasets)
+        with rc.DatabaseConnection(db_credentials) as connection:
+            query = dd.connection_query(connection)
+            if "queries" in groups:
+                bench_queries(runner, query, years, boundaries)
+            frames = dd.load_dashboard_frames(query, years, boundaries)
+
+        if "excel" in groups:
+            bench_excel(runner, frames, years, boundaries)
+        if "pdf" in groups:
+            bench_pdf(runner, frames, years, boundaries)
+        if "approve" in groups:
+            bench_approve(runner, db_credentials, frames, years)
+
+        records.extend(runner.records)
+    return records
+
+
+def compare(records, baseline_records, tolerance):
+    """
+    Compare median timings against a baseline.
+
+    Returns:
+        List of (name, size, baseline_median, median, ratio) for entries slower than
+        baseline * (1 + tolerance)
+    """
+    baseline = {(r["name"], r["size"]): r for r in baseline_records}
+    regressions = []
+    for record in records:
+        reference = baseline.get((record["name"], record["size"]))
+        if reference is None or reference["median"] <= 0:
+            continue
+        ratio = record["median"] / reference["median"]
+        if ratio > 1 + tolerance:
+            regressions.append((record["name"], record["size"], reference["median"], record["median"], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SQL builders, importers, exports and PDF generation")
+    parser.add_argument("--config", required=True, help="Database config YAML of a dedicated benchmark database")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000], help="Parts per table")
+    parser.add_argument("--years", nargs=2, type=int, default=[2023, 2024])
+    parser.add_argument("--boundaries", nargs=3, type=int, default=[5, 5, 5],
+                        help="In house, out house and packing thresholds (%%)")
+    parser.add_argument("--groups", nargs="+", choices=GROUPS, default=GROUPS)
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions for read-only benchmarks")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Result JSON path (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="Result JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before flagging (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    config = rc.load_config(args.config)
+    if not config:
+        raise SystemExit("Failed to load configuration. Exiting.")
+
+    records = run(config["database"], args.sizes, args.years, args.boundaries, args.groups, args.repeat, args.seed)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as result_file:
+        json.dump({
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "years": args.years,
+            "boundaries": args.boundaries,
+            "seed": args.seed,
+            "results": records,
+        }, result_file, indent=2)
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as baseline_file:
+            baseline_records = json.load(baseline_file)["results"]
+        regressions = compare(records, baseline_records, args.tolerance)
+        for name, size, before, after, ratio in regressions:
+            print(f"REGRESSION {name} [{size}]: {before * 1000:.1f} ms -> {after * 1000:.1f} ms ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+Command-line entry point for the heavy dashboard operations.
+
+Runs imports, bulk approvals and report/Excel generation outside the Streamlit process,
+using the same repository and utils modules as the web pages.
+
+Usage:
+    python cli.py import in_house data/in_house_2024.xlsx data/in_house_2025.xlsx --workers 2
+    python cli.py import packing data/packing_update.xlsx --update
+    python cli.py approve all --years 2023 2024 --boundaries 5 5 5
+    python cli.py report --years 2023 2024 --boundaries 5 5 5 --type complete --excel --output out/
+    python cli.py export in_house --kind per_part --years 2023 2024 --boundary 5 --format csv --output out/
+    python cli.py precompute --schedule config/precompute.yaml
+    python cli.py analytics refresh
+    python cli.py analytics verify --years 2023 2024 --boundaries 5 5 5
+
+Nightly precompute, e.g. from cron:
+    30 2 * * * cd /path/to/dashboard-MSP && python cli.py precompute --schedule config/precompute.yaml
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import repository.approve as ra
+import repository.in_house as ri
+import repository.out_house as ro
+import repository.packing as rp
+import repository.psql.conn as rc
+import utils.analytics as an
+import utils.artifacts as ua
+import utils.dashboard_data as dd
+import utils.streaming_export as se
+
+DEFAULT_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config/database-dev.yaml")
+TABLES = ["in_house", "out_house", "packing"]
+
+IMPORTERS = {
+    "in_house": (ri.input_in_house_new_data, ri.update_in_house_data),
+    "out_house": (ro.input_out_house_new_data, ro.update_out_house_data),
+    "packing": (rp.input_packing_new_data, rp.update_packing_data),
+}
+APPROVERS = {
+    "in_house": ra.approve_in_house_data,
+    "out_house": ra.approve_out_house_data,
+    "packing": ra.approve_packing_data,
+}
+
+
+def print_progress(file_name):
+    def report(event):
+        # Overwrites one stderr line per file; the final event ends it with a newline
+        print(
+            f"\r{file_name}: {event['processed']:,}/{event['total']:,} rows, {event['written']:,} written, "
+            f"{event['skipped']:,} skipped, {event['failed']:,} failed, {event['rows_per_sec']:,.0f} rows/s",
+            end="\n" if event.get("done") else "",
+            file=sys.stderr,
+        )
+
+    return report
+
+
+def print_result(label, result):
+    unchanged = f", {result['unchanged']} unchanged" if result.get("unchanged") else ""
+    print(f"{label}: {result['success']}/{result['total']} succeeded, {result['failed']} failed{unchanged}")
+    for failed in result["failed_parts"]:
+        print(f"  row {failed['row']} part {failed['part_no']}: {failed['error']}")
+
+
+def run_import(db_credentials, table, files, update=False, workers=1):
+    """
+    Import (or update from) several Excel files, each on its own database connection.
+
+    Returns:
+        Number of failed rows over all files
+    """
+    importer = IMPORTERS[table][1 if update else 0]
+
+    def run(path):
+        progress = print_progress(os.path.basename(path)) if workers == 1 else None
+        return importer(path, rc.DatabaseConnection(db_credentials), progress_callback=progress)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(run, files))
+
+    for path, result in zip(files, results):
+        print_result(path, result)
+    return sum(result["failed"] for result in results)
+
+
+def load_frames(db_credentials, years, boundaries):
+    with rc.DatabaseConnection(db_credentials) as connection:
+        return dd.load_dashboard_frames(dd.connection_query(connection), years, boundaries)
+
+
+def run_approve(db_credentials, tables, years, boundaries):
+    """
+    Approve every "Normal" row of the current year, as the dashboard approve buttons do.
+
+    Returns:
+        Number of failed rows over all tables
+    """
+    normal = dd.normal_rows(load_frames(db_credentials, years, boundaries))
+    failed = 0
+    for table in tables:
+        result = APPROVERS[table](normal[table], rc.DatabaseConnection(db_credentials), years[1])
+        print_result(f"approve {table}", result)
+        failed += result["failed"]
+    return failed
+
+
+def run_report(db_credentials, years, boundaries, report_types, excel, output_dir):
+    from utils.pdf import generate_report
+
+    frames = load_frames(db_credentials, years, boundaries)
+    os.makedirs(output_dir, exist_ok=True)
+    previous, current = years
+    formatted_date = datetime.now().strftime("%d%m%y")
+
+    if report_types:
+        inputs = dd.report_inputs(frames)
+        for report_type in report_types:
+            pdf_data = generate_report(report_type, years=years, boundaries=[int(b) for b in boundaries], **inputs)
+            path = os.path.join(output_dir, f"{report_type}_report_{current}-{previous}-{formatted_date}.pdf")
+            with open(path, "wb") as pdf_file:
+                pdf_file.write(bytes(pdf_data))
+            print(f"Wrote {path}")
+
+    if excel:
+        for file_name, data in dd.excel_exports(frames, years, boundaries).items():
+            path = os.path.join(output_dir, file_name)
+            with open(path, "wb") as excel_file:
+                excel_file.write(data)
+            print(f"Wrote {path}")
+
+
+def run_export(db_credentials, section, kind, years, boundary, file_format, output_dir, itersize):
+    """Stream one dashboard export to disk from a server-side cursor (bounded memory)."""
+    os.makedirs(output_dir, exist_ok=True)
+    previous, current = years
+    path = os.path.join(output_dir, f"{section}_{kind + '_' if kind else ''}{previous}_{current}.{file_format}")
+    writer = se.write_excel if file_format == "xlsx" else se.write_csv
+    start = time.perf_counter()
+    with rc.DatabaseConnection(db_credentials) as connection:
+        rows = writer(connection, section, kind, years, boundary, path, itersize)
+    print(f"Wrote {path} ({rows:,} rows in {time.perf_counter() - start:.1f} s)")
+
+
+def run_precompute(db_credentials, year_pairs, boundaries, report_types, root=None):
+    """
+    Precompute dashboard frames, Excel exports and PDF reports into the artifact store.
+
+    The data version is read before the frames are queried, so a write that lands while the
+    job runs marks the artifact as out of date and the dashboard ignores it.
+    """
+    from utils.pdf import generate_report
+
+    for years in year_pairs:
+        years = [str(year) for year in years]
+        start = time.perf_counter()
+        with rc.DatabaseConnection(db_credentials) as connection:
+            query = dd.connection_query(connection)
+            versions = ua.data_versions(query(ua.DATA_VERSION_SQL))
+            frames = dd.load_dashboard_frames(query, years, boundaries)
+
+        exports = dd.excel_exports(frames, years, boundaries)
+        for section, threshold in zip(ua.SECTIONS, boundaries):
+            files = {name: data for name, data in exports.items() if name.startswith(f"{section}_")}
+            ua.write_section(section, years, threshold, frames[section], files, versions[section], root)
+
+        inputs = dd.report_inputs(frames)
+        for report_type in report_types:
+            pdf_data = generate_report(report_type, years=years, boundaries=[int(b) for b in boundaries], **inputs)
+            ua.write_report(years, boundaries, report_type, bytes(pdf_data), versions, root)
+
+        print(f"Precomputed {years[0]}-{years[1]} in {time.perf_counter() - start:.1f} s")
+
+
+def run_analytics(db_credentials, action, years=None, boundaries=None, force=False):
+    """
+    Refresh the DuckDB Parquet snapshot, or check that it yields the same frames as Postgres.
+
+    Returns:
+        Number of differing frames (verify) or 0
+    """
+    an.refresh_snapshot(db_credentials, force=force)
+    if action == "refresh":
+        return 0
+
+    expected = load_frames(db_credentials, years, boundaries)
+    duck = an.DuckDBConnection()
+    try:
+        actual = dd.load_dashboard_frames(duck.query, years, boundaries)
+    finally:
+        duck.close()
+    differences = an.compare_frames(expected, actual)
+    for difference in differences:
+        print(difference)
+    print("DuckDB frames match Postgres" if not differences else f"{len(differences)} frames differ")
+    return len(differences)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run dashboard imports, approvals and reports without the web UI")
+    parser.add_argument("--config", default=DEFAULT_CONFIG, help="Database config YAML")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="Import Excel files in the input/update template format")
+    import_parser.add_argument("table", choices=TABLES)
+    import_parser.add_argument("files", nargs="+")
+    import_parser.add_argument("--update", action="store_true", help="Use the update (status/reason) importer")
+    import_parser.add_argument("--workers", type=int, default=1, help="Files imported in parallel")
+
+    def add_period(command_parser):
+        command_parser.add_argument("--years", nargs=2, required=True, metavar=("PREVIOUS", "CURRENT"))
+        command_parser.add_argument("--boundaries", nargs=3, type=int, required=True,
+                                    metavar=("IN_HOUSE", "OUT_HOUSE", "PACKING"), help="Abnormal thresholds (%%)")
+
+    approve_parser = commands.add_parser("approve", help="Approve all Normal rows of the current year")
+    approve_parser.add_argument("table", choices=TABLES + ["all"])
+    add_period(approve_parser)
+
+    report_parser = commands.add_parser("report", help="Write PDF reports and/or the Excel exports to disk")
+    add_period(report_parser)
+    report_parser.add_argument("--type", nargs="*", default=["complete"], dest="report_types",
+                               choices=["in_house", "out_house", "packing", "complete"],
+                               help="PDF report types (none to skip PDFs)")
+    report_parser.add_argument("--excel", action="store_true", help="Also write every Excel export")
+    report_parser.add_argument("--output", default=".", help="Output directory")
+
+    export_parser = commands.add_parser("export", help="Stream one Excel/CSV export with bounded memory")
+    export_parser.add_argument("table", choices=TABLES)
+    export_parser.add_argument("--kind", default="", choices=["", "filtered", "per_part"],
+                               help="All rows (default), abnormal rows only, or per-part IQR outliers")
+    export_parser.add_argument("--years", nargs=2, required=True, metavar=("PREVIOUS", "CURRENT"))
+    export_parser.add_argument("--boundary", type=int, required=True, help="Abnormal threshold (%%)")
+    export_parser.add_argument("--format", default="xlsx", choices=["xlsx", "csv"], dest="file_format")
+    export_parser.add_argument("--output", default=".", help="Output directory")
+    export_parser.add_argument("--itersize", type=int, default=se.BATCH_SIZE, help="Rows fetched per batch")
+
+    precompute_parser = commands.add_parser("precompute", help="Fill the artifact store served by the dashboard")
+    precompute_parser.add_argument("--schedule", default="config/precompute.yaml",
+                                   help="YAML with year_pairs, boundaries and report_types")
+    precompute_parser.add_argument("--output", help=f"Artifact directory (default: {ua.ARTIFACT_DIR})")
+
+    analytics_parser = commands.add_parser("analytics", help="Manage the DuckDB/Parquet analytics snapshot")
+    analytics_parser.add_argument("action", choices=["refresh", "verify"])
+    analytics_parser.add_argument("--years", nargs=2, metavar=("PREVIOUS", "CURRENT"))
+    analytics_parser.add_argument("--boundaries", nargs=3, type=int, metavar=("IN_HOUSE", "OUT_HOUSE", "PACKING"))
+    analytics_parser.add_argument("--force", action="store_true", help="Re-export every table")
+
+    args = parser.parse_args()
+
+    config = rc.load_config(args.config)
+    if not config:
+        raise SystemExit("Failed to load configuration. Exiting.")
+    db_credentials = config["database"]
+
+    if args.command == "import":
+        failed = run_import(db_credentials, args.table, args.files, args.update, max(args.workers, 1))
+        if an.enabled():
+            an.refresh_snapshot(db_credentials)
+    elif args.command == "approve":
+        tables = TABLES if args.table == "all" else [args.table]
+        failed = run_approve(db_credentials, tables, args.years, args.boundaries)
+        if an.enabled():
+            an.refresh_snapshot(db_credentials)
+    elif args.command == "analytics":
+        if args.action == "verify" and not (args.years and args.boundaries):
+            parser.error("analytics verify requires --years and --boundaries")
+        failed = run_analytics(db_credentials, args.action, args.years, args.boundaries, args.force)
+    elif args.command == "export":
+        if args.kind == "per_part" and args.table == "packing":
+            parser.error("the packing section has no per-part export")
+        run_export(db_credentials, args.table, args.kind, args.years, args.boundary, args.file_format, args.output,
+                   args.itersize)
+        failed = 0
+    elif args.command == "precompute":
+        schedule = rc.load_config(args.schedule)
+        if not schedule:
+            raise SystemExit("Failed to load the precompute schedule. Exiting.")
+        run_precompute(db_credentials, schedule["year_pairs"], schedule["boundaries"],
+                       schedule.get("report_types", ["in_house", "out_house", "packing", "complete"]), args.output)
+        failed = 0
+    else:
+        run_report(db_credentials, args.years, args.boundaries, args.report_types, args.excel, args.output)
+        failed = 0
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
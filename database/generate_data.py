@@ -0,0 +1,313 @@
+"""
+Deterministic synthetic data for load testing the dashboard.
+
+Fills in_house, out_house, packing, their *_detail rows across the requested years and a
+realistic *_explanations history, and/or writes upload workbooks in the resource/ template
+formats. The same --seed always produces the same parts, costs and explanations.
+
+Usage:
+    python -m database.generate_data --parts 100000 --years 2022 2023 2024 --create-schema --truncate
+    python -m database.generate_data --parts 10000 --years 2023 2024 --no-db --workbooks out/
+"""
+import argparse
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import psycopg2.extras
+
+import repository.partitions as rpt
+import repository.psql.conn as rc
+
+psycopg2.extras.register_uuid()
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SCHEMA_PATH = os.path.join(PROJECT_ROOT, "database/msp-database.sql")
+DEFAULT_CONFIG_PATH = os.path.join(PROJECT_ROOT, "config/database-dev.yaml")
+
+# Column order of the upload templates in resource/
+TEMPLATE_COLUMNS = {
+    "in_house": ["part_no", "part_name", "year", "jsp", "msp", "local_oh", "tooling_oh", "raw_material", "labor",
+                 "foh_fixed", "foh_var", "unfinish_depre", "total_process_cost", "exclusive_investment",
+                 "total_cost"],
+    "out_house": ["part_no", "part_name", "source", "year", "price"],
+    "packing": ["part_no", "part_name", "year", "destination", "model", "labor_cost", "material_cost",
+                "inland_cost"],
+}
+
+IN_HOUSE_COST_COLUMNS = ["jsp", "msp", "local_oh", "tooling_oh", "raw_material", "labor", "foh_fixed", "foh_var",
+                         "unfinish_depre", "exclusive_investment"]
+PACKING_COST_COLUMNS = ["labor_cost", "material_cost", "inland_cost"]
+
+PART_NAME_WORDS = ["BRACKET", "BOLT", "COVER", "HOSE", "PANEL", "CLIP", "SEAL", "PIPE", "BUSH", "PLATE", "GUIDE",
+                   "SPRING", "CLAMP", "WASHER", "BEARING", "HINGE", "GASKET", "LEVER", "MOUNT", "SHAFT"]
+SOURCES = ["LOCAL", "JAPAN", "THAILAND", "CHINA", "INDIA", "KOREA", "VIETNAM", "PHILIPPINES"]
+DESTINATIONS = ["SAU", "AUS", "PHL", "MEX", "ZAF", "ARE", "BRA", "EGY", "PAK", "KWT", "QAT", "OMN"]
+MODELS = ["INNOVA", "FORTUNER", "AVANZA", "RUSH", "HILUX", "YARIS"]
+EXPLANATIONS = ["Raw material price increase", "Supplier change", "Exchange rate impact", "Design change",
+                "Volume adjustment", "Labor rate revision", "Logistics cost update"]
+
+# Excel sheets hold at most 1,048,576 rows; keep a margin for the header
+MAX_WORKBOOK_ROWS = 1_000_000
+
+
+def generate_parts(rng, n_parts, years, group_size=8):
+    """
+    Generate part master rows with a lifetime across years.
+
+    Part numbers are 10 characters (the importer limit) and share a 5 character prefix in
+    groups of ~group_size so the per-part IQR analysis has realistic groups. Roughly 10% of
+    parts are introduced after the first year and 10% are discontinued before the last one,
+    giving New/Deleted item statuses.
+    """
+    n_years = len(years)
+    group_ids = rng.integers(0, max(n_parts // group_size, 1), size=n_parts)
+    part_no = [f"{g:05X}{np.base_repr(i, 36).zfill(5)}" for g, i in zip(group_ids, range(n_parts))]
+    words = rng.choice(PART_NAME_WORDS, size=(n_parts, 2))
+    part_name = [f"{a} {b} {i % 1000:03d}" for (a, b), i in zip(words, range(n_parts))]
+
+    first_year = np.where(rng.random(n_parts) < 0.1, rng.integers(0, n_years, size=n_parts), 0)
+    last_year = np.where(rng.random(n_parts) < 0.1, rng.integers(0, n_years, size=n_parts), n_years - 1)
+    last_year = np.maximum(first_year, last_year)
+
+    ids = [uuid.UUID(bytes=rng.bytes(16), version=4) for _ in range(n_parts)]
+    return pd.DataFrame({
+        "id": ids,
+        "part_no": part_no,
+        "part_name": part_name,
+        "first_year": first_year,
+        "last_year": last_year,
+    })
+
+
+def _yearly_factors(rng, n_rows, n_years, outlier_rate=0.05):
+    """Cumulative year-over-year cost factors; a small share of rows jump or drop sharply."""
+    drift = rng.normal(0.03, 0.04, size=(n_rows, n_years))
+    outliers = rng.random((n_rows, n_years)) < outlier_rate
+    drift[outliers] = rng.choice([-0.35, 0.45], size=outliers.sum()) + rng.normal(0, 0.05, size=outliers.sum())
+    drift[:, 0] = 0
+    return np.cumprod(1 + drift, axis=1)
+
+
+def _explode_years(parts, years):
+    """One row per part and active year."""
+    year_index = np.arange(len(years))
+    rows = parts.loc[parts.index.repeat(len(years))].copy()
+    rows["year_index"] = np.tile(year_index, len(parts))
+    rows = rows[(rows["year_index"] >= rows["first_year"]) & (rows["year_index"] <= rows["last_year"])]
+    rows["year"] = np.asarray(years)[rows["year_index"]]
+    return rows
+
+
+def _statuses(rng, details, years):
+    """Past years are mostly approved; the latest year is pending review."""
+    latest = details["year"] == years[-1]
+    approved = rng.random(len(details)) < np.where(latest, 0.2, 0.9)
+    return np.where(approved, "APPROVE", "PENDING")
+
+
+def generate_in_house(rng, parts, years):
+    base = rng.lognormal(mean=10, sigma=1.2, size=(len(parts), len(IN_HOUSE_COST_COLUMNS)))
+    factors = _yearly_factors(rng, len(parts), len(years))
+    details = _explode_years(parts, years)
+
+    position = parts.index.get_indexer(details.index)
+    for c_idx, column in enumerate(IN_HOUSE_COST_COLUMNS):
+        details[column] = np.round(base[position, c_idx] * factors[position, details["year_index"].to_numpy()], 0)
+    details["total_process_cost"] = details[["labor", "foh_fixed", "foh_var", "unfinish_depre"]].sum(axis=1)
+    details["total_cost"] = details[
+        ["jsp", "msp", "local_oh", "tooling_oh", "raw_material", "total_process_cost", "exclusive_investment"]
+    ].sum(axis=1)
+    details["status"] = _statuses(rng, details, years)
+    return details.reset_index(drop=True)
+
+
+def generate_out_house(rng, parts, years):
+    base = rng.lognormal(mean=9, sigma=1.5, size=len(parts))
+    source = rng.choice(SOURCES, size=len(parts))
+    factors = _yearly_factors(rng, len(parts), len(years))
+    details = _explode_years(parts, years)
+
+    position = parts.index.get_indexer(details.index)
+    details["price"] = np.round(base[position] * factors[position, details["year_index"].to_numpy()], 0)
+    details["source"] = source[position]
+    details["status"] = _statuses(rng, details, years)
+    return details.reset_index(drop=True)
+
+
+def generate_packing(rng, parts, years, max_destinations=3):
+    # Each part ships to 1..max_destinations (destination, model) pairs
+    n_routes = rng.integers(1, max_destinations + 1, size=len(parts))
+    routes = parts.loc[parts.index.repeat(n_routes)].copy()
+    routes["destination"] = rng.choice(DESTINATIONS, size=len(routes))
+    routes["model"] = rng.choice(MODELS, size=len(routes))
+    routes = routes.drop_duplicates(subset=["part_no", "destination", "model"])
+    routes = routes.reset_index(drop=True)
+
+    base = rng.lognormal(mean=8, sigma=1.0, size=(len(routes), len(PACKING_COST_COLUMNS)))
+    factors = _yearly_factors(rng, len(routes), len(years))
+    details = _explode_years(routes, years)
+
+    position = routes.index.get_indexer(details.index)
+    for c_idx, column in enumerate(PACKING_COST_COLUMNS):
+        details[column] = np.round(base[position, c_idx] * factors[position, details["year_index"].to_numpy()], 0)
+    details["status"] = _statuses(rng, details, years)
+    return details.reset_index(drop=True)
+
+
+def generate_explanations(rng, details, explained_rate=0.3, max_history=3):
+    """
+    Explanation history per detail row: approved rows always carry an approval note, and a
+    share of the pending ones have 1..max_history explanations with increasing timestamps.
+
+    Returns:
+        DataFrame with detail_index (position in details), explanation and explained_at
+    """
+    approved = (details["status"] == "APPROVE").to_numpy()
+    explained = approved | (rng.random(len(details)) < explained_rate)
+    counts = np.where(explained, rng.integers(1, max_history + 1, size=len(details)), 0)
+
+    detail_index = np.repeat(np.arange(len(details)), counts)
+    order = np.arange(len(detail_index)) - np.repeat(np.cumsum(counts) - counts, counts)
+    years = details["year"].to_numpy()[detail_index]
+    explained_at = [
+        datetime(int(year), 1, 15) + timedelta(days=int(30 * step + offset))
+        for year, step, offset in zip(years, order, rng.integers(0, 20, size=len(detail_index)))
+    ]
+    explanation = rng.choice(EXPLANATIONS, size=len(detail_index)).astype(object)
+
+    # The latest note of an approved row is the approval itself, as written by approve_*_data
+    last = np.r_[detail_index[1:] != detail_index[:-1], True] if len(detail_index) else np.array([], dtype=bool)
+    approval = last & approved[detail_index]
+    explanation[approval] = [f"Approve at {d.strftime('%d-%m-%Y')}" for d in np.asarray(explained_at)[approval]]
+
+    return pd.DataFrame({"detail_index": detail_index, "explanation": explanation, "explained_at": explained_at})
+
+
+def _records(df, columns):
+    return list(df[columns].itertuples(index=False, name=None))
+
+
+def _insert_details(cursor, table, columns, rows, page_size):
+    """Insert detail rows in pages and return their SERIAL ids in input order."""
+    query = 'INSERT INTO "{table}" ({columns}) VALUES %s RETURNING "id"'.format(
+        table=table, columns=", ".join(f'"{c}"' for c in columns)
+    )
+    ids = []
+    for start in range(0, len(rows), page_size):
+        ids.extend(row[0] for row in psycopg2.extras.execute_values(
+            cursor, query, rows[start:start + page_size], page_size=page_size, fetch=True
+        ))
+    return ids
+
+
+def load_table(connection, table, parts, details, explanations, detail_columns, page_size=5000):
+    """Write one table family (master, *_detail, *_explanations) in a single transaction."""
+    item_column = f"{table}_item"
+    details = details.rename(columns={"id": item_column, "year": "year_item"})
+
+    with connection.cursor() as cursor:
+        psycopg2.extras.execute_values(
+            cursor,
+            f'INSERT INTO "{table}" ("id", "part_no", "part_name") VALUES %s',
+            _records(parts, ["id", "part_no", "part_name"]),
+            page_size=page_size,
+        )
+        columns = [item_column] + detail_columns + ["status", "year_item"]
+        detail_ids = _insert_details(cursor, f"{table}_detail", columns, _records(details, columns), page_size)
+
+        detail_index = explanations["detail_index"].to_numpy()
+        explanation_rows = list(zip(
+            np.asarray(detail_ids, dtype=object)[detail_index].tolist(),
+            details["year_item"].to_numpy()[detail_index].tolist(),
+            explanations["explanation"],
+            explanations["explained_at"],
+        ))
+        psycopg2.extras.execute_values(
+            cursor,
+            f'INSERT INTO "{table}_explanations" ("{table}_detail_id", "year_item", "explanation", "explained_at") '
+            f'VALUES %s',
+            explanation_rows,
+            page_size=page_size,
+        )
+    connection.commit()
+    print(f"{table}: {len(parts)} parts, {len(details)} details, {len(explanations)} explanations")
+
+
+def write_workbooks(table, details, output_dir):
+    """Write one upload workbook per year in the resource/ template format."""
+    os.makedirs(output_dir, exist_ok=True)
+    columns = TEMPLATE_COLUMNS[table]
+    for year, year_df in details.groupby("year"):
+        for chunk_idx, start in enumerate(range(0, len(year_df), MAX_WORKBOOK_ROWS)):
+            suffix = f"_{chunk_idx + 1}" if len(year_df) > MAX_WORKBOOK_ROWS else ""
+            path = os.path.join(output_dir, f"{table}_{year}{suffix}.xlsx")
+            year_df[columns].iloc[start:start + MAX_WORKBOOK_ROWS].to_excel(path, index=False)
+            print(f"Wrote {path}")
+
+
+def generate(n_parts, years, seed=42):
+    """
+    Generate every table family for n_parts parts across years.
+
+    Returns:
+        Dict of table name to (parts, details, explanations, detail cost columns)
+    """
+    rng = np.random.default_rng(seed)
+    years = sorted(int(y) for y in years)
+    datasets = {}
+    for table, generator, cost_columns in [
+        ("in_house", generate_in_house, IN_HOUSE_COST_COLUMNS + ["total_process_cost", "total_cost"]),
+        ("out_house", generate_out_house, ["price", "source"]),
+        ("packing", generate_packing, ["destination", "model"] + PACKING_COST_COLUMNS),
+    ]:
+        parts = generate_parts(rng, n_parts, years)
+        details = generator(rng, parts, years)
+        explanations = generate_explanations(rng, details)
+        datasets[table] = (parts, details, explanations, cost_columns)
+    return datasets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic MSP data for load testing")
+    parser.add_argument("--parts", type=int, default=10_000, help="Parts per table (10k-1M)")
+    parser.add_argument("--years", nargs="+", default=["2023", "2024"], help="Years to generate")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--config", default=DEFAULT_CONFIG_PATH, help="Database config YAML")
+    parser.add_argument("--create-schema", action="store_true", help="Run database/msp-database.sql first")
+    parser.add_argument("--truncate", action="store_true", help="Empty the MSP tables before loading")
+    parser.add_argument("--no-db", action="store_true", help="Skip the database load")
+    parser.add_argument("--workbooks", help="Directory for upload workbooks in the template formats")
+    args = parser.parse_args()
+
+    datasets = generate(args.parts, args.years, args.seed)
+
+    if args.workbooks:
+        for table, (_, details, _, _) in datasets.items():
+            write_workbooks(table, details, args.workbooks)
+
+    if args.no_db:
+        return
+
+    config = rc.load_config(args.config)
+    if not config:
+        raise SystemExit("Failed to load configuration. Exiting.")
+
+    with rc.DatabaseConnection(config["database"]) as connection:
+        with connection.cursor() as cursor:
+            if args.create_schema:
+                with open(SCHEMA_PATH, "r", encoding="utf-8") as schema_file:
+                    cursor.execute(schema_file.read())
+            if args.truncate:
+                cursor.execute('TRUNCATE "in_house", "out_house", "packing" CASCADE')
+            rpt.ensure_year_partitions(cursor, args.years)
+        connection.commit()
+
+        for table, (parts, details, explanations, columns) in datasets.items():
+            load_table(connection, table, parts, details, explanations, columns)
+
+
+if __name__ == "__main__":
+    main()
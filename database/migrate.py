@@ -0,0 +1,122 @@
+"""
+Ordered schema migrations for an existing database (database/migrations/NNN_*.sql).
+
+Must run after every deploy that adds a migration: the dashboard queries, approvals and
+importers expect the latest schema (row_hash, the part search indexes, year partitions,
+explanations.year_item and the table_changes data version). Databases created from
+database/msp-database.sql start at the latest version and have nothing to apply.
+
+Applied migrations are recorded in "schema_migrations". Most are plain SQL files; 003 moves
+the data into year partitions through database.partition.migrate, which checks the copied row
+counts and rolls back on a mismatch.
+
+Usage:
+    python -m database.migrate           # apply every pending migration, in order
+    python -m database.migrate status    # list applied and pending migrations
+"""
+import argparse
+import os
+
+import database.partition as dp
+import repository.partitions as rpt
+import repository.psql.conn as rc
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+MIGRATIONS_DIR = os.path.join(PROJECT_ROOT, "database/migrations")
+DEFAULT_CONFIG_PATH = os.path.join(PROJECT_ROOT, "config/database-dev.yaml")
+
+MIGRATIONS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS "schema_migrations" (
+        "version" VARCHAR PRIMARY KEY,
+        "applied_at" TIMESTAMP NOT NULL DEFAULT (CURRENT_TIMESTAMP)
+    )
+"""
+
+
+def migration_files():
+    """Migration file names in the order they must run (by their NNN_ prefix)."""
+    return sorted(name for name in os.listdir(MIGRATIONS_DIR) if name.endswith(".sql"))
+
+
+def version_of(file_name):
+    return file_name.split("_", 1)[0]
+
+
+def applied_versions(cursor):
+    cursor.execute(MIGRATIONS_TABLE_SQL)
+    cursor.execute('SELECT "version" FROM "schema_migrations"')
+    return {row[0] for row in cursor.fetchall()}
+
+
+def pending(cursor):
+    """Migration files not yet recorded in schema_migrations."""
+    applied = applied_versions(cursor)
+    return [name for name in migration_files() if version_of(name) not in applied]
+
+
+def _record(cursor, file_name):
+    cursor.execute('INSERT INTO "schema_migrations" ("version") VALUES (%s) ON CONFLICT DO NOTHING',
+                   (version_of(file_name),))
+
+
+def apply(connection, drop_old=False):
+    """
+    Apply every pending migration in order, each in its own transaction.
+
+    Args:
+        connection: psycopg2 connection
+        drop_old: Passed to database.partition.migrate for 003 (drop the *_unpartitioned tables)
+
+    Returns:
+        List of the applied migration files
+    """
+    with connection.cursor() as cursor:
+        to_apply = pending(cursor)
+    connection.commit()
+
+    applied = []
+    for file_name in to_apply:
+        if version_of(file_name) == "003":
+            with connection.cursor() as cursor:
+                already_partitioned = bool(rpt.partitioned_tables(cursor))
+            if not already_partitioned:
+                for table, (old, new) in dp.migrate(connection, drop_old).items():
+                    print(f"  {table}: {old:,} rows -> {new:,} rows")
+        else:
+            with connection.cursor() as cursor, open(os.path.join(MIGRATIONS_DIR, file_name), encoding="utf-8") as sql:
+                cursor.execute(sql.read())
+        with connection.cursor() as cursor:
+            _record(cursor, file_name)
+        connection.commit()
+        applied.append(file_name)
+        print(f"Applied {file_name}")
+    return applied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply the pending schema migrations in order")
+    parser.add_argument("--config", default=DEFAULT_CONFIG_PATH, help="Database config YAML")
+    parser.add_argument("--drop-old", action="store_true",
+                        help="Drop the *_unpartitioned tables once migration 003 has verified the copy")
+    parser.add_argument("command", nargs="?", default="apply", choices=["apply", "status"])
+    args = parser.parse_args()
+
+    config = rc.load_config(args.config)
+    if not config:
+        raise SystemExit("Failed to load configuration. Exiting.")
+
+    with rc.DatabaseConnection(config["database"]) as connection:
+        if args.command == "status":
+            with connection.cursor() as cursor:
+                waiting = pending(cursor)
+            connection.commit()
+            for file_name in migration_files():
+                print(f"{'pending' if file_name in waiting else 'applied':8} {file_name}")
+            return
+
+        if not apply(connection, args.drop_old):
+            print("Schema is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+-- Hash of the last applied update row per detail, used by the update_*_data importers to skip
+-- rows whose cost fields, status and reason are unchanged. NULL means "unknown, always write".
+ALTER TABLE "in_house_detail" ADD COLUMN IF NOT EXISTS "row_hash" VARCHAR(32);
+ALTER TABLE "out_house_detail" ADD COLUMN IF NOT EXISTS "row_hash" VARCHAR(32);
+ALTER TABLE "packing_detail" ADD COLUMN IF NOT EXISTS "row_hash" VARCHAR(32);
@@ -0,0 +1,25 @@
+-- Indexes behind the dashboard part search (utils/sql_part_search.py).
+-- text_pattern_ops serves part_no prefix lookups (LIKE 'ABC%') independent of the collation;
+-- the trigram GIN indexes serve substring matches on part_no (ILIKE '%ABC%') and fuzzy
+-- matches on part_name (the pg_trgm % operator and similarity()).
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS "in_house_part_no_pattern_idx" ON "in_house" ("part_no" text_pattern_ops);
+CREATE INDEX IF NOT EXISTS "in_house_part_no_trgm_idx" ON "in_house" USING GIN ("part_no" gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS "in_house_part_name_trgm_idx" ON "in_house" USING GIN ("part_name" gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS "out_house_part_no_pattern_idx" ON "out_house" ("part_no" text_pattern_ops);
+CREATE INDEX IF NOT EXISTS "out_house_part_no_trgm_idx" ON "out_house" USING GIN ("part_no" gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS "out_house_part_name_trgm_idx" ON "out_house" USING GIN ("part_name" gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS "packing_part_no_pattern_idx" ON "packing" ("part_no" text_pattern_ops);
+CREATE INDEX IF NOT EXISTS "packing_part_no_trgm_idx" ON "packing" USING GIN ("part_no" gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS "packing_part_name_trgm_idx" ON "packing" USING GIN ("part_name" gin_trgm_ops);
+
+-- A part's history walks part -> details -> explanations by foreign key
+CREATE INDEX IF NOT EXISTS "in_house_detail_item_idx" ON "in_house_detail" ("in_house_item", "year_item");
+CREATE INDEX IF NOT EXISTS "out_house_detail_item_idx" ON "out_house_detail" ("out_house_item", "year_item");
+CREATE INDEX IF NOT EXISTS "packing_detail_item_idx" ON "packing_detail" ("packing_item", "year_item");
+CREATE INDEX IF NOT EXISTS "in_house_explanations_detail_idx" ON "in_house_explanations" ("in_house_detail_id");
+CREATE INDEX IF NOT EXISTS "out_house_explanations_detail_idx" ON "out_house_explanations" ("out_house_detail_id");
+CREATE INDEX IF NOT EXISTS "packing_explanations_detail_idx" ON "packing_explanations" ("packing_detail_id");
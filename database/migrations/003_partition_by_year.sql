@@ -0,0 +1,83 @@
+-- LIST-partition the *_detail and *_explanations tables by year_item, one partition per year
+-- (e.g. in_house_detail_y2024). Requires migration 001 and PostgreSQL 12+.
+--
+-- Must run before the dashboard, approvals and importers are deployed: they read and write
+-- explanations.year_item. Apply it with the other pending migrations, in order:
+--     python -m database.migrate --drop-old
+-- which hands this file to the data-move tool (python -m database.partition migrate); it checks
+-- the copied row counts and drops the old tables once they match.
+--
+-- The current tables are renamed to *_unpartitioned and copied into the new partitioned
+-- tables in one transaction. Explanations get a year_item column (the year of their detail)
+-- since every partitioned table needs the partition key in its primary and foreign keys.
+-- Explanations without a detail cannot be placed in a year and are not copied: they are
+-- reported with a NOTICE and stay in *_explanations_unpartitioned, which the data-move tool
+-- keeps (even with --drop-old) so they can be reviewed. The id sequences are moved over, so
+-- new ids continue where the old tables stopped.
+DO $$
+DECLARE
+    section TEXT;
+    suffix TEXT;
+    part_year INT;
+    orphans BIGINT;
+BEGIN
+    FOREACH section IN ARRAY ARRAY['in_house', 'out_house', 'packing'] LOOP
+        -- Keep the current tables aside; their index-backed constraint names must be freed
+        FOREACH suffix IN ARRAY ARRAY['_explanations', '_detail'] LOOP
+            EXECUTE format('ALTER TABLE %I RENAME TO %I', section || suffix, section || suffix || '_unpartitioned');
+            EXECUTE format('ALTER TABLE %I RENAME CONSTRAINT %I TO %I', section || suffix || '_unpartitioned',
+                           section || suffix || '_pkey', section || suffix || '_unpartitioned_pkey');
+        END LOOP;
+        EXECUTE format('ALTER INDEX IF EXISTS %I RENAME TO %I',
+                       section || '_detail_item_idx', section || '_detail_unpartitioned_item_idx');
+        EXECUTE format('ALTER INDEX IF EXISTS %I RENAME TO %I',
+                       section || '_explanations_detail_idx', section || '_explanations_unpartitioned_detail_idx');
+
+        -- Details: same columns and id default (sequence), keyed on (id, year_item)
+        EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS) PARTITION BY LIST ("year_item")',
+                       section || '_detail', section || '_detail_unpartitioned');
+        EXECUTE format('ALTER TABLE %I ADD PRIMARY KEY ("id", "year_item")', section || '_detail');
+        EXECUTE format('ALTER TABLE %I ADD FOREIGN KEY (%I) REFERENCES %I ("id") ON DELETE CASCADE',
+                       section || '_detail', section || '_item', section);
+        EXECUTE format('CREATE INDEX %I ON %I (%I, "year_item")',
+                       section || '_detail_item_idx', section || '_detail', section || '_item');
+        EXECUTE format('ALTER SEQUENCE %s OWNED BY %I."id"',
+                       pg_get_serial_sequence(section || '_detail_unpartitioned', 'id'), section || '_detail');
+
+        -- Explanations: year_item of their detail, referenced by (detail id, year_item)
+        EXECUTE format(
+            'CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS, "year_item" INT NOT NULL) PARTITION BY LIST ("year_item")',
+            section || '_explanations', section || '_explanations_unpartitioned');
+        EXECUTE format('ALTER TABLE %I ADD PRIMARY KEY ("id", "year_item")', section || '_explanations');
+        EXECUTE format('ALTER TABLE %I ADD FOREIGN KEY (%I, "year_item") REFERENCES %I ("id", "year_item") '
+                       'ON DELETE CASCADE', section || '_explanations', section || '_detail_id', section || '_detail');
+        EXECUTE format('CREATE INDEX %I ON %I (%I, "year_item")',
+                       section || '_explanations_detail_idx', section || '_explanations', section || '_detail_id');
+        EXECUTE format('ALTER SEQUENCE %s OWNED BY %I."id"',
+                       pg_get_serial_sequence(section || '_explanations_unpartitioned', 'id'),
+                       section || '_explanations');
+
+        -- One partition per year present in the data
+        FOR part_year IN EXECUTE format('SELECT DISTINCT "year_item" FROM %I', section || '_detail_unpartitioned') LOOP
+            FOREACH suffix IN ARRAY ARRAY['_detail', '_explanations'] LOOP
+                EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES IN (%s)',
+                               section || suffix || '_y' || part_year, section || suffix, part_year);
+            END LOOP;
+        END LOOP;
+
+        EXECUTE format('INSERT INTO %I SELECT * FROM %I', section || '_detail', section || '_detail_unpartitioned');
+        EXECUTE format('SELECT COUNT(*) FROM %I e WHERE NOT EXISTS (SELECT 1 FROM %I d WHERE d."id" = e.%I)',
+                       section || '_explanations_unpartitioned', section || '_detail_unpartitioned',
+                       section || '_detail_id') INTO orphans;
+        IF orphans > 0 THEN
+            RAISE NOTICE '% explanations of % have no detail row and are not copied; they stay in %',
+                orphans, section, section || '_explanations_unpartitioned';
+        END IF;
+        EXECUTE format('INSERT INTO %I SELECT e.*, d."year_item" FROM %I e JOIN %I d ON d."id" = e.%I',
+                       section || '_explanations', section || '_explanations_unpartitioned',
+                       section || '_detail_unpartitioned', section || '_detail_id');
+        EXECUTE format('ANALYZE %I', section || '_detail');
+        EXECUTE format('ANALYZE %I', section || '_explanations');
+    END LOOP;
+END
+$$;
@@ -0,0 +1,33 @@
+-- Change counter per section table, the data version of the precomputed artifacts, the
+-- DuckDB snapshot and the API ETags (see utils/artifacts.py). Every statement that writes to
+-- a part, detail or explanation table bumps the table's counter in the same transaction, so
+-- the version only moves with committed writes and is never reset, unlike the statistics
+-- counters in pg_stat_user_tables.
+CREATE TABLE IF NOT EXISTS "table_changes" (
+  "table_name" VARCHAR PRIMARY KEY,
+  "changes" BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE FUNCTION "bump_table_changes"() RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO "table_changes" ("table_name", "changes") VALUES (TG_TABLE_NAME, 1)
+    ON CONFLICT ("table_name") DO UPDATE SET "changes" = "table_changes"."changes" + 1;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    section TEXT;
+    suffix TEXT;
+BEGIN
+    FOREACH section IN ARRAY ARRAY['in_house', 'out_house', 'packing'] LOOP
+        FOREACH suffix IN ARRAY ARRAY['', '_detail', '_explanations'] LOOP
+            EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', section || suffix || '_changes', section || suffix);
+            EXECUTE format('CREATE TRIGGER %I AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I '
+                           'FOR EACH STATEMENT EXECUTE FUNCTION "bump_table_changes"()',
+                           section || suffix || '_changes', section || suffix);
+        END LOOP;
+    END LOOP;
+END
+$$;
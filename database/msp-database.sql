@@ -5,21 +5,26 @@ CREATE TABLE "out_house" (
 );
 
 CREATE TABLE "out_house_detail" (
-  "id" SERIAL PRIMARY KEY,
+  "id" SERIAL,
   "out_house_item" UUID REFERENCES "out_house" ("id") ON DELETE CASCADE,
   "price" NUMERIC(14,0),
   "source" VARCHAR,
   "status" VARCHAR DEFAULT 'PENDING',
   "year_item" INT NOT NULL,
-  "created_at" TIMESTAMP NOT NULL DEFAULT (CURRENT_TIMESTAMP)
-);
+  "created_at" TIMESTAMP NOT NULL DEFAULT (CURRENT_TIMESTAMP),
+  "row_hash" VARCHAR(32),
+  PRIMARY KEY ("id", "year_item")
+) PARTITION BY LIST ("year_item");
 
 CREATE TABLE "out_house_explanations" (
-  "id" SERIAL PRIMARY KEY,
-  "out_house_detail_id" INT REFERENCES "out_house_detail" ("id") ON DELETE CASCADE, 
+  "id" SERIAL,
+  "out_house_detail_id" INT,
+  "year_item" INT NOT NULL,
   "explanation" TEXT NOT NULL,
-  "explained_at" TIMESTAMP NOT NULL DEFAULT (CURRENT_TIMESTAMP)
-);
+  "explained_at" TIMESTAMP NOT NULL DEFAULT (CURRENT_TIMESTAMP),
+  PRIMARY KEY ("id", "year_item"),
+  FOREIGN KEY ("out_house_detail_id", "year_item") REFERENCES "out_house_detail" ("id", "year_item") ON DELETE CASCADE
+) PARTITION BY LIST ("year_item");
 
 CREATE TABLE "in_house" (
   "id" UUID PRIMARY KEY DEFAULT (gen_random_uuid()),
@@ -28,7 +33,7 @@ CREATE TABLE "in_house" (
 );
 
 CREATE TABLE "in_house_detail" (
-  "id" SERIAL PRIMARY KEY,
+  "id" SERIAL,
   "in_house_item" UUID REFERENCES "in_house" ("id") ON DELETE CASCADE,
   "jsp" NUMERIC(14,0),
   "msp" NUMERIC(14,0),
@@ -44,15 +49,20 @@ CREATE TABLE "in_house_detail" (
   "total_cost" NUMERIC(14,0),
   "status" VARCHAR DEFAULT 'PENDING',
   "year_item" INT NOT NULL,
-  "created_at" TIMESTAMP NOT NULL DEFAULT (CURRENT_TIMESTAMP)
-);
+  "created_at" TIMESTAMP NOT NULL DEFAULT (CURRENT_TIMESTAMP),
+  "row_hash" VARCHAR(32),
+  PRIMARY KEY ("id", "year_item")
+) PARTITION BY LIST ("year_item");
 
 CREATE TABLE "in_house_explanations" (
-  "id" SERIAL PRIMARY KEY,
-  "in_house_detail_id" INT REFERENCES "in_house_detail" ("id") ON DELETE CASCADE,
+  "id" SERIAL,
+  "in_house_detail_id" INT,
+  "year_item" INT NOT NULL,
   "explanation" TEXT NOT NULL,
-  "explained_at" TIMESTAMP NOT NULL DEFAULT (CURRENT_TIMESTAMP)
-);
+  "explained_at" TIMESTAMP NOT NULL DEFAULT (CURRENT_TIMESTAMP),
+  PRIMARY KEY ("id", "year_item"),
+  FOREIGN KEY ("in_house_detail_id", "year_item") REFERENCES "in_house_detail" ("id", "year_item") ON DELETE CASCADE
+) PARTITION BY LIST ("year_item");
 
 CREATE TABLE "packing" (
   "id" UUID PRIMARY KEY DEFAULT (gen_random_uuid()),
@@ -61,7 +71,7 @@ CREATE TABLE "packing" (
 );
 
 CREATE TABLE "packing_detail" (
-  "id" SERIAL PRIMARY KEY,
+  "id" SERIAL,
   "packing_item" UUID REFERENCES "packing" ("id") ON DELETE CASCADE,
   "destination" VARCHAR,
   "model" VARCHAR,
@@ -70,12 +80,82 @@ CREATE TABLE "packing_detail" (
   "inland_cost" NUMERIC(14,0),
   "status" VARCHAR DEFAULT 'PENDING',
   "year_item" INT NOT NULL,
-  "created_at" TIMESTAMP NOT NULL DEFAULT (CURRENT_TIMESTAMP)
-);
+  "created_at" TIMESTAMP NOT NULL DEFAULT (CURRENT_TIMESTAMP),
+  "row_hash" VARCHAR(32),
+  PRIMARY KEY ("id", "year_item")
+) PARTITION BY LIST ("year_item");
 
 CREATE TABLE "packing_explanations" (
-  "id" SERIAL PRIMARY KEY,
-  "packing_detail_id" INT REFERENCES "packing_detail" ("id") ON DELETE CASCADE,
+  "id" SERIAL,
+  "packing_detail_id" INT,
+  "year_item" INT NOT NULL,
   "explanation" TEXT NOT NULL,
-  "explained_at" TIMESTAMP NOT NULL DEFAULT (CURRENT_TIMESTAMP)
-);
\ No newline at end of file
+  "explained_at" TIMESTAMP NOT NULL DEFAULT (CURRENT_TIMESTAMP),
+  PRIMARY KEY ("id", "year_item"),
+  FOREIGN KEY ("packing_detail_id", "year_item") REFERENCES "packing_detail" ("id", "year_item") ON DELETE CASCADE
+) PARTITION BY LIST ("year_item");
+
+CREATE EXTENSION pg_trgm;
+
+CREATE INDEX "in_house_part_no_pattern_idx" ON "in_house" ("part_no" text_pattern_ops);
+CREATE INDEX "in_house_part_no_trgm_idx" ON "in_house" USING GIN ("part_no" gin_trgm_ops);
+CREATE INDEX "in_house_part_name_trgm_idx" ON "in_house" USING GIN ("part_name" gin_trgm_ops);
+
+CREATE INDEX "out_house_part_no_pattern_idx" ON "out_house" ("part_no" text_pattern_ops);
+CREATE INDEX "out_house_part_no_trgm_idx" ON "out_house" USING GIN ("part_no" gin_trgm_ops);
+CREATE INDEX "out_house_part_name_trgm_idx" ON "out_house" USING GIN ("part_name" gin_trgm_ops);
+
+CREATE INDEX "packing_part_no_pattern_idx" ON "packing" ("part_no" text_pattern_ops);
+CREATE INDEX "packing_part_no_trgm_idx" ON "packing" USING GIN ("part_no" gin_trgm_ops);
+CREATE INDEX "packing_part_name_trgm_idx" ON "packing" USING GIN ("part_name" gin_trgm_ops);
+
+-- A part's history walks part -> details -> explanations by foreign key
+CREATE INDEX "in_house_detail_item_idx" ON "in_house_detail" ("in_house_item", "year_item");
+CREATE INDEX "out_house_detail_item_idx" ON "out_house_detail" ("out_house_item", "year_item");
+CREATE INDEX "packing_detail_item_idx" ON "packing_detail" ("packing_item", "year_item");
+CREATE INDEX "in_house_explanations_detail_idx" ON "in_house_explanations" ("in_house_detail_id", "year_item");
+CREATE INDEX "out_house_explanations_detail_idx" ON "out_house_explanations" ("out_house_detail_id", "year_item");
+CREATE INDEX "packing_explanations_detail_idx" ON "packing_explanations" ("packing_detail_id", "year_item");
+
+-- The detail and explanation tables are partitioned by year_item (see migration 003). Each
+-- year's partitions are created by the importers, or ahead of time with
+-- python -m database.partition add-year <year>
+
+-- Data version: a change counter per section table, bumped by every writing statement (migration 004)
+CREATE TABLE IF NOT EXISTS "table_changes" (
+  "table_name" VARCHAR PRIMARY KEY,
+  "changes" BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE FUNCTION "bump_table_changes"() RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO "table_changes" ("table_name", "changes") VALUES (TG_TABLE_NAME, 1)
+    ON CONFLICT ("table_name") DO UPDATE SET "changes" = "table_changes"."changes" + 1;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    section TEXT;
+    suffix TEXT;
+BEGIN
+    FOREACH section IN ARRAY ARRAY['in_house', 'out_house', 'packing'] LOOP
+        FOREACH suffix IN ARRAY ARRAY['', '_detail', '_explanations'] LOOP
+            EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', section || suffix || '_changes', section || suffix);
+            EXECUTE format('CREATE TRIGGER %I AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I '
+                           'FOR EACH STATEMENT EXECUTE FUNCTION "bump_table_changes"()',
+                           section || suffix || '_changes', section || suffix);
+        END LOOP;
+    END LOOP;
+END
+$$;
+
+-- This schema already includes every migration in database/migrations; existing databases
+-- catch up with python -m database.migrate
+CREATE TABLE "schema_migrations" (
+  "version" VARCHAR PRIMARY KEY,
+  "applied_at" TIMESTAMP NOT NULL DEFAULT (CURRENT_TIMESTAMP)
+);
+
+INSERT INTO "schema_migrations" ("version") VALUES ('001'), ('002'), ('003'), ('004');
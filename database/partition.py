@@ -0,0 +1,148 @@
+"""
+Data-move and maintenance tool for the year-partitioned detail and explanation tables.
+
+The migrate command is migration 003; python -m database.migrate runs it in order with the
+other pending migrations and records it as applied.
+
+Usage:
+    python -m database.partition migrate             # copy into partitioned tables, keep *_unpartitioned
+    python -m database.partition migrate --drop-old  # ... and drop the old tables once the counts match
+    python -m database.partition add-year 2026       # create next year's partitions ahead of the upload
+    python -m database.partition detach 2019 --drop  # remove an old year without touching the others
+    python -m database.partition status
+"""
+import argparse
+import os
+
+import repository.partitions as rpt
+import repository.psql.conn as rc
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+MIGRATION_PATH = os.path.join(PROJECT_ROOT, "database/migrations/003_partition_by_year.sql")
+DEFAULT_CONFIG_PATH = os.path.join(PROJECT_ROOT, "config/database-dev.yaml")
+
+
+def _count(cursor, table):
+    cursor.execute(f'SELECT COUNT(*) FROM "{table}"')
+    return cursor.fetchone()[0]
+
+
+def orphan_explanations(cursor):
+    """
+    Explanations of the *_unpartitioned tables whose detail row does not exist.
+
+    Migration 003 cannot place them in a year partition and does not copy them.
+
+    Returns:
+        Dict of section to the number of orphaned explanations, only sections that have any
+    """
+    orphans = {}
+    for section in rpt.SECTIONS:
+        cursor.execute(
+            f'SELECT COUNT(*) FROM "{section}_explanations_unpartitioned" e WHERE NOT EXISTS '
+            f'(SELECT 1 FROM "{section}_detail_unpartitioned" d WHERE d."id" = e."{section}_detail_id")'
+        )
+        count = cursor.fetchone()[0]
+        if count:
+            orphans[section] = count
+    return orphans
+
+
+def migrate(connection, drop_old=False):
+    """
+    Run migration 003 and compare the row counts of the old and the partitioned tables.
+
+    Everything runs in one transaction: a mismatch rolls the migration back. Explanations
+    without a detail row are not copied; they are reported, and the *_unpartitioned tables of
+    their section are kept even with drop_old so the rows are not lost.
+
+    Returns:
+        Dict of table name to (old rows, new rows)
+    """
+    with connection.cursor() as cursor:
+        if rpt.partitioned_tables(cursor):
+            raise SystemExit("The detail tables are already partitioned.")
+
+        with open(MIGRATION_PATH, "r", encoding="utf-8") as migration_file:
+            cursor.execute(migration_file.read())
+
+        counts = {}
+        for table in rpt.PARTITIONED_TABLES:
+            old = _count(cursor, f"{table}_unpartitioned")
+            if table.endswith("_explanations"):
+                # Explanations without a detail are not copied (see the migration)
+                section = table[: -len("_explanations")]
+                cursor.execute(
+                    f'SELECT COUNT(*) FROM "{table}_unpartitioned" e '
+                    f'JOIN "{section}_detail_unpartitioned" d ON d."id" = e."{section}_detail_id"'
+                )
+                old = cursor.fetchone()[0]
+            counts[table] = (old, _count(cursor, table))
+
+        mismatched = {table: pair for table, pair in counts.items() if pair[0] != pair[1]}
+        if mismatched:
+            connection.rollback()
+            raise SystemExit(f"Row counts differ, migration rolled back: {mismatched}")
+
+        orphans = orphan_explanations(cursor)
+        for section, count in orphans.items():
+            print(
+                f"NOTICE: {count:,} {section} explanations have no detail row and were not copied. "
+                f'They remain in "{section}_explanations_unpartitioned"; '
+                f'"{section}_detail_unpartitioned" and "{section}_explanations_unpartitioned" are kept.'
+            )
+
+        if drop_old:
+            for table in sorted(rpt.PARTITIONED_TABLES, key=lambda name: not name.endswith("_explanations")):
+                if table.rsplit("_", 1)[0] in orphans:
+                    continue
+                cursor.execute(f'DROP TABLE "{table}_unpartitioned"')
+    connection.commit()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partition the detail/explanation tables by year_item")
+    parser.add_argument("--config", default=DEFAULT_CONFIG_PATH, help="Database config YAML")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = commands.add_parser("migrate", help="Move the data into year partitions")
+    migrate_parser.add_argument("--drop-old", action="store_true", help="Drop the *_unpartitioned tables afterwards")
+
+    add_parser = commands.add_parser("add-year", help="Create the partitions of one or more years")
+    add_parser.add_argument("years", nargs="+", type=int)
+
+    detach_parser = commands.add_parser("detach", help="Detach the partitions of one year")
+    detach_parser.add_argument("year", type=int)
+    detach_parser.add_argument("--drop", action="store_true", help="Drop the detached tables")
+
+    commands.add_parser("status", help="List the partitions with their size")
+
+    args = parser.parse_args()
+
+    config = rc.load_config(args.config)
+    if not config:
+        raise SystemExit("Failed to load configuration. Exiting.")
+
+    with rc.DatabaseConnection(config["database"]) as connection:
+        if args.command == "migrate":
+            for table, (old, new) in migrate(connection, args.drop_old).items():
+                print(f"{table}: {old:,} rows -> {new:,} rows")
+            return
+
+        with connection.cursor() as cursor:
+            if args.command == "add-year":
+                created = rpt.ensure_year_partitions(cursor, args.years)
+                print(f"Created {', '.join(created)}" if created else "All partitions already exist")
+            elif args.command == "detach":
+                detached = rpt.detach_year(cursor, args.year, drop=args.drop)
+                action = "Dropped" if args.drop else "Detached"
+                print(f"{action} {', '.join(detached)}" if detached else f"No partitions for {args.year}")
+            else:
+                for parent, partition, bound, rows, size in rpt.partition_sizes(cursor):
+                    print(f"{parent:24} {partition:32} {bound:24} {max(rows, 0):>12,} rows {size / 1e6:>10.1f} MB")
+        connection.commit()
+
+
+if __name__ == "__main__":
+    main()
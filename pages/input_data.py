@@ -3,6 +3,7 @@ import repository.psql.conn as conn
 import repository.out_house as ro
 import repository.in_house as ri
 import repository.packing as rp
+import utils.upload_progress as upr
 import pandas as pd
 import os
 import io
@@ -55,18 +56,20 @@ if st.session_state["authentication_status"]:
                 db_connection = conn.DatabaseConnection(config["database"])
                 try:
                     result = None
+                    report_progress = upr.progress_reporter(uploaded_file.name)
                     if data_type == "INHOUSE":
-                        result = ri.input_in_house_new_data(uploaded_file, db_connection)
+                        result = ri.input_in_house_new_data(uploaded_file, db_connection, progress_callback=report_progress)
                     elif data_type == "OUTHOUSE":
-                        result = ro.input_out_house_new_data(uploaded_file, db_connection)
+                        result = ro.input_out_house_new_data(uploaded_file, db_connection, progress_callback=report_progress)
                     elif data_type == "PACKING":
-                        result = rp.input_packing_new_data(uploaded_file, db_connection)
+                        result = rp.input_packing_new_data(uploaded_file, db_connection, progress_callback=report_progress)
 
                     # Display results
                     if result:
                         st.success(
                             f"✅ Successfully processed {result['success']} out of {result['total']} records in {uploaded_file.name}"
                         )
+                        upr.display_import_stats(result["stats"])
 
                         if result["failed"] > 0:
                             st.warning(f"⚠️ {result['failed']} records failed to import")
@@ -4,6 +4,8 @@ import psycopg2.extras
 import uuid
 from datetime import datetime
 
+import repository.import_progress as ip
+
 
 def approve_in_house_data(df, db_connection, year):
     df["part_no"] = df["part_no"].astype(str)
@@ -70,7 +72,8 @@ def approve_in_house_data(df, db_connection, year):
                                 "total_process_cost" = %s,
                                 "exclusive_investment"= %s,
                                 "total_cost" = %s,
-                                "status" = %s
+                                "status" = %s,
+                                "row_hash" = NULL
                             WHERE
                                 "id" = %s
                             """,
@@ -94,11 +97,12 @@ def approve_in_house_data(df, db_connection, year):
 
                         cursor.execute(
                             """
-                            INSERT INTO "in_house_explanations" ("in_house_detail_id", "explanation", "explained_at")
-                            VALUES (%s, %s, CURRENT_TIMESTAMP)
+                            INSERT INTO "in_house_explanations" ("in_house_detail_id", "year_item", "explanation", "explained_at")
+                            VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
                             """,
                             (
                                 detail_id,
+                                year,
                                 response,
                             ),
                         )
@@ -109,7 +113,7 @@ def approve_in_house_data(df, db_connection, year):
 
                 except Exception as e:
                     error_message = f"Error updating row {index + 1} for part {row.get('part_no', 'unknown')}: {e}"
-                    print(error_message)
+                    ip.logger.error(error_message)
                     failed_parts.append({"part_no": row.get("part_no", "unknown"), "row": index + 1, "error": str(e)})
                     connection.rollback()
 
@@ -168,7 +172,7 @@ def approve_out_house_data(df, db_connection, year):
                         cursor.execute(
                             """
                             UPDATE "out_house_detail"
-                            SET "price" = %s, "status" = %s
+                            SET "price" = %s, "status" = %s, "row_hash" = NULL
                             WHERE "id" = %s
                             """,
                             (
@@ -183,11 +187,12 @@ def approve_out_house_data(df, db_connection, year):
                     response = f"Approve at {formatted_date}"
                     cursor.execute(
                         """
-                        INSERT INTO "out_house_explanations" ("out_house_detail_id", "explanation", "explained_at")
-                        VALUES (%s, %s, CURRENT_TIMESTAMP)
+                        INSERT INTO "out_house_explanations" ("out_house_detail_id", "year_item", "explanation", "explained_at")
+                        VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
                         """,
                         (
                             detail_id,
+                            year,
                             response,
                         ),
                     )
@@ -267,7 +272,8 @@ def approve_packing_data(df, db_connection, year):
                                     "labor_cost" = %s, 
                                     "material_cost" = %s, 
                                     "inland_cost" = %s, 
-                                    "status" = %s
+                                    "status" = %s,
+                                    "row_hash" = NULL
                                 WHERE "id" = %s
                                 """,
                                 (
@@ -286,11 +292,12 @@ def approve_packing_data(df, db_connection, year):
                     for detail_id in detail_arr:
                         cursor.execute(
                             """
-                            INSERT INTO "packing_explanations" ("packing_detail_id", "explanation", "explained_at")
-                            VALUES (%s, %s, CURRENT_TIMESTAMP)
+                            INSERT INTO "packing_explanations" ("packing_detail_id", "year_item", "explanation", "explained_at")
+                            VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
                             """,
                             (
                                 detail_id[0],
+                                year,
                                 response,
                             ),
                         )
@@ -301,7 +308,7 @@ def approve_packing_data(df, db_connection, year):
 
                 except Exception as e:
                     error_message = f"Error updating row {index + 1} for part {row.get('part_no', 'unknown')}: {e}"
-                    print(error_message)
+                    ip.logger.error(error_message)
                     failed_parts.append({"part_no": row.get("part_no", "unknown"), "row": index + 1, "error": str(e)})
                     connection.rollback()
 
@@ -0,0 +1,58 @@
+import hashlib
+import math
+
+
+def _canonical(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    if isinstance(value, (int, float)) or hasattr(value, "as_integer_ratio"):
+        # Costs are stored as NUMERIC(14,0), so compare them the way they are written
+        return f"{round(float(value), 0):.0f}"
+    return str(value).strip()
+
+
+def row_hash(*values):
+    """MD5 over the canonical form of the written fields of one update row."""
+    return hashlib.md5("|".join(_canonical(value) for value in values).encode("utf-8")).hexdigest()
+
+
+def stored_hashes(cursor, table, part_nos):
+    """
+    Fetch the stored row hashes of every detail of the given parts in one query.
+
+    Args:
+        cursor: psycopg2 cursor
+        table: "in_house", "out_house" or "packing"
+        part_nos: Part numbers of the uploaded sheet
+
+    Returns:
+        Dict of (part_no, year_item) to the list of row hashes of its detail rows (packing
+        can have several per year, one per destination/model)
+    """
+    cursor.execute(
+        f"""
+        SELECT p."part_no", d."year_item", d."row_hash"
+        FROM "{table}" p
+        JOIN "{table}_detail" d ON p."id" = d."{table}_item"
+        WHERE p."part_no" = ANY(%s)
+        """,
+        (list(part_nos),),
+    )
+    hashes = {}
+    for part_no, year_item, stored_hash in cursor.fetchall():
+        hashes.setdefault((part_no, int(year_item)), []).append(stored_hash)
+    return hashes
+
+
+def unchanged(hashes, part_no, year, incoming_hash):
+    """True when every stored detail of part_no/year already carries incoming_hash."""
+    stored = hashes.get((part_no, int(year)))
+    return bool(stored) and all(stored_hash == incoming_hash for stored_hash in stored)
+
+
+def remember(hashes, part_no, year, written_hash):
+    """
+    Record a row just written, so a later row of the same upload for part_no/year is compared
+    with it instead of the hash read before the run.
+    """
+    hashes[(part_no, int(year))] = [written_hash]
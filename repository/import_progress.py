@@ -0,0 +1,101 @@
+import json
+import logging
+import os
+import time
+
+# Import/approval run stats (JSON) and row errors; set MSP_IMPORT_LOG to a file path to write
+# them there, otherwise they go to stderr
+logger = logging.getLogger("msp.imports")
+
+if not logger.handlers:
+    if os.environ.get("MSP_IMPORT_LOG"):
+        _handler = logging.FileHandler(os.environ["MSP_IMPORT_LOG"], encoding="utf-8")
+        _handler.setFormatter(logging.Formatter("%(message)s"))
+    else:
+        _handler = logging.StreamHandler()
+        _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+
+class ImportProgress:
+    """
+    Row counters and throughput for one import/update run.
+
+    The importer reports rows as they are parsed, validated, written, skipped or failed; a
+    progress event (dict) is passed to the optional callback at most every `interval` seconds
+    and once more when the run finishes. Every finished run is logged to "msp.imports" as JSON.
+
+    Args:
+        operation: Name of the import function, e.g. "input_in_house_new_data"
+        callback: Optional callable receiving each progress event
+        interval: Minimum seconds between two callback events
+    """
+
+    def __init__(self, operation, callback=None, interval=0.25):
+        self.operation = operation
+        self.callback = callback
+        self.interval = interval
+        self.total = 0
+        self.processed = 0
+        self.counts = {"parsed": 0, "validated": 0, "written": 0, "skipped": 0, "failed": 0}
+        self.started = time.perf_counter()
+        self.parse_seconds = 0.0
+        self._last_emit = 0.0
+
+    def parsed(self, df):
+        self.total = len(df)
+        self.counts["parsed"] = len(df)
+        self.parse_seconds = time.perf_counter() - self.started
+        self.emit(force=True)
+
+    def validated(self):
+        self.counts["validated"] += 1
+
+    def written(self):
+        self.counts["written"] += 1
+
+    def skipped(self, reason=None):
+        self.counts["skipped"] += 1
+        if reason:
+            logger.debug("%s skipped: %s", self.operation, reason)
+
+    def failed(self):
+        self.counts["failed"] += 1
+
+    def rows(self, df):
+        """df.iterrows() that emits a progress event after each processed row."""
+        for index, row in df.iterrows():
+            yield index, row
+            self.processed += 1
+            self.emit()
+
+    def event(self, done=False):
+        elapsed = time.perf_counter() - self.started
+        return {
+            "operation": self.operation,
+            "done": done,
+            "total": self.total,
+            "processed": self.processed,
+            **self.counts,
+            "elapsed_seconds": round(elapsed, 3),
+            "parse_seconds": round(self.parse_seconds, 3),
+            "rows_per_sec": round(self.processed / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+    def emit(self, force=False):
+        if self.callback is None:
+            return
+        now = time.perf_counter()
+        if not force and now - self._last_emit < self.interval:
+            return
+        self._last_emit = now
+        self.callback(self.event())
+
+    def finish(self):
+        """Send and log the final event, and return it as the run's stats."""
+        stats = self.event(done=True)
+        if self.callback is not None:
+            self.callback(stats)
+        logger.info(json.dumps(stats))
+        return stats
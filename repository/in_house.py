@@ -2,15 +2,22 @@ import pandas as pd
 import psycopg2
 import psycopg2.extras
 import uuid
+
+import repository.change_detection as cd
+import repository.import_progress as ip
+import repository.partitions as rpt
+
 psycopg2.extras.register_uuid()
 
 
-def input_in_house_new_data(excel_file, db_connection):
+def input_in_house_new_data(excel_file, db_connection, progress_callback=None):
+    progress = ip.ImportProgress("input_in_house_new_data", progress_callback)
     # Read the Excel file - ensure string conversion for part_no
     df = pd.read_excel(excel_file)
 
     # Explicitly convert part_no to string to avoid type errors
     df['part_no'] = df['part_no'].astype(str)
+    progress.parsed(df)
 
     failed_parts = []  # List to store failed part numbers
     success_count = 0  # Counter for successful updates
@@ -19,7 +26,10 @@ def input_in_house_new_data(excel_file, db_connection):
     # Connect to PostgreSQL
     with db_connection as connection:
         with connection.cursor() as cursor:
-            for index, row in df.iterrows():
+            # A new year needs its detail/explanation partitions before the first insert
+            rpt.ensure_year_partitions(cursor, df["year"].dropna().unique())
+            connection.commit()
+            for index, row in progress.rows(df):
                 try:
                     part_no = str(row["part_no"])
                     if len(part_no) > 10:
@@ -27,8 +37,11 @@ def input_in_house_new_data(excel_file, db_connection):
                             {"part_no": part_no, "row": index + 1,
                              "error": "Part number exceeds maximum length (10 characters)"}
                         )
+                        progress.failed()
                         continue
 
+                    progress.validated()
+
                     # Check if part_no already exists
                     cursor.execute(
                         """
@@ -68,7 +81,7 @@ def input_in_house_new_data(excel_file, db_connection):
                     if existing_entry:
                         # Skip if the entry already exists
                         skipped_count += 1
-                        print(f"Skipping entry for part {part_no} in year {row['year']} - Already exists")
+                        progress.skipped(f"Skipping entry for part {part_no} in year {row['year']} - Already exists")
                         continue
 
                     # Insert into in_house_detail with proper rounding
@@ -101,35 +114,62 @@ def input_in_house_new_data(excel_file, db_connection):
 
                     connection.commit()
                     success_count += 1
+                    progress.written()
 
                 except Exception as e:
                     error_message = f"Error processing row {index + 1} for part {row.get('part_no', 'unknown')}: {e}"
-                    print(error_message)
+                    ip.logger.error(error_message)
                     failed_parts.append({"part_no": row.get("part_no", "unknown"), "row": index + 1, "error": str(e)})
+                    progress.failed()
                     connection.rollback()
 
-    # Print summary of operation
-    print("Operation Summary:")
-    print(f"Total rows processed: {len(df)}")
-    print(f"Successful insertions: {success_count}")
-    print(f"Skipped entries: {skipped_count}")
-    print(f"Failed entries: {len(failed_parts)}")
+    # Log summary of operation
+    ip.logger.info(
+        "Operation Summary: %d rows processed, %d inserted, %d skipped, %d failed",
+        len(df), success_count, skipped_count, len(failed_parts),
+    )
 
     # Return details for further processing if needed
-    return {"total": len(df), "success": success_count, "failed": len(failed_parts), "failed_parts": failed_parts}
+    return {"total": len(df), "success": success_count, "failed": len(failed_parts), "failed_parts": failed_parts,
+            "stats": progress.finish()}
 
 
-def update_in_house_data(excel_file, db_connection):
+def update_in_house_data(excel_file, db_connection, progress_callback=None):
+    progress = ip.ImportProgress("update_in_house_data", progress_callback)
     df = pd.read_excel(excel_file)
     df["part_no"] = df["part_no"].astype(str)
+    progress.parsed(df)
 
     failed_parts = []  # List to store failed part numbers
     success_count = 0  # Counter for successful updates
+    unchanged_count = 0  # Counter for rows identical to the stored data
+    changed_parts = []  # Part numbers actually written
 
     with db_connection as connection:
         with connection.cursor() as cursor:
-            for index, row in df.iterrows():
+            hashes = cd.stored_hashes(cursor, "in_house", df["part_no"].unique())
+            for index, row in progress.rows(df):
                 try:
+                    status = row["status"].strip().upper()
+                    if status == "A":
+                        status = "APPROVE"
+                    elif status == "D":
+                        status = "PENDING"
+                    else:
+                        status = "PENDING"
+
+                    progress.validated()
+
+                    # Rows identical to the last applied update of every matching detail are not rewritten
+                    incoming_hash = cd.row_hash(
+                        row["lva"], row["non_lva"], row["tooling"], row["process_cost"], row["total_cost"],
+                        status, row["reason"],
+                    )
+                    if cd.unchanged(hashes, row["part_no"], row["year"], incoming_hash):
+                        unchanged_count += 1
+                        progress.skipped(f"Unchanged part {row['part_no']} in year {row['year']}")
+                        continue
+
                     cursor.execute(
                         """
                             SELECT "id" FROM "in_house" WHERE "part_no" = %s
@@ -151,14 +191,6 @@ def update_in_house_data(excel_file, db_connection):
                     else:
                         inserted_uuid = result[0]
 
-                    status = row["status"].strip().upper()
-                    if status == "A":
-                        status = "APPROVE"
-                    elif status == "D":
-                        status = "PENDING"
-                    else:
-                        status = "PENDING"
-
                     cursor.execute(
                         """
                         SELECT "id" FROM "in_house_detail" 
@@ -180,7 +212,8 @@ def update_in_house_data(excel_file, db_connection):
                                 "tooling" = %s,                               
                                 "process_cost" = %s,                               
                                 "total_cost" = %s,
-                                "status" = %s
+                                "status" = %s,
+                                "row_hash" = %s
                             WHERE
                                 "id" = %s
                             """,
@@ -191,6 +224,7 @@ def update_in_house_data(excel_file, db_connection):
                                 round(float(row["process_cost"]), 0),
                                 round(row["total_cost"], 0),
                                 status,
+                                incoming_hash,
                                 detail_id,
                             ),
                         )
@@ -198,23 +232,29 @@ def update_in_house_data(excel_file, db_connection):
                     if row["reason"]:
                         cursor.execute(
                             """
-                            INSERT INTO "in_house_explanations" ("in_house_detail_id", "explanation", "explained_at")
-                            VALUES (%s, %s, CURRENT_TIMESTAMP)
+                            INSERT INTO "in_house_explanations" ("in_house_detail_id", "year_item", "explanation", "explained_at")
+                            VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
                             """,
                             (
                                 detail_id,
+                                row["year"],
                                 row["reason"],
                             ),
                         )
 
                     connection.commit()
+                    cd.remember(hashes, row["part_no"], row["year"], incoming_hash)
                     success_count += 1
+                    progress.written()
+                    changed_parts.append(row["part_no"])
 
 
                 except Exception as e:
                     error_message = f"Error updating row {index + 1} for part {row.get('part_no', 'unknown')}: {e}"
-                    print(error_message)
+                    ip.logger.error(error_message)
                     failed_parts.append({"part_no": row.get("part_no", "unknown"), "row": index + 1, "error": str(e)})
+                    progress.failed()
                     connection.rollback()
 
-    return {"total": len(df), "success": success_count, "failed": len(failed_parts), "failed_parts": failed_parts}
+    return {"total": len(df), "success": success_count, "failed": len(failed_parts), "failed_parts": failed_parts,
+            "unchanged": unchanged_count, "changed_parts": changed_parts, "stats": progress.finish()}
@@ -3,13 +3,19 @@ import psycopg2
 import psycopg2.extras
 import uuid
 
+import repository.change_detection as cd
+import repository.import_progress as ip
+import repository.partitions as rpt
+
 psycopg2.extras.register_uuid()
 
 
-def input_out_house_new_data(excel_file, db_connection):
+def input_out_house_new_data(excel_file, db_connection, progress_callback=None):
+    progress = ip.ImportProgress("input_out_house_new_data", progress_callback)
     # Read the Excel file
     df = pd.read_excel(excel_file)
     df["part_no"] = df["part_no"].astype(str)
+    progress.parsed(df)
 
     failed_parts = []  # List to store failed part numbers
     success_count = 0  # Counter for successful updates
@@ -18,8 +24,11 @@ def input_out_house_new_data(excel_file, db_connection):
     # Use the provided connection
     with db_connection as connection:
         with connection.cursor() as cursor:
+            # A new year needs its detail/explanation partitions before the first insert
+            rpt.ensure_year_partitions(cursor, df["year"].dropna().unique())
+            connection.commit()
             # Iterate over rows and process each part
-            for index, row in df.iterrows():
+            for index, row in progress.rows(df):
                 try:
                     # Check if part_no already exists in out_house
                     part_no = str(row["part_no"])
@@ -28,8 +37,11 @@ def input_out_house_new_data(excel_file, db_connection):
                             {"part_no": part_no, "row": index + 1,
                              "error": "Part number exceeds maximum length (10 characters)"}
                         )
+                        progress.failed()
                         continue
 
+                    progress.validated()
+
                     cursor.execute(
                         """
                         SELECT "id" FROM "out_house" WHERE "part_no" = %s
@@ -63,7 +75,7 @@ def input_out_house_new_data(excel_file, db_connection):
                     if existing_entry:
                         # Skip if the entry already exists
                         skipped_count += 1
-                        print(f"Skipping entry for part {row['part_no']} in year {row['year']} - Already exists")
+                        progress.skipped(f"Skipping entry for part {row['part_no']} in year {row['year']} - Already exists")
                         continue
 
                     cursor.execute(
@@ -81,34 +93,41 @@ def input_out_house_new_data(excel_file, db_connection):
                     )
                     connection.commit()
                     success_count += 1
+                    progress.written()
 
                 except Exception as e:
                     error_message = f"Error processing row {index + 1} for part {row.get('part_no', 'unknown')}: {e}"
-                    print(error_message)
+                    ip.logger.error(error_message)
                     failed_parts.append({"part_no": row.get("part_no", "unknown"), "row": index + 1, "error": str(e)})
+                    progress.failed()
                     connection.rollback()
 
-    # Print summary of operation
-    print("Operation Summary:")
-    print(f"Total rows processed: {len(df)}")
-    print(f"Successful insertions: {success_count}")
-    print(f"Skipped entries: {skipped_count}")
-    print(f"Failed entries: {len(failed_parts)}")
+    # Log summary of operation
+    ip.logger.info(
+        "Operation Summary: %d rows processed, %d inserted, %d skipped, %d failed",
+        len(df), success_count, skipped_count, len(failed_parts),
+    )
 
     # Return details for further processing if needed
-    return {"total": len(df), "success": success_count, "failed": len(failed_parts), "failed_parts": failed_parts}
+    return {"total": len(df), "success": success_count, "failed": len(failed_parts), "failed_parts": failed_parts,
+            "stats": progress.finish()}
 
 
-def update_out_house_data(excel_file, db_connection):
+def update_out_house_data(excel_file, db_connection, progress_callback=None):
+    progress = ip.ImportProgress("update_out_house_data", progress_callback)
     df = pd.read_excel(excel_file)
     df["part_no"] = df["part_no"].astype(str)
+    progress.parsed(df)
 
     failed_parts = []  # List to store failed part numbers
     success_count = 0  # Counter for successful updates
+    unchanged_count = 0  # Counter for rows identical to the stored data
+    changed_parts = []  # Part numbers actually written
 
     with db_connection as connection:
         with connection.cursor() as cursor:
-            for index, row in df.iterrows():
+            hashes = cd.stored_hashes(cursor, "out_house", df["part_no"].unique())
+            for index, row in progress.rows(df):
                 try:
                     part_no = str(row["part_no"])
                     if len(row["part_no"])>10:
@@ -116,6 +135,23 @@ def update_out_house_data(excel_file, db_connection):
                             {"part_no": row.get("part_no", "unknown"), "row": index + 1, "error": str(e)})
                         continue
 
+                    status = row["status"].strip().upper()
+                    if status == "A":
+                        status = "APPROVE"
+                    elif status == "D":
+                        status = "PENDING"
+                    else:
+                        status = "PENDING"
+
+                    progress.validated()
+
+                    # Rows identical to the last applied update of every matching detail are not rewritten
+                    incoming_hash = cd.row_hash(row["price"], status, row["reason"])
+                    if cd.unchanged(hashes, row["part_no"], row["year"], incoming_hash):
+                        unchanged_count += 1
+                        progress.skipped(f"Unchanged part {row['part_no']} in year {row['year']}")
+                        continue
+
                     # Check if part_no exists
                     cursor.execute(
                         """
@@ -140,15 +176,6 @@ def update_out_house_data(excel_file, db_connection):
                         # Part exists, update part_name if needed and use existing UUID
                         inserted_uuid = result[0]
 
-                    # Format status (convert to uppercase and standardize)
-                    status = row["status"].strip().upper()
-                    if status == "A":
-                        status = "APPROVE"
-                    elif status == "D":
-                        status = "PENDING"
-                    else:
-                        status = "PENDING"
-
                     # Check if we have an existing detail record for this part and year
                     cursor.execute(
                         """
@@ -165,12 +192,13 @@ def update_out_house_data(excel_file, db_connection):
                         cursor.execute(
                             """
                             UPDATE "out_house_detail"
-                            SET "price" = %s, "status" = %s
+                            SET "price" = %s, "status" = %s, "row_hash" = %s
                             WHERE "id" = %s
                             """,
                             (
                                 round(row["price"], 0),
                                 status,
+                                incoming_hash,
                                 detail_id,
                             ),
                         )
@@ -179,24 +207,30 @@ def update_out_house_data(excel_file, db_connection):
                     if row["reason"]:
                         cursor.execute(
                             """
-                            INSERT INTO "out_house_explanations" ("out_house_detail_id", "explanation", "explained_at")
-                            VALUES (%s, %s, CURRENT_TIMESTAMP)
+                            INSERT INTO "out_house_explanations" ("out_house_detail_id", "year_item", "explanation", "explained_at")
+                            VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
                             """,
                             (
                                 detail_id,
+                                row["year"],
                                 row["reason"],
                             ),
                         )
 
                     # Commit the transaction
                     connection.commit()
+                    cd.remember(hashes, row["part_no"], row["year"], incoming_hash)
                     success_count += 1
+                    progress.written()
+                    changed_parts.append(row["part_no"])
 
                 except Exception as e:
                     error_message = f"Error updating row {index + 1} for part {row.get('part_no', 'unknown')}: {e}"
-                    print(error_message)
+                    ip.logger.error(error_message)
                     failed_parts.append({"part_no": row.get("part_no", "unknown"), "row": index + 1, "error": str(e)})
+                    progress.failed()
                     connection.rollback()
 
     # Return summary statistics and failed parts
-    return {"total": len(df), "success": success_count, "failed": len(failed_parts), "failed_parts": failed_parts}
+    return {"total": len(df), "success": success_count, "failed": len(failed_parts), "failed_parts": failed_parts,
+            "unchanged": unchanged_count, "changed_parts": changed_parts, "stats": progress.finish()}
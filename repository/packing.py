@@ -3,11 +3,17 @@ import psycopg2
 import psycopg2.extras
 import uuid
 
+import repository.change_detection as cd
+import repository.import_progress as ip
+import repository.partitions as rpt
+
 psycopg2.extras.register_uuid()
 
 
-def input_packing_new_data(excel_file, db_connection):
+def input_packing_new_data(excel_file, db_connection, progress_callback=None):
+    progress = ip.ImportProgress("input_packing_new_data", progress_callback)
     df = pd.read_excel(excel_file)
+    progress.parsed(df)
 
     failed_parts = []  # List to store failed part numbers
     success_count = 0  # Counter for successful updates
@@ -15,7 +21,10 @@ def input_packing_new_data(excel_file, db_connection):
 
     with db_connection as connection:
         with connection.cursor() as cursor:
-            for index, row in df.iterrows():
+            # A new year needs its detail/explanation partitions before the first insert
+            rpt.ensure_year_partitions(cursor, df["year"].dropna().unique())
+            connection.commit()
+            for index, row in progress.rows(df):
                 try:
                     part_no = str(row["part_no"])
                     if len(part_no) > 10:
@@ -23,8 +32,11 @@ def input_packing_new_data(excel_file, db_connection):
                             {"part_no": part_no, "row": index + 1,
                              "error": "Part number exceeds maximum length (10 characters)"}
                         )
+                        progress.failed()
                         continue
 
+                    progress.validated()
+
                     # Check if part_no already exists
                     cursor.execute(
                         """
@@ -85,9 +97,10 @@ def input_packing_new_data(excel_file, db_connection):
                                 (labor_cost, material_cost, inland_cost, existing_entry[0])
                             )
                             success_count += 1
+                            progress.written()
                         else:
                             skipped_count += 1
-                            print(f'Skipping entry for part {part_no} with destination {row["destination"]} in year {row["year"]} - Already exists with equal or higher costs')
+                            progress.skipped(f'Skipping entry for part {part_no} with destination {row["destination"]} in year {row["year"]} - Already exists with equal or higher costs')
                             continue
                     else:
                         # Insert new packing_detail record
@@ -108,28 +121,55 @@ def input_packing_new_data(excel_file, db_connection):
                             ),
                         )
                         success_count += 1
+                        progress.written()
 
                 except Exception as e:
                     error_message = f"Error processing row {index + 1} for part {row.get('part_no', 'unknown')}: {e}"
-                    print(error_message)
+                    ip.logger.error(error_message)
                     failed_parts.append({"part_no": row.get("part_no", "unknown"), "row": index + 1, "error": str(e)})
+                    progress.failed()
                     connection.rollback()
 
     # Return details for further processing if needed
-    return {"total": len(df), "success": success_count, "failed": len(failed_parts), "failed_parts": failed_parts}
+    return {"total": len(df), "success": success_count, "failed": len(failed_parts), "failed_parts": failed_parts,
+            "stats": progress.finish()}
 
 
-def update_packing_data(excel_file, db_connection):
+def update_packing_data(excel_file, db_connection, progress_callback=None):
+    progress = ip.ImportProgress("update_packing_data", progress_callback)
     df = pd.read_excel(excel_file)
     df["part_no"] = df["part_no"].astype(str)
+    progress.parsed(df)
 
     failed_parts = []  # List to store failed part numbers
     success_count = 0  # Counter for successful updates
+    unchanged_count = 0  # Counter for rows identical to the stored data
+    changed_parts = []  # Part numbers actually written
 
     with db_connection as connection:
         with connection.cursor() as cursor:
-            for index, row in df.iterrows():
+            hashes = cd.stored_hashes(cursor, "packing", df["part_no"].unique())
+            for index, row in progress.rows(df):
                 try:
+                    status = row["status"].strip().upper()
+                    if status == "A":
+                        status = "APPROVE"
+                    elif status == "D":
+                        status = "PENDING"
+                    else:
+                        status = "PENDING"
+
+                    progress.validated()
+
+                    # Rows identical to the last applied update of every matching detail are not rewritten
+                    incoming_hash = cd.row_hash(
+                        row["labor_cost"], row["material_cost"], row["inland_cost"], status, row["reason"]
+                    )
+                    if cd.unchanged(hashes, row["part_no"], row["year"], incoming_hash):
+                        unchanged_count += 1
+                        progress.skipped(f"Unchanged part {row['part_no']} in year {row['year']}")
+                        continue
+
                     # Check if part_no exists
                     cursor.execute(
                         """
@@ -154,15 +194,6 @@ def update_packing_data(excel_file, db_connection):
                         # Part exists, update part_name if needed and use existing UUID
                         inserted_uuid = result[0]
 
-                    # Format status (convert to uppercase and standardize)
-                    status = row["status"].strip().upper()
-                    if status == "A":
-                        status = "APPROVE"
-                    elif status == "D":
-                        status = "PENDING"
-                    else:
-                        status = "PENDING"
-
                     # Check if we have an existing detail record for this part and year
                     cursor.execute(
                         """
@@ -188,7 +219,8 @@ def update_packing_data(excel_file, db_connection):
                                     "labor_cost" = %s, 
                                     "material_cost" = %s, 
                                     "inland_cost" = %s, 
-                                    "status" = %s
+                                    "status" = %s,
+                                    "row_hash" = %s
                                 WHERE "id" = %s
                                 """,
                                 (
@@ -196,6 +228,7 @@ def update_packing_data(excel_file, db_connection):
                                     round(row["material_cost"], 0),
                                     round(row["inland_cost"], 0),
                                     status,
+                                    incoming_hash,
                                     detail_id,
                                 ),
                             )
@@ -205,24 +238,30 @@ def update_packing_data(excel_file, db_connection):
                         for detail_id in detail_id_arr:
                             cursor.execute(
                                 """
-                                INSERT INTO "packing_explanations" ("packing_detail_id", "explanation", "explained_at")
-                                VALUES (%s, %s, CURRENT_TIMESTAMP)
+                                INSERT INTO "packing_explanations" ("packing_detail_id", "year_item", "explanation", "explained_at")
+                                VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
                                 """,
                                 (
                                     detail_id,
+                                    row["year"],
                                     row["reason"],
                                 ),
                             )
 
                     # Commit the transaction
                     connection.commit()
+                    cd.remember(hashes, row["part_no"], row["year"], incoming_hash)
                     success_count += 1
+                    progress.written()
+                    changed_parts.append(row["part_no"])
 
                 except Exception as e:
                     error_message = f"Error updating row {index + 1} for part {row.get('part_no', 'unknown')}: {e}"
-                    print(error_message)
+                    ip.logger.error(error_message)
                     failed_parts.append({"part_no": row.get("part_no", "unknown"), "row": index + 1, "error": str(e)})
+                    progress.failed()
                     connection.rollback()
 
     # Return summary statistics and failed parts
-    return {"total": len(df), "success": success_count, "failed": len(failed_parts), "failed_parts": failed_parts}
+    return {"total": len(df), "success": success_count, "failed": len(failed_parts), "failed_parts": failed_parts,
+            "unchanged": unchanged_count, "changed_parts": changed_parts, "stats": progress.finish()}
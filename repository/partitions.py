@@ -0,0 +1,112 @@
+"""
+Year partitions of the *_detail and *_explanations tables (see
+database/migrations/003_partition_by_year.sql).
+
+Every year_item gets its own LIST partition, e.g. in_house_detail_y2024, so the dashboard
+queries, which always filter two years, only scan two partitions, and an old year can be
+detached without rewriting the rest of the table.
+"""
+SECTIONS = ["in_house", "out_house", "packing"]
+PARTITIONED_TABLES = [f"{section}{suffix}" for section in SECTIONS for suffix in ("_detail", "_explanations")]
+
+
+def partition_name(table, year):
+    return f"{table}_y{int(year)}"
+
+
+def partitioned_tables(cursor):
+    """Names of the detail/explanation tables that are partitioned (empty before migration 003)."""
+    cursor.execute(
+        """
+        SELECT c.relname
+        FROM pg_partitioned_table pt
+        JOIN pg_class c ON c.oid = pt.partrelid
+        WHERE c.relname = ANY(%s)
+        """,
+        (PARTITIONED_TABLES,),
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def ensure_year_partitions(cursor, years):
+    """
+    Create the partitions of the given years where missing.
+
+    The importers call this before inserting rows of a year that may be new.
+
+    Returns:
+        List of the partitions that were created
+
+    Raises:
+        RuntimeError: if migration 003 has not run (the tables are not partitioned)
+    """
+    tables = partitioned_tables(cursor)
+    if not tables:
+        raise RuntimeError("The detail and explanation tables are not partitioned by year; "
+                           "apply the pending migrations with python -m database.migrate")
+    created = []
+    # Detail partitions first: the explanation partitions reference them
+    for table in [table for table in PARTITIONED_TABLES if table in tables]:
+        for year in sorted({int(year) for year in years}):
+            name = partition_name(table, year)
+            cursor.execute("SELECT to_regclass(%s)", (name,))
+            if cursor.fetchone()[0] is not None:
+                continue
+            cursor.execute(f'CREATE TABLE "{name}" PARTITION OF "{table}" FOR VALUES IN ({int(year)})')
+            created.append(name)
+    return created
+
+
+def detach_year(cursor, year, drop=False):
+    """
+    Detach (and optionally drop) the partitions of one year from every partitioned table.
+
+    A detached explanation partition keeps its foreign key to the partitioned detail table,
+    which would block detaching the detail partition, so that key is dropped first. The
+    detached tables stay in the database as plain tables unless drop is set.
+
+    Returns:
+        List of the detached partitions
+    """
+    tables = partitioned_tables(cursor)
+    detached = []
+    for section in SECTIONS:
+        for table in (f"{section}_explanations", f"{section}_detail"):
+            name = partition_name(table, year)
+            cursor.execute("SELECT to_regclass(%s)", (name,))
+            if table not in tables or cursor.fetchone()[0] is None:
+                continue
+            cursor.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"')
+            if table.endswith("_explanations"):
+                cursor.execute(
+                    "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'", (name,)
+                )
+                for (constraint,) in cursor.fetchall():
+                    cursor.execute(f'ALTER TABLE "{name}" DROP CONSTRAINT "{constraint}"')
+            detached.append(name)
+    if drop:
+        for name in detached:
+            cursor.execute(f'DROP TABLE "{name}"')
+    return detached
+
+
+def partition_sizes(cursor):
+    """
+    Rows and on-disk size per partition.
+
+    Returns:
+        List of (parent, partition, bound, rows, bytes) tuples, rows from the planner estimate
+    """
+    cursor.execute(
+        """
+        SELECT parent.relname, child.relname, pg_get_expr(child.relpartbound, child.oid),
+               child.reltuples::BIGINT, pg_total_relation_size(child.oid)
+        FROM pg_inherits i
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        JOIN pg_class child ON child.oid = i.inhrelid
+        WHERE parent.relname = ANY(%s)
+        ORDER BY parent.relname, child.relname
+        """,
+        (PARTITIONED_TABLES,),
+    )
+    return cursor.fetchall()
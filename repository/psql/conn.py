@@ -1,7 +1,12 @@
+import time
+
 import psycopg2
+import psycopg2.extensions
 import yaml
 from yaml.loader import SafeLoader
 
+import utils.instrumentation as qi
+
 
 def load_config(config_path):
     """Load configuration from YAML file"""
@@ -14,6 +19,18 @@ def load_config(config_path):
         return None
 
 
+class TimedCursor(psycopg2.extensions.cursor):
+    """Cursor that records the wall time and row count of every statement in utils.instrumentation"""
+
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            sql = query.decode() if isinstance(query, bytes) else str(query)
+            qi.record(qi.statement_name(sql), time.perf_counter() - start, rows=self.rowcount, source="cursor")
+
+
 class DatabaseConnection:
     def __init__(self, db_credentials):
         self.db_credentials = db_credentials
@@ -31,6 +48,7 @@ class DatabaseConnection:
             database=db_name,  # Use the found database name
             user=self.db_credentials["user"],
             password=self.db_credentials["password"],
+            cursor_factory=TimedCursor,
         )
         return self.connection
 
@@ -0,0 +1,131 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import utils.cache_manager as cm
+
+
+def test_seconds_parses_ttl_strings():
+    assert cm._seconds("30s") == 30
+    assert cm._seconds("15m") == 900
+    assert cm._seconds("1h") == 3600
+    assert cm._seconds(5) == 5.0
+    assert cm._seconds(None) is None
+
+
+def test_size_of_counts_frame_and_bytes():
+    df = pd.DataFrame({"a": range(1000)})
+    assert cm.size_of(df) == int(df.memory_usage(deep=True).sum())
+    assert cm.size_of(b"12345") == 5
+
+
+def test_unknown_policy_rejected():
+    with pytest.raises(ValueError):
+        cm.CacheManager(100, "fifo")
+
+
+def test_lru_evicts_least_recently_used():
+    manager = cm.CacheManager(10)
+    manager.put("a", b"1234")
+    manager.put("b", b"1234")
+    assert manager.get("a") == (True, b"1234")
+    manager.put("c", b"1234")
+    assert manager.get("b") == (False, None)
+    assert manager.get("a")[0] and manager.get("c")[0]
+    assert manager.used_bytes == 8
+
+
+def test_cost_policy_keeps_expensive_entries():
+    manager = cm.CacheManager(10, "cost")
+    manager.put("slow", b"1234", cost=10.0)
+    manager.put("fast", b"1234", cost=0.001)
+    manager.put("new", b"1234", cost=1.0)
+    assert manager.get("slow")[0]
+    assert not manager.get("fast")[0]
+
+
+def test_oversized_value_rejected():
+    manager = cm.CacheManager(4)
+    assert manager.put("big", b"12345") is False
+    assert manager.stats().set_index("namespace").loc["default", "rejected"] == 1
+
+
+def test_expired_entries_purged_on_put():
+    released = []
+    manager = cm.CacheManager(100)
+    manager.put("old", b"1234", ttl=0.01, release=lambda: released.append("old"))
+    time.sleep(0.02)
+    manager.put("new", b"1234")
+    assert released == ["old"]
+    assert manager.used_bytes == 4
+    assert manager.stats().set_index("namespace").loc["default", "expirations"] == 1
+
+
+def test_memoize_returns_shallow_copies():
+    manager = cm.CacheManager(10 ** 6)
+    calls = []
+
+    @manager.memoize("frames")
+    def load(value):
+        calls.append(value)
+        return pd.DataFrame({"a": [value]})
+
+    first = load(1)
+    first["b"] = 2
+    second = load(1)
+    assert calls == [1]
+    assert "b" not in second.columns
+
+
+def test_get_or_build_single_flight():
+    manager = cm.CacheManager(10 ** 6)
+    calls = []
+
+    def build():
+        calls.append(1)
+        time.sleep(0.05)
+        return b"value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(manager.get_or_build("key", build)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == [b"value"] * 5
+
+
+def test_failed_build_is_raised_and_retried():
+    manager = cm.CacheManager(10 ** 6)
+
+    def fail():
+        raise RuntimeError("query failed")
+
+    with pytest.raises(RuntimeError):
+        manager.get_or_build("key", fail)
+    assert manager.get_or_build("key", lambda: b"ok") == b"ok"
+
+
+def test_error_results_not_cached():
+    manager = cm.CacheManager(10 ** 6)
+    calls = []
+
+    @manager.memoize("frames", cacheable=cm.complete_result)
+    def load():
+        calls.append(1)
+        return pd.DataFrame(), pd.DataFrame()
+
+    load()
+    load()
+    assert len(calls) == 2
+
+
+def test_complete_result():
+    assert not cm.complete_result(None)
+    assert not cm.complete_result((pd.DataFrame(), pd.DataFrame()))
+    assert cm.complete_result(pd.DataFrame(columns=["part_no"]))
+    assert cm.complete_result((pd.DataFrame(), pd.DataFrame({"a": [1]})))
@@ -0,0 +1,55 @@
+import pandas as pd
+
+import utils.categorical as uc
+
+
+def _statuses(values, boundaries=10):
+    return uc.as_category(pd.Series(values, name="Status"), uc.threshold_statuses(boundaries))
+
+
+def test_threshold_statuses_labels():
+    assert uc.threshold_statuses(10) == ["Abnormal Above 10%", "Normal", "Abnormal Below -10%"]
+
+
+def test_as_category_infers_sorted_categories():
+    series = uc.as_category(pd.Series(["b", "a", None, "b"]))
+    assert list(series.cat.categories) == ["a", "b"]
+    assert series.isna().sum() == 1
+
+
+def test_categorize_columns_skips_missing_columns():
+    df = uc.categorize_out_house(pd.DataFrame({"Status": ["Normal"], "source": ["S1"]}), 5)
+    assert isinstance(df["Status"].dtype, pd.CategoricalDtype)
+    assert list(df["Status"].cat.categories) == uc.threshold_statuses(5)
+    assert list(df["source"].cat.categories) == ["S1"]
+
+
+def test_status_mask_matches_plain_comparison():
+    values = ["Normal", "Abnormal Above 10%", None, "Normal"]
+    mask = uc.status_mask(_statuses(values), "Normal")
+    assert mask.tolist() == (pd.Series(values) == "Normal").tolist()
+
+
+def test_status_mask_unknown_label_is_all_false():
+    mask = uc.status_mask(_statuses(["Normal", "Normal"]), "Abnormal Above 99%")
+    assert not mask.any()
+    assert len(mask) == 2
+
+
+def test_value_counts_keeps_unused_categories():
+    counts = uc.value_counts(_statuses(["Normal", "Normal", None]))
+    assert counts.to_dict() == {"Abnormal Above 10%": 0, "Normal": 2, "Abnormal Below -10%": 0}
+    assert counts.name == "count"
+
+
+def test_observed_counts_matches_object_value_counts():
+    values = ["Normal", "Abnormal Above 10%", "Normal", None]
+    counts = uc.observed_counts(_statuses(values))
+    expected = pd.Series(values, name="Status").value_counts()
+    assert counts.to_dict() == expected.to_dict()
+    assert counts.index.tolist() == expected.index.tolist()
+
+
+def test_observed_counts_plain_series_falls_back():
+    counts = uc.observed_counts(pd.Series(["x", "y", "x"]))
+    assert counts.to_dict() == {"x": 2, "y": 1}
@@ -0,0 +1,51 @@
+import decimal
+
+import repository.change_detection as cd
+
+
+def test_row_hash_canonicalizes_values():
+    assert cd.row_hash(1000, " reason ", None) == cd.row_hash(1000.4, "reason", float("nan"))
+    assert cd.row_hash(decimal.Decimal("1000"), "x") == cd.row_hash(1000, "x")
+    assert cd.row_hash(1000, "x") != cd.row_hash(1001, "x")
+
+
+def test_row_hash_is_md5_hex():
+    assert len(cd.row_hash("a")) == 32
+
+
+def test_unchanged():
+    hashes = {("P1", 2024): ["h1", "h1"], ("P2", 2024): ["h1", "h2"]}
+    assert cd.unchanged(hashes, "P1", "2024", "h1")
+    assert not cd.unchanged(hashes, "P2", 2024, "h1")
+    assert not cd.unchanged(hashes, "P3", 2024, "h1")
+
+
+class _Cursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = None
+
+    def execute(self, sql, params):
+        self.executed = (sql, params)
+
+    def fetchall(self):
+        return self.rows
+
+
+def test_stored_hashes_groups_by_part_and_year():
+    cursor = _Cursor([("P1", "2024", "h1"), ("P1", 2024, "h2"), ("P2", 2023, None)])
+    hashes = cd.stored_hashes(cursor, "packing", {"P1", "P2"})
+    assert hashes == {("P1", 2024): ["h1", "h2"], ("P2", 2023): [None]}
+    assert '"packing_detail"' in cursor.executed[0]
+    assert sorted(cursor.executed[1][0]) == ["P1", "P2"]
+
+
+def test_remember_replaces_the_pre_run_hashes():
+    hashes = {("P1", 2024): ["stored", "stored"]}
+    first, second = cd.row_hash(200, "changed"), cd.row_hash(100, "back")
+    assert not cd.unchanged(hashes, "P1", 2024, first)
+    cd.remember(hashes, "P1", "2024", first)
+    # A second row of the same upload going back to the stored values is still written
+    assert not cd.unchanged(hashes, "P1", 2024, "stored")
+    assert cd.unchanged(hashes, "P1", 2024, first)
+    assert not cd.unchanged(hashes, "P1", 2024, second)
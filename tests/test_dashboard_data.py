@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+import utils.dashboard_data as dd
+
+
+def _trend(rows):
+    return pd.DataFrame(rows, columns=["part_no", "part_name", "year_item", "cost", "previous_year", "gap_percent",
+                                       "cagr_percent"])
+
+
+def test_pivot_trend_one_row_per_part():
+    df = _trend([
+        ("P1", "Part 1", 2022, 100.0, None, None, 10.0),
+        ("P1", "Part 1", 2023, 110.0, 2022, 10.0, 10.0),
+        ("P1", "Part 1", 2024, 121.0, 2023, 10.0, 10.0),
+        ("P2", "Part 2", 2024, 50.0, None, None, None),
+    ])
+    result = dd.pivot_trend(df, ["2024", "2022", "2023"]).set_index("part_no")
+    assert list(result.columns) == ["part_name", "Cost 2022", "Cost 2023", "Gap 2022-2023 %", "Cost 2024",
+                                    "Gap 2023-2024 %", "CAGR %"]
+    assert result.loc["P1", "Cost 2024"] == 121.0
+    assert result.loc["P1", "Gap 2023-2024 %"] == 10.0
+    assert np.isnan(result.loc["P2", "Cost 2022"])
+    assert np.isnan(result.loc["P2", "Gap 2023-2024 %"])
+
+
+def test_pivot_trend_skips_gaps_across_missing_years():
+    # P1 has no 2023 row, so LAG compared 2024 with 2022; that gap is not a 2023-2024 gap
+    df = _trend([
+        ("P1", "Part 1", 2022, 100.0, None, None, 5.0),
+        ("P1", "Part 1", 2024, 110.0, 2022, 10.0, 5.0),
+    ])
+    result = dd.pivot_trend(df, [2022, 2023, 2024])
+    assert np.isnan(result.loc[0, "Gap 2023-2024 %"])
+    assert np.isnan(result.loc[0, "Cost 2023"])
+    assert result.loc[0, "CAGR %"] == 5.0
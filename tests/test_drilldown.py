@@ -0,0 +1,54 @@
+import pandas as pd
+
+import utils.drilldown as dr
+
+YEARS = ["2023", "2024"]
+
+
+def test_key_columns_per_section():
+    assert dr.key_columns("in_house") == ["gap_key", "part_no_key"]
+    assert dr.key_columns("out_house") == ["gap_key", "part_no_key", "source_key"]
+    assert dr.key_columns("packing") == ["gap_key", "part_no_key", "part_name_key", "destination_key"]
+
+
+def test_first_page_has_no_seek_and_fetches_one_extra_row():
+    sql = dr.page_query("packing", YEARS, 10, page_size=50)
+    assert "WHERE (" not in sql.split("AS filtered_rows")[-1]
+    assert "LIMIT 51" in sql
+    assert '"gap_key" DESC, "part_no_key" DESC, "part_name_key" DESC, "destination_key" DESC' in sql
+
+
+def test_key_columns_are_coalesced():
+    sql = dr.page_query("packing", YEARS, 10)
+    for column in ("part_no", "part_name", "destination"):
+        assert f'COALESCE(CAST("{column}" AS VARCHAR), \'\') AS "{column}_key"' in sql
+
+
+def test_seek_uses_row_value_comparison():
+    sql = dr.page_query("out_house", YEARS, 10, descending=False, after=(None, "P'1", "S1"))
+    assert ("(\"gap_key\", \"part_no_key\", \"source_key\") > "
+            "(CAST('-Infinity' AS DOUBLE PRECISION), 'P''1', 'S1')") in sql
+    assert '"gap_key" ASC' in sql
+
+
+def test_filters_are_applied():
+    sql = dr.count_query("packing", YEARS, 10, {"status": ["Normal"], "dimension": ["JP"], "gap_min": 5})
+    assert '"Status" IN (\'Normal\')' in sql
+    assert '"destination" IN (\'JP\')' in sql
+    assert '"Gap Total Cost" >= 5.0' in sql
+
+
+def test_page_key_of_last_row():
+    page = pd.DataFrame({
+        "Gap Total Cost": [12.5, float("nan")],
+        "part_no": ["A", "B"],
+        "part_name": ["Name", None],
+        "destination": ["JP", "US"],
+    })
+    assert dr.page_key(page.head(1), "packing") == (12.5, "A", "Name", "JP")
+    assert dr.page_key(page, "packing") == (None, "B", "", "US")
+
+
+def test_dimension_values_query():
+    assert dr.dimension_values_query("in_house", YEARS) is None
+    assert '"year_item" = 2024' in dr.dimension_values_query("packing", YEARS)
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+import utils.outlier as ol
+
+
+def _costs(gaps, prefix="AAAAA"):
+    return pd.DataFrame({
+        "part_no": [f"{prefix}-{index}" for index in range(len(gaps))],
+        "price_gap_percent": gaps,
+    })
+
+
+def test_iqr_bounds_and_statuses():
+    result = ol.iqr_outliers(_costs([1.0, 2.0, 3.0, 4.0, 100.0, -100.0, None]))
+    gaps = pd.Series([1.0, 2.0, 3.0, 4.0, 100.0, -100.0])
+    q1, q3 = gaps.quantile(0.25), gaps.quantile(0.75)
+    assert result["q1"].iloc[0] == q1
+    assert result["upper_bound"].iloc[0] == q3 + 1.5 * (q3 - q1)
+
+    statuses = dict(zip(result["price_gap_percent"].fillna(-1), result["price_status"]))
+    assert statuses[100.0] == "Abnormally High"
+    assert statuses[-100.0] == "Abnormally Low"
+    assert statuses[2.0] == "Normal"
+    assert statuses[-1] == "No Comparison Available"
+
+
+def test_deviation_from_normal_range():
+    result = ol.iqr_outliers(_costs([1.0, 2.0, 3.0, 4.0, 100.0]))
+    high = result[result["price_status"] == "Abnormally High"].iloc[0]
+    assert high["deviation_from_normal_range"] == high["price_gap_percent"] - high["upper_bound"]
+    assert (result.loc[result["price_status"] == "Normal", "deviation_from_normal_range"] == 0.0).all()
+
+
+def test_single_record_groups_get_no_statistics():
+    df = pd.concat([_costs([1.0, 2.0, 3.0]), _costs([50.0], prefix="BBBBB")], ignore_index=True)
+    result = ol.iqr_outliers(df)
+    single = result[result["part_num"] == "BBBBB"].iloc[0]
+    assert np.isnan(single["q1"])
+    assert single["price_status"] == "Normal"
+
+
+def test_missing_label_none_and_no_deviation():
+    result = ol.iqr_outliers(_costs([1.0, None, 2.0]), missing_label=None, deviation=False)
+    assert "deviation_from_normal_range" not in result.columns
+    assert set(result["price_status"]) == {"Normal"}
+
+
+def test_does_not_modify_input():
+    df = _costs([1.0, 2.0, 3.0])
+    before = df.copy()
+    ol.iqr_outliers(df)
+    pd.testing.assert_frame_equal(df, before)
@@ -0,0 +1,183 @@
+"""
+Optional DuckDB analytics backend over a Parquet snapshot of the Postgres tables.
+
+Enable with MSP_ANALYTICS_BACKEND=duckdb (requires `pip install duckdb`). The part, detail
+and explanation tables are copied to Parquet under MSP_ANALYTICS_DIR (default: analytics/)
+through DuckDB's postgres extension. A snapshot refresh only re-exports the tables whose
+change counter in table_changes (see utils/artifacts.py) moved since the last one, so running
+it after every import copies just the tables that import touched.
+
+DuckDBConnection exposes query(sql) -> DataFrame over views named like the Postgres tables,
+so the unchanged utils/sql_*.py builders, run_queries and utils/dashboard_data.py produce the
+same frames from local, vectorized scans.
+"""
+import json
+import logging
+import os
+import threading
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+import repository.psql.conn as rc
+import utils.artifacts as ua
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_DIR = os.environ.get(
+    "MSP_ANALYTICS_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "analytics")
+)
+
+TABLES = [f"{section}{suffix}" for section in ua.SECTIONS for suffix in ("", "_detail", "_explanations")]
+
+_refresh_lock = threading.Lock()
+
+
+def enabled():
+    return os.environ.get("MSP_ANALYTICS_BACKEND", "postgres").lower() == "duckdb"
+
+
+def _require_duckdb():
+    if duckdb is None:
+        raise ImportError("The DuckDB analytics backend requires the duckdb package (pip install duckdb)")
+
+
+def _read_manifest(root):
+    try:
+        with open(os.path.join(root, "snapshot.json"), "r", encoding="utf-8") as manifest_file:
+            return json.load(manifest_file)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _conninfo_value(value):
+    # libpq connection string quoting, so spaces, quotes and backslashes survive
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def _postgres_dsn(db_credentials):
+    return " ".join(
+        f"{keyword}={_conninfo_value(db_credentials[key])}"
+        for keyword, key in [("host", "host"), ("port", "port"), ("dbname", "db_name"), ("user", "user"),
+                             ("password", "password")]
+    )
+
+
+def refresh_snapshot(db_credentials, root=None, force=False):
+    """
+    Bring the Parquet snapshot up to date with Postgres.
+
+    Args:
+        db_credentials: "database" section of the database config YAML
+        root: Snapshot directory (default: ANALYTICS_DIR)
+        force: Re-export every table regardless of its change counter
+
+    Returns:
+        List of the tables that were exported
+    """
+    _require_duckdb()
+    root = root or ANALYTICS_DIR
+    os.makedirs(root, exist_ok=True)
+
+    with _refresh_lock:
+        with rc.DatabaseConnection(db_credentials) as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(ua.DATA_VERSION_SQL)
+                changes = {table: int(count) for table, count in cursor.fetchall()}
+
+        manifest = _read_manifest(root)
+        stale = [
+            table for table in TABLES
+            if force or manifest.get(table) != changes.get(table, 0)
+            or not os.path.exists(os.path.join(root, f"{table}.parquet"))
+        ]
+        if not stale:
+            return []
+
+        duck = duckdb.connect()
+        try:
+            duck.execute("INSTALL postgres")
+            duck.execute("LOAD postgres")
+            dsn = _postgres_dsn(db_credentials).replace("'", "''")
+            duck.execute(f"ATTACH '{dsn}' AS pg (TYPE postgres, READ_ONLY)")
+            for table in stale:
+                path = os.path.join(root, f"{table}.parquet")
+                # Written next to the live file and swapped in, so readers never see a partial file
+                duck.execute(
+                    f"COPY (SELECT * FROM pg.public.\"{table}\") TO '{path}.tmp' (FORMAT parquet, COMPRESSION zstd)"
+                )
+                os.replace(f"{path}.tmp", path)
+                manifest[table] = changes.get(table, 0)
+        finally:
+            duck.close()
+
+        with open(os.path.join(root, "snapshot.json"), "w", encoding="utf-8") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+
+    logger.info("Analytics snapshot refreshed: %s", ", ".join(stale))
+    return stale
+
+
+class DuckDBConnection:
+    """
+    In-process DuckDB database with one view per snapshotted table.
+
+    query() has the same shape as st.connection(...).query, so it can be passed wherever the
+    dashboard passes its Postgres connection. Each call uses its own cursor, which makes it
+    safe to use from the run_queries thread pool.
+    """
+
+    def __init__(self, root=None, threads=None):
+        _require_duckdb()
+        self.root = root or ANALYTICS_DIR
+        self._db = duckdb.connect(config={"threads": threads} if threads else {})
+        for table in TABLES:
+            path = os.path.join(self.root, f"{table}.parquet")
+            # Views re-read the file on every query, so a refreshed snapshot is picked up without reconnecting
+            self._db.execute(f"CREATE OR REPLACE VIEW \"{table}\" AS SELECT * FROM read_parquet('{path}')")
+
+    def query(self, sql, ttl=None, params=None, **kwargs):
+        """Run sql and return a DataFrame; ttl and other st.connection options are accepted and ignored."""
+        cursor = self._db.cursor()
+        try:
+            df = cursor.execute(sql, params).df() if params else cursor.execute(sql).df()
+        finally:
+            cursor.close()
+        # Postgres INT columns arrive as int64 through SQLAlchemy; DuckDB keeps them int32
+        int32_columns = df.select_dtypes(include="int32").columns
+        if len(int32_columns):
+            df[int32_columns] = df[int32_columns].astype("int64")
+        return df
+
+    def close(self):
+        self._db.close()
+
+
+def _canonical(df):
+    # Row order is only defined where a builder has ORDER BY, so compare in a fixed order
+    order = df.astype(str).sort_values(list(df.columns), kind="stable").index
+    return df.loc[order].reset_index(drop=True)
+
+
+def compare_frames(expected, actual):
+    """
+    Compare the section frames of two backends (see utils.dashboard_data.load_dashboard_frames).
+
+    Returns:
+        List of "<section>[<index>]: <difference>" strings, empty when the frames match
+    """
+    import pandas.testing as pdt
+
+    differences = []
+    for section, expected_frames in expected.items():
+        for index, (left, right) in enumerate(zip(expected_frames, actual[section])):
+            try:
+                pdt.assert_frame_equal(
+                    _canonical(left), _canonical(right),
+                    check_dtype=False, check_categorical=False, check_exact=False, rtol=1e-9,
+                )
+            except AssertionError as e:
+                differences.append(f"{section}[{index}]: {e}")
+    return differences
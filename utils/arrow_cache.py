@@ -0,0 +1,165 @@
+"""
+Process-wide result cache holding the section frames as immutable Arrow tables.
+
+Enable with MSP_RESULT_CACHE=arrow (requires `pip install pyarrow`). st.cache_data pickles
+every returned frame on store and unpickles a private copy on every hit, so each rerun of
+each session pays for deserializing the full frames and holds its own copy. This cache
+converts a result to Arrow once and keeps the tables shared by every session; a hit only
+wraps them in new DataFrames with Table.to_pandas(split_blocks=True), which reuses the Arrow
+buffers for numeric columns without nulls (they come back as read-only numpy views) and only
+materializes the object/string and nullable columns.
+
+With MSP_ARROW_CACHE_DIR set, the tables are written once as Arrow IPC files and read back
+through a memory map, so the cached data lives in the OS page cache instead of the Python
+heap.
+
+The tables are held by a CacheManager (the shared one by default) under the "arrow"
+namespace, so they count against the MSP_CACHE_BUDGET_MB budget, are evicted by its policy
+and expire after their TTL; the IPC files are deleted when their entry leaves the cache.
+"""
+import functools
+import logging
+import os
+import time
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+import utils.cache_manager as cm
+import utils.tracing as tr
+
+logger = logging.getLogger("msp.cache")
+
+DEFAULT_TTL = 15 * 60
+NAMESPACE = "arrow"
+
+
+def enabled():
+    return os.environ.get("MSP_RESULT_CACHE", "pickle").lower() == "arrow"
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("The Arrow result cache requires the pyarrow package (pip install pyarrow)")
+
+
+class ArrowResultCache:
+    """
+    Frames (or tuples of frames) stored once as Arrow tables, shared by all sessions.
+
+    Args:
+        directory: Where to keep memory-mapped IPC files; None keeps the tables in memory
+        manager: CacheManager holding the tables; defaults to the process-wide cm.shared()
+    """
+
+    def __init__(self, directory=None, manager=None):
+        _require_pyarrow()
+        self.directory = directory
+        self.manager = manager if manager is not None else cm.shared()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key, position):
+        return os.path.join(self.directory, f"{key}_{position}.arrow")
+
+    def _store_table(self, key, position, table):
+        if not self.directory:
+            return table
+        path = self._path(key, position)
+        with pa.OSFile(f"{path}.tmp", "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(f"{path}.tmp", path)
+        # The returned table references the mapped file, not a heap copy
+        return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+    def _remove_files(self, key, count):
+        if not self.directory:
+            return
+        for position in range(count):
+            try:
+                os.remove(self._path(key, position))
+            except OSError:
+                pass
+
+    @tr.traced("pandas")
+    def put(self, key, result, ttl=None, cost=0.0):
+        """
+        Convert a DataFrame or a tuple of DataFrames to Arrow tables and store them.
+
+        Args:
+            key: Cache key
+            result: DataFrame or tuple of DataFrames
+            ttl: Lifetime in seconds or as "15m"; None keeps it until evicted
+            cost: Seconds it took to build the result (used by the "cost" eviction policy)
+
+        Returns:
+            False when the result is not a frame/tuple of frames, a column does not convert or
+            the tables alone exceed the cache budget, in which case nothing is cached
+        """
+        frames = result if isinstance(result, tuple) else (result,)
+        if not all(isinstance(frame, pd.DataFrame) for frame in frames):
+            return False
+        try:
+            tables = [
+                self._store_table(key, position, pa.Table.from_pandas(frame, preserve_index=True))
+                for position, frame in enumerate(frames)
+            ]
+        except (pa.ArrowException, ValueError, TypeError) as e:
+            logger.warning("Result %s not cached as Arrow: %s", key, e)
+            self._remove_files(key, len(frames))
+            return False
+        release = functools.partial(self._remove_files, key, len(tables))
+        stored = self.manager.put(key, (isinstance(result, tuple), tables), NAMESPACE, cost=cost,
+                                  ttl=ttl, release=release)
+        if not stored:
+            release()
+        return stored
+
+    @tr.traced("pandas")
+    def get(self, key):
+        """Fresh DataFrames over the stored tables, or None if missing, expired or evicted."""
+        hit, entry = self.manager.get(key, NAMESPACE)
+        if not hit:
+            return None
+        is_tuple, tables = entry
+        frames = tuple(table.to_pandas(split_blocks=True) for table in tables)
+        return frames if is_tuple else frames[0]
+
+    def clear(self):
+        self.manager.clear(NAMESPACE)
+
+    def cached(self, ttl=DEFAULT_TTL, cacheable=None):
+        """
+        Decorator caching a frame loader in this cache, like st.cache_data(ttl=...).
+
+        Concurrent misses of the same arguments share one call. Results that cannot be stored
+        as Arrow (see put) or for which cacheable(result) is false are returned uncached.
+        """
+
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                key = cm.cache_key(func.__qualname__, args, kwargs)
+
+                def build_and_store():
+                    start = time.perf_counter()
+                    built = func(*args, **kwargs)
+                    if cacheable is not None and not cacheable(built):
+                        return built
+                    if self.put(key, built, ttl, cost=time.perf_counter() - start):
+                        # Hand out the same read-only views as a hit would
+                        return self.get(key)
+                    return built
+
+                result = self.get(key)
+                return result if result is not None else self.manager.single_flight(key, build_and_store)
+
+            wrapper.clear = self.clear
+            return wrapper
+
+        return decorator
@@ -0,0 +1,142 @@
+"""
+Local artifact store for precomputed dashboard outputs.
+
+The nightly precompute job (python cli.py precompute) writes, per section and year pair /
+threshold, the dashboard frames and Excel exports, and per year pair / threshold set the PDF
+reports:
+
+    <root>/<section>/<previous>_<current>_<threshold>/frames.pkl, *.xlsx, manifest.json
+    <root>/reports/<previous>_<current>_<in>_<out>_<packing>/<report_type>.pdf, manifest.json
+
+Every manifest records the data version of the sections it was built from. The version is
+the change counter of the section tables in "table_changes", which every writing statement
+bumps in its own transaction (database/migrations/004_table_changes.sql), so any committed
+import, update or approval since the precompute invalidates the artifact and the dashboard
+falls back to querying.
+"""
+import json
+import os
+import pickle
+from datetime import datetime
+
+ARTIFACT_DIR = os.environ.get(
+    "MSP_ARTIFACT_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "artifacts")
+)
+
+SECTIONS = ["in_house", "out_house", "packing"]
+
+DATA_VERSION_SQL = """
+    SELECT "table_name", "changes"
+    FROM "table_changes"
+    WHERE "table_name" IN ({tables})
+""".format(tables=", ".join(f"'{section}{suffix}'" for section in SECTIONS
+                            for suffix in ("", "_detail", "_explanations")))
+
+
+def table_changes(df):
+    """Per-table change counter from the result of DATA_VERSION_SQL."""
+    return {table: int(changes) for table, changes in zip(df["table_name"], df["changes"])}
+
+
+def data_versions(df):
+    """
+    Per-section data version from the result of DATA_VERSION_SQL.
+
+    Returns:
+        Dict of section name to version string
+    """
+    changes = table_changes(df)
+    return {
+        section: "-".join(str(changes.get(f"{section}{suffix}", 0)) for suffix in ("", "_detail", "_explanations"))
+        for section in SECTIONS
+    }
+
+
+def _key(*parts):
+    return "_".join(str(part) for part in parts)
+
+
+def section_dir(section, years, threshold, root=None):
+    return os.path.join(root or ARTIFACT_DIR, section, _key(*years, threshold))
+
+
+def report_dir(years, boundaries, root=None):
+    return os.path.join(root or ARTIFACT_DIR, "reports", _key(*years, *boundaries))
+
+
+def _write_manifest(directory, versions, files):
+    with open(os.path.join(directory, "manifest.json"), "w", encoding="utf-8") as manifest_file:
+        json.dump({"created_at": datetime.now().isoformat(timespec="seconds"), "versions": versions,
+                   "files": sorted(files)}, manifest_file, indent=2)
+
+
+def _read_manifest(directory, versions):
+    """Return the manifest of directory if it was built from the given data versions, else None."""
+    try:
+        with open(os.path.join(directory, "manifest.json"), "r", encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+    except (FileNotFoundError, ValueError):
+        return None
+    if any(manifest["versions"].get(section) != version for section, version in versions.items()):
+        return None
+    return manifest
+
+
+def write_section(section, years, threshold, frames, files, version, root=None):
+    """
+    Store the frames tuple and Excel exports of one section.
+
+    Args:
+        frames: Tuple as returned by the get_*_data loaders
+        files: Dict of file name to bytes
+        version: Data version of the section at the time the frames were queried
+    """
+    directory = section_dir(section, years, threshold, root)
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "frames.pkl"), "wb") as frames_file:
+        pickle.dump(frames, frames_file, protocol=pickle.HIGHEST_PROTOCOL)
+    for name, data in files.items():
+        with open(os.path.join(directory, name), "wb") as output_file:
+            output_file.write(data)
+    _write_manifest(directory, {section: version}, files)
+
+
+def read_frames(section, years, threshold, version, root=None):
+    """Precomputed frames tuple of a section, or None if missing or out of date."""
+    directory = section_dir(section, years, threshold, root)
+    if _read_manifest(directory, {section: version}) is None:
+        return None
+    with open(os.path.join(directory, "frames.pkl"), "rb") as frames_file:
+        return pickle.load(frames_file)
+
+
+def read_file(section, years, threshold, name, version, root=None):
+    """Precomputed Excel export of a section as bytes, or None if missing or out of date."""
+    directory = section_dir(section, years, threshold, root)
+    manifest = _read_manifest(directory, {section: version})
+    if manifest is None or name not in manifest["files"]:
+        return None
+    with open(os.path.join(directory, name), "rb") as input_file:
+        return input_file.read()
+
+
+def write_report(years, boundaries, report_type, pdf_bytes, versions, root=None):
+    directory = report_dir(years, boundaries, root)
+    os.makedirs(directory, exist_ok=True)
+    name = f"{report_type}.pdf"
+    with open(os.path.join(directory, name), "wb") as pdf_file:
+        pdf_file.write(pdf_bytes)
+    manifest = _read_manifest(directory, versions)
+    files = set(manifest["files"]) if manifest else set()
+    _write_manifest(directory, versions, files | {name})
+
+
+def read_report(years, boundaries, report_type, versions, root=None):
+    """Precomputed PDF report as bytes, or None if missing or any section changed since."""
+    directory = report_dir(years, boundaries, root)
+    manifest = _read_manifest(directory, versions)
+    name = f"{report_type}.pdf"
+    if manifest is None or name not in manifest["files"]:
+        return None
+    with open(os.path.join(directory, name), "rb") as pdf_file:
+        return pdf_file.read()
@@ -0,0 +1,169 @@
+"""
+Optional asyncio query layer for the dashboard section reads.
+
+Enable with MSP_QUERY_BACKEND=asyncpg (requires `pip install asyncpg`). The dashboard then
+reads through an asyncpg pool owned by one background event loop per process instead of the
+st.connection SQLAlchemy pool, so the queries of every section load in every session share a
+single thread and a bounded set of connections. A section's queries are fanned out with
+asyncio.gather; each has its own timeout (MSP_QUERY_TIMEOUT seconds, default 60), and when one
+fails or times out the others are cancelled, which also cancels them on the server.
+
+AsyncQueryPool.query(sql) -> DataFrame has the same shape as st.connection(...).query, and
+utils.query_runner.run_queries hands whole query sets to AsyncQueryPool.run_queries, so the
+get_*_data loaders and the utils/sql_*.py builders are unchanged.
+"""
+import asyncio
+import contextvars
+import os
+import threading
+import time
+
+import pandas as pd
+
+try:
+    import asyncpg
+except ImportError:
+    asyncpg = None
+
+import utils.instrumentation as qi
+import utils.tracing as tr
+
+DEFAULT_TIMEOUT = float(os.environ.get("MSP_QUERY_TIMEOUT", "60"))
+DEFAULT_POOL_SIZE = int(os.environ.get("MSP_ASYNC_POOL_SIZE", "10"))
+
+
+def enabled():
+    return os.environ.get("MSP_QUERY_BACKEND", "sqlalchemy").lower() == "asyncpg"
+
+
+def _require_asyncpg():
+    if asyncpg is None:
+        raise ImportError("The async query backend requires the asyncpg package (pip install asyncpg)")
+
+
+class QueryTimeout(TimeoutError):
+    pass
+
+
+class AsyncQueryPool:
+    """
+    asyncpg connection pool driven by a private event loop thread.
+
+    Coroutines (fetch_frame, gather_frames) run on that loop; the blocking query and
+    run_queries wrappers can be called from any thread, including the Streamlit script thread
+    and the section prefetch threads.
+
+    Args:
+        db_credentials: "database" section of the database config YAML
+        min_size: Connections opened up front
+        max_size: Upper bound of concurrent queries over all sessions
+        timeout: Default per-query timeout in seconds
+    """
+
+    def __init__(self, db_credentials, min_size=1, max_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT):
+        _require_asyncpg()
+        self.timeout = timeout
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="async-queries", daemon=True)
+        self._thread.start()
+        self._pool = self._submit(asyncpg.create_pool(
+            host=db_credentials["host"],
+            port=db_credentials.get("port", 5432),
+            user=db_credentials["user"],
+            password=db_credentials["password"] or None,
+            database=db_credentials.get("database") or db_credentials.get("db_name"),
+            min_size=min_size,
+            max_size=max_size,
+        ))
+
+    def _submit(self, coroutine):
+        """Run a coroutine on the pool's loop and block until it is done; cancel it if the wait is interrupted."""
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        try:
+            return future.result()
+        except BaseException:
+            future.cancel()
+            raise
+
+    async def fetch_frame(self, sql, timeout=None):
+        """
+        Run one query on a pooled connection.
+
+        Raises:
+            QueryTimeout: The query ran longer than timeout (default: the pool timeout)
+        """
+        timeout = timeout or self.timeout
+        try:
+            async with self._pool.acquire() as connection:
+                # asyncpg cancels the statement on the server when the wait times out
+                statement = await connection.prepare(sql, timeout=timeout)
+                records = await statement.fetch(timeout=timeout)
+        except asyncio.TimeoutError:
+            raise QueryTimeout(f"Query exceeded {timeout:g} s") from None
+        columns = [attribute.name for attribute in statement.get_attributes()]
+        # coerce_float turns NUMERIC Decimals into floats, as pandas.read_sql does for st.connection
+        return pd.DataFrame.from_records([tuple(record) for record in records], columns=columns, coerce_float=True)
+
+    async def _timed_frame(self, name, sql, context, timeout):
+        with tr.span(name, "query"):
+            start = time.perf_counter()
+            df = await self.fetch_frame(sql, timeout)
+            seconds = time.perf_counter() - start
+
+        plan = None
+        if qi.explain_enabled():
+            try:
+                explained = await self.fetch_frame("EXPLAIN (ANALYZE, BUFFERS) " + sql.strip().rstrip(";"), timeout)
+                plan = "\n".join(explained.iloc[:, 0].astype(str))
+            except Exception as e:
+                plan = f"EXPLAIN failed: {e}"
+
+        qi.record(name, seconds, rows=len(df), size_bytes=int(df.memory_usage(deep=True).sum()), plan=plan,
+                  context=context)
+        return df
+
+    async def gather_frames(self, queries, prefix=None, context=None, timeout=None, trace_context=None):
+        """
+        Run named queries concurrently; cancel the rest as soon as one fails.
+
+        Args:
+            queries: Mapping of result name to SQL string
+            prefix: Optional section name used in the recorded query names
+            context: Optional extra fields for the query log
+            timeout: Per-query timeout in seconds (default: the pool timeout)
+            trace_context: contextvars.Context of the caller, so query spans join its trace
+
+        Returns:
+            Dict of result name to DataFrame, in the same order as queries
+        """
+        trace_context = trace_context or contextvars.copy_context()
+        tasks = {}
+        for name, sql in queries.items():
+            query_name = f"{prefix}.{name}" if prefix else name
+            # Tasks copy the context they are created in, here the caller's
+            tasks[name] = trace_context.run(
+                asyncio.ensure_future, self._timed_frame(query_name, sql, context, timeout)
+            )
+        try:
+            frames = await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        return dict(zip(tasks, frames))
+
+    def query(self, sql, ttl=None, timeout=None, **kwargs):
+        """Run sql and return a DataFrame; ttl and other st.connection options are accepted and ignored."""
+        return self._submit(self.fetch_frame(sql, timeout))
+
+    def run_queries(self, queries, prefix=None, context=None, timeout=None):
+        """Blocking gather_frames for synchronous callers (see utils.query_runner.run_queries)."""
+        return self._submit(
+            self.gather_frames(queries, prefix, context, timeout, trace_context=contextvars.copy_context())
+        )
+
+    def close(self):
+        self._submit(self._pool.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
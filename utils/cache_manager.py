@@ -0,0 +1,357 @@
+"""
+Memory-bounded cache for the dashboard frames, figures and export blobs.
+
+st.cache_data keeps one entry per distinct argument set until its TTL runs out, so the
+server's memory grows with every (years, threshold) combination anyone types. CacheManager
+measures the real size of every stored value (deep DataFrame memory, blob lengths, figure
+JSON), keeps the total under a byte budget and evicts either the least recently used entry
+or, with the "cost" policy, the entry that is cheapest to recompute per byte (GreedyDual-Size:
+a slow query result survives longer than a quick but large one).
+
+Configuration:
+    MSP_CACHE_BUDGET_MB   total budget (default 512)
+    MSP_CACHE_POLICY      "lru" (default) or "cost"
+"""
+import functools
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+import utils.tracing as tr
+
+DEFAULT_BUDGET_MB = 512
+POLICIES = ["lru", "cost"]
+
+
+def _seconds(ttl):
+    """TTL in seconds from a number or a st.cache_data-style string ("30s", "15m", "1h")."""
+    if ttl is None:
+        return None
+    if isinstance(ttl, (int, float)):
+        return float(ttl)
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    return float(ttl[:-1]) * units[ttl[-1]] if ttl[-1] in units else float(ttl)
+
+
+def size_of(value):
+    """
+    Bytes held by a cached value.
+
+    DataFrames and Series count their deep memory (object columns included), bytes/BytesIO
+    their length, Plotly figures their JSON spec and containers the sum of their items.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, io.BytesIO):
+        return value.getbuffer().nbytes
+    if isinstance(value, str):
+        return len(value.encode())
+    if hasattr(value, "to_plotly_json"):
+        return len(value.to_json())
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    if isinstance(value, (tuple, list, set)):
+        return sys.getsizeof(value) + sum(size_of(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(size_of(key) + size_of(item) for key, item in value.items())
+    if hasattr(value, "__dict__"):
+        return sys.getsizeof(value) + size_of(vars(value))
+    return sys.getsizeof(value)
+
+
+def cache_key(namespace, args, kwargs):
+    payload = json.dumps([namespace, args, kwargs], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class _Entry:
+    __slots__ = ("namespace", "value", "size", "cost", "expires_at", "hits", "priority", "release")
+
+    def __init__(self, namespace, value, size, cost, expires_at, release=None):
+        self.namespace = namespace
+        self.value = value
+        self.size = size
+        self.cost = cost
+        self.expires_at = expires_at
+        self.hits = 0
+        self.priority = 0.0
+        self.release = release
+
+
+class CacheManager:
+    """
+    Thread-safe key/value cache bounded by the byte size of its values.
+
+    Args:
+        budget_bytes: Maximum total size of the cached values
+        policy: "lru" (least recently used first) or "cost" (GreedyDual-Size on build seconds / bytes)
+    """
+
+    def __init__(self, budget_bytes, policy="lru"):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown cache policy {policy!r}, expected one of {POLICIES}")
+        self.budget_bytes = int(budget_bytes)
+        self.policy = policy
+        self._entries = OrderedDict()
+        self._bytes = 0
+        # GreedyDual-Size inflation value: the priority of the last evicted entry
+        self._inflation = 0.0
+        self._stats = {}
+        # Builds in progress per key, so concurrent misses wait for one build (single-flight)
+        self._building = {}
+        self._lock = threading.Lock()
+
+    def _count(self, namespace, event, amount=1):
+        stats = self._stats.setdefault(namespace, {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0,
+                                                   "rejected": 0})
+        stats[event] += amount
+
+    def _priority(self, entry):
+        return self._inflation + entry.cost / max(entry.size, 1)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        if entry.release is not None:
+            entry.release()
+        return entry
+
+    def _purge_expired(self):
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if entry.expires_at is not None and now > entry.expires_at]
+        for key in expired:
+            self._count(self._remove(key).namespace, "expirations")
+
+    def get(self, key, namespace="default"):
+        """
+        Cached value of key.
+
+        Returns:
+            (True, value) on a hit, (False, None) on a miss or an expired entry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at is not None and time.monotonic() > entry.expires_at:
+                self._remove(key)
+                self._count(entry.namespace, "expirations")
+                entry = None
+            if entry is None:
+                self._count(namespace, "misses")
+                return False, None
+            self._entries.move_to_end(key)
+            entry.hits += 1
+            entry.priority = self._priority(entry)
+            self._count(entry.namespace, "hits")
+            return True, entry.value
+
+    def put(self, key, value, namespace="default", cost=0.0, ttl=None, release=None):
+        """
+        Store value, evicting other entries until the budget holds.
+
+        Expired entries are dropped first, so entries that are never read again do not hold
+        on to their bytes until the budget forces them out.
+
+        Args:
+            key: Cache key
+            value: Value to store; its size is measured once here
+            namespace: Group the entry is reported under, e.g. "frames" or "excel"
+            cost: Seconds it took to build the value (used by the "cost" policy)
+            ttl: Lifetime in seconds or as "15m"; None keeps it until evicted
+            release: Optional callable run when the entry leaves the cache (evicted, expired,
+                replaced or cleared), e.g. to delete files backing the value
+
+        Returns:
+            False when the value alone exceeds the budget and was not stored
+        """
+        size = size_of(value)
+        seconds = _seconds(ttl)
+        with self._lock:
+            self._purge_expired()
+            if key in self._entries:
+                self._remove(key)
+            if size > self.budget_bytes:
+                self._count(namespace, "rejected")
+                return False
+            while self._entries and self._bytes + size > self.budget_bytes:
+                self._evict_one()
+            entry = _Entry(namespace, value, size, cost, time.monotonic() + seconds if seconds else None, release)
+            entry.priority = self._priority(entry)
+            self._entries[key] = entry
+            self._bytes += size
+            return True
+
+    def _evict_one(self):
+        if self.policy == "lru":
+            key = next(iter(self._entries))
+        else:
+            key = min(self._entries, key=lambda candidate: self._entries[candidate].priority)
+            self._inflation = self._entries[key].priority
+        entry = self._remove(key)
+        self._count(entry.namespace, "evictions")
+
+    def clear(self, namespace=None):
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if namespace in (None, entry.namespace)]:
+                self._remove(key)
+
+    def memoize(self, namespace, ttl=None, cacheable=None):
+        """
+        Decorator caching a function on its (JSON-serializable) arguments, like st.cache_data.
+
+        Hits return the stored object itself, not a copy; DataFrames are handed out as
+        shallow copies so adding a column in one session does not change the cached frame.
+        Results for which cacheable(result) is false are returned but not stored.
+        """
+
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                key = cache_key(f"{namespace}.{func.__qualname__}", args, kwargs)
+                return _shallow(self.get_or_build(key, lambda: func(*args, **kwargs), namespace, ttl, cacheable))
+
+            wrapper.clear = functools.partial(self.clear, namespace)
+            return wrapper
+
+        return decorator
+
+    def single_flight(self, key, build):
+        """
+        Run build() once for concurrent callers of the same key; the others wait for its result.
+
+        A build failure is raised in every waiting caller, and the next call builds again.
+        """
+        with self._lock:
+            future = self._building.get(key)
+            owner = future is None
+            if owner:
+                future = self._building[key] = Future()
+        if not owner:
+            return future.result()
+        try:
+            value = build()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._building[key]
+        future.set_result(value)
+        return value
+
+    def get_or_build(self, key, build, namespace="default", ttl=None, cacheable=None):
+        """
+        Cached value of key, built with build() and stored on a miss.
+
+        Concurrent misses of the same key share one build. A value for which cacheable(value)
+        is false (e.g. the empty frames a loader returns after a failed query) is returned to
+        the callers of this build but not stored.
+        """
+        hit, value = self.get(key, namespace)
+        if hit:
+            return value
+
+        def build_and_store():
+            with tr.span(f"build.{namespace}", "cache"):
+                start = time.perf_counter()
+                built = build()
+            if cacheable is None or cacheable(built):
+                self.put(key, built, namespace, cost=time.perf_counter() - start, ttl=ttl)
+            return built
+
+        return self.single_flight(key, build_and_store)
+
+    def stats(self):
+        """
+        Per-namespace counters and current usage.
+
+        Returns:
+            DataFrame with namespace, entries, bytes, hits, misses, hit_rate, evictions,
+            expirations and rejected columns
+        """
+        with self._lock:
+            usage = {}
+            for entry in self._entries.values():
+                entries, size = usage.get(entry.namespace, (0, 0))
+                usage[entry.namespace] = (entries + 1, size + entry.size)
+            rows = []
+            for namespace in sorted(set(self._stats) | set(usage)):
+                counters = self._stats.get(namespace, {})
+                hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+                rows.append({
+                    "namespace": namespace,
+                    "entries": usage.get(namespace, (0, 0))[0],
+                    "bytes": usage.get(namespace, (0, 0))[1],
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": hits / (hits + misses) if hits + misses else None,
+                    "evictions": counters.get("evictions", 0),
+                    "expirations": counters.get("expirations", 0),
+                    "rejected": counters.get("rejected", 0),
+                })
+        return pd.DataFrame(rows, columns=["namespace", "entries", "bytes", "hits", "misses", "hit_rate",
+                                           "evictions", "expirations", "rejected"])
+
+    def largest(self, limit=20):
+        """The biggest entries as (namespace, bytes, build seconds, hits) rows."""
+        with self._lock:
+            rows = [
+                {"namespace": entry.namespace, "bytes": entry.size, "cost_seconds": entry.cost, "hits": entry.hits}
+                for entry in self._entries.values()
+            ]
+        return pd.DataFrame(rows, columns=["namespace", "bytes", "cost_seconds", "hits"]).nlargest(limit, "bytes")
+
+    @property
+    def used_bytes(self):
+        return self._bytes
+
+
+def complete_result(value):
+    """
+    False for the results the section loaders return when a query failed: None or only
+    column-less DataFrames. An empty query result still has its columns and is cached.
+    """
+    if value is None:
+        return False
+    frames = value if isinstance(value, tuple) else (value,)
+    return not all(isinstance(frame, pd.DataFrame) and len(frame.columns) == 0 for frame in frames)
+
+
+def _shallow(value):
+    if isinstance(value, pd.DataFrame):
+        return value.copy(deep=False)
+    if isinstance(value, tuple):
+        return tuple(_shallow(item) for item in value)
+    return value
+
+
+def from_environment():
+    """CacheManager configured from MSP_CACHE_BUDGET_MB and MSP_CACHE_POLICY."""
+    budget_mb = float(os.environ.get("MSP_CACHE_BUDGET_MB", DEFAULT_BUDGET_MB))
+    return CacheManager(int(budget_mb * 1024 * 1024), os.environ.get("MSP_CACHE_POLICY", "lru").lower())
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared():
+    """The process-wide CacheManager (from_environment), shared by app.py and utils/visualize.py."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = from_environment()
+        return _shared
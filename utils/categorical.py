@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+
+import utils.tracing as tr
+
+ITEM_STATUSES = ["Deleted", "Remain", "New"]
+EXPLANATION_STATUSES = ["Approved", "Disapproved", "Awaiting"]
+ABNORMAL_FLAGS = ["Abnormal", "Normal"]
+IN_HOUSE_STATUS_COLUMNS = [
+    "LVA Status",
+    "Non LVA Status",
+    "Tooling Status",
+    "Process Cost Status",
+    "Total Cost Status",
+]
+
+
+def threshold_statuses(boundaries):
+    """Return the fixed category set produced by the gap CASE expressions for a boundary."""
+    return [f"Abnormal Above {boundaries}%", "Normal", f"Abnormal Below -{boundaries}%"]
+
+
+def as_category(series, categories=None):
+    """
+    Convert a string column to a pandas Categorical.
+
+    Args:
+        series: Series of Python strings as returned by conn.query
+        categories: Fixed category list; inferred from the data (sorted) when omitted
+
+    Returns:
+        Categorical Series
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype) and categories is None:
+        return series
+    if categories is None:
+        categories = sorted(series.dropna().unique())
+    return series.astype(pd.CategoricalDtype(categories=categories))
+
+
+def categorize_columns(df, columns):
+    """
+    Convert the given columns of a DataFrame to categoricals in place.
+
+    Args:
+        df: DataFrame returned by conn.query
+        columns: Mapping of column name to a fixed category list (or None to infer)
+
+    Returns:
+        The same DataFrame
+    """
+    for column, categories in columns.items():
+        if column in df.columns:
+            df[column] = as_category(df[column], categories)
+    return df
+
+
+@tr.traced("pandas")
+def categorize_status_items(df):
+    return categorize_columns(df, {"Status": ITEM_STATUSES})
+
+
+@tr.traced("pandas")
+def categorize_in_house(df):
+    return categorize_columns(df, {"Status Abnormal": ABNORMAL_FLAGS, "Explanation Status": EXPLANATION_STATUSES})
+
+
+@tr.traced("pandas")
+def categorize_in_house_full(df, boundaries):
+    columns = {column: threshold_statuses(boundaries) for column in IN_HOUSE_STATUS_COLUMNS}
+    columns["Explanation Status"] = EXPLANATION_STATUSES
+    return categorize_columns(df, columns)
+
+
+@tr.traced("pandas")
+def categorize_out_house(df, boundaries):
+    return categorize_columns(
+        df,
+        {"source": None, "Status": threshold_statuses(boundaries), "Explanation Status": EXPLANATION_STATUSES},
+    )
+
+
+@tr.traced("pandas")
+def categorize_packing(df, boundaries):
+    return categorize_columns(
+        df,
+        {"destination": None, "Status": threshold_statuses(boundaries), "Explanation Status": EXPLANATION_STATUSES},
+    )
+
+
+def status_mask(series, label):
+    """
+    Boolean mask of rows equal to label, compared on the integer codes for categoricals.
+
+    Args:
+        series: Categorical (or plain object) Series
+        label: Category label to match
+
+    Returns:
+        Boolean numpy array / Series aligned with series
+    """
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return series == label
+    categories = series.cat.categories
+    if label not in categories:
+        return pd.Series(False, index=series.index)
+    return pd.Series(series.cat.codes.to_numpy() == categories.get_loc(label), index=series.index)
+
+
+def value_counts(series):
+    """
+    Count occurrences of each category using the integer codes.
+
+    Falls back to Series.value_counts() for non-categorical input. Categories with no rows
+    are kept with a count of 0 so lookups with .get() stay stable.
+
+    Args:
+        series: Categorical (or plain object) Series
+
+    Returns:
+        Series of counts indexed by plain string labels, named "count"
+    """
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return series.value_counts()
+    codes = series.cat.codes.to_numpy()
+    categories = series.cat.categories
+    counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+    return pd.Series(counts, index=pd.Index(list(categories), name=series.name), name="count")
+
+
+def observed_counts(series):
+    """
+    Counts of the values that occur, most frequent first, like Series.value_counts() on a
+    plain object column.
+
+    value_counts() keeps unused categories with a count of 0; pies and tables built from these
+    counts would show them as empty slices and rows.
+
+    Args:
+        series: Categorical (or plain object) Series
+
+    Returns:
+        Series of non-zero counts indexed by plain string labels, named "count"
+    """
+    counts = value_counts(series)
+    return counts[counts > 0].sort_values(ascending=False, kind="stable")
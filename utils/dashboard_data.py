@@ -0,0 +1,246 @@
+"""
+Streamlit-free builders for the dashboard frames.
+
+Mirrors get_in_house_data, get_out_house_data and get_packing_data in app.py so the same
+frames, Excel exports and approval sets can be produced from a plain psycopg2 connection
+(benchmarks, cli.py, batch jobs).
+"""
+import pandas as pd
+
+import utils.categorical as uc
+import utils.formatting as uf
+import utils.outlier as ol
+import utils.sql_in_house as us
+import utils.sql_out_house as uo
+import utils.sql_packing as up
+
+
+def connection_query(connection):
+    """
+    Wrap a psycopg2 connection in a "SQL -> DataFrame" callable, like st.connection(...).query.
+    """
+
+    def query(sql, params=None):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            columns = [column[0] for column in cursor.description]
+            # coerce_float turns NUMERIC Decimals into floats, as pandas.read_sql does for st.connection
+            return pd.DataFrame.from_records(cursor.fetchall(), columns=columns, coerce_float=True)
+
+    return query
+
+
+def in_house_queries(years, boundaries):
+    return {
+        "status_items": us.status_product_two_year(years),
+        "abnormal_cal": us.abnormal_cal(years, boundaries),
+        "full_abnormal_cal": us.full_abnormal_cal(years, boundaries),
+        "per_part_costs": us.per_part_costs_in_house(years),
+    }
+
+
+def out_house_queries(years, boundaries):
+    return {
+        "status_items": uo.status_product_two_year_out_house(years),
+        "abnormal_cal": uo.abnormal_cal_out_house(years, boundaries),
+        "per_part_prices": uo.per_part_prices_out_house(years),
+    }
+
+
+def packing_queries(years, boundaries):
+    return {
+        "status_items": up.status_product_two_year(years),
+        "abnormal_cal": up.packing_max_abnormal_cal(years, boundaries),
+    }
+
+
+def trend_queries(years):
+    """Multi-year trend queries per section (one scan each, any number of years)."""
+    return {
+        "in_house": us.total_cost_trend_in_house(years),
+        "out_house": uo.price_trend_out_house(years),
+        "packing": up.max_total_cost_trend_packing(years),
+    }
+
+
+def pivot_trend(df, years):
+    """
+    Pivot a long trend frame (see utils/sql_*.py *_trend builders) to one row per part.
+
+    Gaps are only filled between consecutive requested years; a part missing the earlier year
+    of a pair gets no gap for it, even though LAG would compare it to an older year.
+
+    Args:
+        df: Long frame with part keys, year_item, cost, previous_year, gap_percent, cagr_percent
+        years: Requested years, in any order
+
+    Returns:
+        DataFrame with "Cost <year>" and "Gap <previous>-<year> %" columns per year and "CAGR %"
+    """
+    years = sorted(int(year) for year in years)
+    keys = [column for column in ("part_no", "part_name", "destination") if column in df.columns]
+    df = df.assign(year_item=df["year_item"].astype(int))
+
+    grouped = df.groupby(keys + ["year_item"], dropna=False, sort=False)
+    costs = grouped["cost"].first().unstack("year_item").reindex(columns=years)
+
+    previous = dict(zip(years[1:], years[:-1]))
+    consecutive = df["previous_year"].astype(float).to_numpy() == df["year_item"].map(previous).astype(float).to_numpy()
+    gaps = (
+        df.loc[consecutive].groupby(keys + ["year_item"], dropna=False, sort=False)["gap_percent"].first()
+        .unstack("year_item").reindex(index=costs.index, columns=years[1:])
+    )
+    cagr = df.groupby(keys, dropna=False, sort=False)["cagr_percent"].first().reindex(costs.index)
+
+    columns = {f"Cost {years[0]}": costs[years[0]]}
+    for year in years[1:]:
+        columns[f"Cost {year}"] = costs[year]
+        columns[f"Gap {previous[year]}-{year} %"] = gaps[year]
+    columns["CAGR %"] = cagr
+    return pd.DataFrame(columns, index=costs.index).reset_index()
+
+
+def in_house_frames(results, boundaries):
+    """Return (status_items, abnormal_cal, full_abnormal_cal, per_part) as in get_in_house_data."""
+    return (
+        uc.categorize_status_items(results["status_items"]),
+        uc.categorize_in_house(results["abnormal_cal"]),
+        uc.categorize_in_house_full(results["full_abnormal_cal"], boundaries),
+        ol.iqr_outliers(results["per_part_costs"]),
+    )
+
+
+def out_house_frames(results, boundaries):
+    """Return (status_items, abnormal_cal, per_part) as in get_out_house_data."""
+    return (
+        uc.categorize_status_items(results["status_items"]),
+        uc.categorize_out_house(results["abnormal_cal"], boundaries),
+        ol.iqr_outliers(results["per_part_prices"], missing_label=None, deviation=False),
+    )
+
+
+def packing_frames(results, boundaries):
+    """Return (status_items, abnormal_cal) as in get_packing_data."""
+    return (
+        uc.categorize_status_items(results["status_items"]),
+        uc.categorize_packing(results["abnormal_cal"], boundaries),
+    )
+
+
+SECTION_BUILDERS = {
+    "in_house": (in_house_queries, in_house_frames),
+    "out_house": (out_house_queries, out_house_frames),
+    "packing": (packing_queries, packing_frames),
+}
+
+
+def load_dashboard_frames(query, years, boundaries):
+    """
+    Run every dashboard query through query and build all section frames.
+
+    Args:
+        query: Callable taking SQL and returning a DataFrame (see connection_query)
+        years: [previous_year, current_year]
+        boundaries: [in_house, out_house, packing] abnormal thresholds in percent
+
+    Returns:
+        Dict with "in_house", "out_house" and "packing" frame tuples
+    """
+    return {
+        section: load_section_frames(query, section, years, threshold)
+        for section, threshold in zip(SECTION_BUILDERS, boundaries)
+    }
+
+
+def load_section_frames(query, section, years, threshold):
+    """Run the queries of one section through query and build its frame tuple."""
+    queries, build = SECTION_BUILDERS[section]
+    results = {key: query(sql) for key, sql in queries(years, threshold).items()}
+    return build(results, threshold)
+
+
+def report_inputs(frames):
+    """
+    DataFrames in the shape generate_report expects, as assembled by the dashboard.
+
+    Returns:
+        Dict with df_inhouse, df_outhouse and df_packing
+    """
+    _, abnormal_cal, full_abnormal_cal, _ = frames["in_house"]
+    full_abnormal_cal = full_abnormal_cal.copy()
+    full_abnormal_cal["Status Abnormal"] = abnormal_cal["Status Abnormal"]
+    return {
+        "df_inhouse": full_abnormal_cal,
+        "df_outhouse": frames["out_house"][1],
+        "df_packing": frames["packing"][1],
+    }
+
+
+def _abnormal(df, status_column, threshold):
+    above, _, below = uc.threshold_statuses(threshold)
+    return df[uc.status_mask(df[status_column], above) | uc.status_mask(df[status_column], below)]
+
+
+def excel_exports(frames, years, boundaries):
+    """
+    Build every Excel download of the dashboard.
+
+    Args:
+        frames: Result of load_dashboard_frames
+        years: [previous_year, current_year]
+        boundaries: [in_house, out_house, packing] abnormal thresholds in percent
+
+    Returns:
+        Dict of file name (as offered by the dashboard) to xlsx bytes
+    """
+    previous, current = years
+    in_house, out_house, packing = (int(boundary) for boundary in boundaries)
+    _, abnormal_cal, _, per_part = frames["in_house"]
+    _, abnormal_cal_out, per_part_out = frames["out_house"]
+    _, abnormal_cal_packing = frames["packing"]
+
+    in_house_full = abnormal_cal.drop(["Status Abnormal", "Explanation Status"], axis=1)
+    in_house_filtered = abnormal_cal[uc.status_mask(abnormal_cal["Status Abnormal"], "Abnormal")].drop(
+        ["Status Abnormal", "Explanation Status"], axis=1
+    )
+    out_house_full = abnormal_cal_out.drop(["Status", "Explanation Status"], axis=1)
+    out_house_filtered = _abnormal(abnormal_cal_out, "Status", out_house).drop(["Status", "Explanation Status"], axis=1)
+
+    exports = {
+        f"in_house_{previous}_{current}.xlsx": uf.convert_to_excel_in_house(in_house_full, previous, current, in_house),
+        f"in_house_filtered_{previous}_{current}.xlsx": uf.convert_to_excel_in_house(
+            in_house_filtered, previous, current, in_house),
+        f"in_house_per_part_{previous}_{current}.xlsx": uf.convert_to_excel_format_in_house_per_part(
+            per_part, previous, current, in_house),
+        f"out_house_{previous}_{current}.xlsx": uf.convert_to_excel_format_out_house(
+            out_house_full, previous, current, out_house),
+        f"out_house_filtered_{previous}_{current}.xlsx": uf.convert_to_excel_format_out_house(
+            out_house_filtered, previous, current, out_house),
+        f"out_house_per_part_{previous}_{current}.xlsx": uf.convert_to_excel_format_out_house_per_part(
+            per_part_out, previous, current, out_house),
+        f"packing_{previous}_{current}.xlsx": uf.convert_to_excel_format_packaging(
+            abnormal_cal_packing, previous, current, packing),
+        f"packing_filtered_{previous}_{current}.xlsx": uf.convert_to_excel_format_packaging(
+            _abnormal(abnormal_cal_packing, "Status", packing), previous, current, packing),
+    }
+    return {name: data.getvalue() if hasattr(data, "getvalue") else data for name, data in exports.items()}
+
+
+def normal_rows(frames):
+    """
+    Rows the "Approve Normal Data" buttons of the dashboard would approve.
+
+    Returns:
+        Dict with "in_house", "out_house" and "packing" DataFrames
+    """
+    _, abnormal_cal, _, _ = frames["in_house"]
+    _, abnormal_cal_out, _ = frames["out_house"]
+    _, abnormal_cal_packing = frames["packing"]
+    return {
+        "in_house": abnormal_cal[uc.status_mask(abnormal_cal["Status Abnormal"], "Normal")].drop(
+            ["Status Abnormal", "Explanation Status"], axis=1),
+        "out_house": abnormal_cal_out[uc.status_mask(abnormal_cal_out["Status"], "Normal")].drop(
+            ["Status", "Explanation Status"], axis=1),
+        "packing": abnormal_cal_packing[uc.status_mask(abnormal_cal_packing["Status"], "Normal")].drop(
+            ["Status", "Explanation Status"], axis=1),
+    }
@@ -0,0 +1,163 @@
+"""
+Keyset-paginated browsing of the abnormal calculation of each section.
+
+The section's abnormal query (utils/sql_*.py) is wrapped as a subquery and filtered, sorted
+and cut to one page in SQL. Pages are addressed by the sort key of the last row of the
+previous page, the gap followed by the columns that identify a row (part_no, plus source for
+out house and part_name and destination for packing), instead of an OFFSET: every fetch
+returns at most one page however deep the reviewer pages, the database keeps a top-N sort
+instead of skipping all earlier rows, and rows do not shift between pages when earlier rows
+are approved in the meantime. Parts without a gap (no previous-year cost) sort after every
+gap when descending and before them when ascending.
+"""
+import utils.sql_in_house as us
+import utils.sql_out_house as uo
+import utils.sql_packing as up
+
+PAGE_SIZE = 50
+
+SECTIONS = {
+    "in_house": {
+        "query": us.abnormal_cal,
+        "gap": "Gap Total Cost %",
+        "status": "Status Abnormal",
+        "keys": ["part_no"],
+        "dimension": None,
+        "dimension_table": None,
+    },
+    "out_house": {
+        "query": uo.abnormal_cal_out_house,
+        "gap": "Gap Price",
+        "status": "Status",
+        "keys": ["part_no", "source"],
+        "dimension": "source",
+        "dimension_table": "out_house_detail",
+    },
+    "packing": {
+        "query": up.packing_max_abnormal_cal,
+        "gap": "Gap Total Cost",
+        "status": "Status",
+        "keys": ["part_no", "part_name", "destination"],
+        "dimension": "destination",
+        "dimension_table": "packing_detail",
+    },
+}
+
+
+def _literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _in_list(column, values):
+    return f'"{column}" IN ({", ".join(_literal(value) for value in values)})'
+
+
+def key_columns(section):
+    """Sort key columns _filtered adds to the section rows, to be dropped before display."""
+    return ["gap_key"] + [f"{column}_key" for column in SECTIONS[section]["keys"]]
+
+
+def _filtered(section, years, boundaries, filters):
+    """
+    Section query with the filters applied and the gap and row key columns exposed as non-null
+    sort keys (a NULL would make the row-value comparison of page_query unknown).
+
+    Args:
+        filters: Dict with optional "status", "dimension" and "explanation" lists and
+            "gap_min" / "gap_max" bounds (inclusive, in percent)
+    """
+    spec = SECTIONS[section]
+    base = spec["query"](years, boundaries).strip().rstrip(";")
+    conditions = []
+    if filters.get("status"):
+        conditions.append(_in_list(spec["status"], filters["status"]))
+    if filters.get("dimension") and spec["dimension"]:
+        conditions.append(_in_list(spec["dimension"], filters["dimension"]))
+    if filters.get("explanation"):
+        conditions.append(_in_list("Explanation Status", filters["explanation"]))
+    if filters.get("gap_min") is not None:
+        conditions.append(f'"{spec["gap"]}" >= {float(filters["gap_min"])}')
+    if filters.get("gap_max") is not None:
+        conditions.append(f'"{spec["gap"]}" <= {float(filters["gap_max"])}')
+
+    return """
+    SELECT *, COALESCE(CAST("{gap}" AS DOUBLE PRECISION), CAST('-Infinity' AS DOUBLE PRECISION)) AS gap_key, {keys}
+    FROM ({base}) AS section_rows
+    {where}
+    """.format(
+        gap=spec["gap"],
+        keys=", ".join(f'COALESCE(CAST("{column}" AS VARCHAR), \'\') AS "{column}_key"' for column in spec["keys"]),
+        base=base,
+        where=f"WHERE {' AND '.join(conditions)}" if conditions else "",
+    )
+
+
+def page_query(section, years, boundaries, filters=None, descending=True, after=None, page_size=PAGE_SIZE):
+    """
+    One page of the section's abnormal calculation.
+
+    Args:
+        section: "in_house", "out_house" or "packing"
+        years: [previous, current]
+        boundaries: Abnormal threshold in percent
+        filters: See _filtered
+        descending: Largest gaps first
+        after: Key of the last row of the previous page (see page_key), None for the first page
+        page_size: Rows per page
+
+    Returns:
+        SQL returning at most page_size + 1 rows; the extra row only tells that a next page exists
+    """
+    direction = "DESC" if descending else "ASC"
+    keys = key_columns(section)
+    key_list = ", ".join(f'"{key}"' for key in keys)
+
+    seek = ""
+    if after is not None:
+        values = [f"CAST({float(after[0])} AS DOUBLE PRECISION)" if after[0] is not None
+                  else "CAST('-Infinity' AS DOUBLE PRECISION)"] + [_literal(value) for value in after[1:]]
+        # Row-value comparison: strictly after the last row in key_columns order
+        seek = f"WHERE ({key_list}) {'<' if descending else '>'} ({', '.join(values)})"
+
+    return """
+    SELECT * FROM ({filtered}) AS filtered_rows
+    {seek}
+    ORDER BY {order}
+    LIMIT {limit}
+    """.format(
+        filtered=_filtered(section, years, boundaries, filters or {}),
+        seek=seek,
+        order=", ".join(f'"{key}" {direction}' for key in keys),
+        limit=int(page_size) + 1,
+    )
+
+
+def count_query(section, years, boundaries, filters=None):
+    """Number of rows matching the filters, for the page counter."""
+    return f'SELECT COUNT(*) AS "rows" FROM ({_filtered(section, years, boundaries, filters or {})}) AS filtered_rows'
+
+
+def dimension_values_query(section, years):
+    """Distinct sources (out_house) or destinations (packing) of the current year."""
+    spec = SECTIONS[section]
+    if not spec["dimension"]:
+        return None
+    return """
+    SELECT DISTINCT "{column}" FROM "{table}" WHERE "year_item" = {year2} ORDER BY "{column}"
+    """.format(column=spec["dimension"], table=spec["dimension_table"], year2=years[1])
+
+
+def page_key(df, section):
+    """
+    Keyset value of the last row of a page, passed as `after` to fetch the next page.
+
+    Missing key values become '' as in the COALESCEd key columns of _filtered.
+    """
+    spec = SECTIONS[section]
+    last = df.iloc[-1]
+    gap = last[spec["gap"]]
+    key = [None if gap is None or gap != gap else float(gap)]
+    for column in spec["keys"]:
+        value = last[column]
+        key.append("" if value is None or value != value else str(value))
+    return tuple(key)
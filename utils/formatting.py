@@ -3,6 +3,8 @@ from io import BytesIO
 from openpyxl.utils.dataframe import dataframe_to_rows
 from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
 
+import utils.tracing as tr
+
 
 def create_excel_base():
     """Create base workbook with default sheet removed."""
@@ -53,6 +55,7 @@ def apply_threshold_formatting(cell, value, bounderies):
         cell.fill = PatternFill(start_color="CCCCFF", end_color="CCCCFF", fill_type="solid")
 
 
+@tr.traced("excel")
 def convert_to_excel_in_house(df, var_previous, var_current, bounderies):
     wb = create_excel_base()
     ws = wb.create_sheet(title="In House")
@@ -89,6 +92,7 @@ def convert_to_excel_in_house(df, var_previous, var_current, bounderies):
     return excel_file
 
 
+@tr.traced("excel")
 def convert_to_excel_format_out_house(df, var_previous, var_current, bounderies):
     wb = create_excel_base()
 
@@ -125,6 +129,7 @@ def convert_to_excel_format_out_house(df, var_previous, var_current, bounderies)
     return excel_file
 
 
+@tr.traced("excel")
 def convert_to_excel_format_out_house_per_part(df, var_previous, var_current, bounderies):
     df = df[
         [
@@ -190,6 +195,7 @@ def convert_to_excel_format_out_house_per_part(df, var_previous, var_current, bo
     return excel_file
 
 
+@tr.traced("excel")
 def convert_to_excel_format_in_house_per_part(df, var_previous, var_current, bounderies):
     df = df[
         [
@@ -274,6 +280,7 @@ def convert_to_excel_format_in_house_per_part(df, var_previous, var_current, bou
     return excel_file
 
 
+@tr.traced("excel")
 def convert_to_excel_format_packaging(df, var_previous, var_current, bounderies):
     # Filter columns
     df = df[
@@ -0,0 +1,143 @@
+"""
+Query timing and EXPLAIN capture.
+
+Every dashboard query (via run_queries) and every repository cursor statement (via
+TimedCursor in repository/psql/conn.py) is recorded with its wall time, row count and result
+size. Records are kept in memory for the admin panel and written to the "msp.queries" logger
+as JSON; set MSP_QUERY_LOG to a file path to get them as JSON lines on disk.
+
+EXPLAIN (ANALYZE, BUFFERS) capture re-runs read queries, so it is off unless MSP_EXPLAIN=1 or
+it is switched on from the admin panel. The switch is held in a ContextVar, so it only applies
+to the session (script run and the query threads it starts) that turned it on.
+"""
+import contextvars
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+logger = logging.getLogger("msp.queries")
+
+if os.environ.get("MSP_QUERY_LOG") and not logger.handlers:
+    _handler = logging.FileHandler(os.environ["MSP_QUERY_LOG"], encoding="utf-8")
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.DEBUG)
+
+EXPLAIN_DEFAULT = os.environ.get("MSP_EXPLAIN", "").lower() in ("1", "true", "yes")
+_explain = contextvars.ContextVar("explain_enabled", default=EXPLAIN_DEFAULT)
+
+_lock = threading.Lock()
+_records = deque(maxlen=2000)
+_summary = {}
+
+
+def explain_enabled():
+    """Whether EXPLAIN capture is on in the current context (MSP_EXPLAIN unless set_explain was called)."""
+    return _explain.get()
+
+
+def set_explain(enabled):
+    """Switch EXPLAIN capture for the current context, e.g. the session's script run."""
+    _explain.set(bool(enabled))
+
+
+def statement_name(sql):
+    """Short stable name for an unnamed statement, e.g. 'SELECT in_house_detail'."""
+    statement = re.sub(r"\s+", " ", sql).strip()
+    verb = statement.split(" ", 1)[0].upper()
+    table = re.search(r'(?:FROM|INTO|UPDATE)\s+"?(\w+)"?', statement, re.IGNORECASE)
+    return f"{verb} {table.group(1)}" if table else verb
+
+
+def record(name, seconds, rows=None, size_bytes=None, plan=None, source="dashboard", context=None):
+    """
+    Store one query execution and emit it to the structured log.
+
+    Args:
+        name: Query name, e.g. "in_house.full_abnormal_cal"
+        seconds: Wall time
+        rows: Rows returned (or affected for writes)
+        size_bytes: Size of the materialized result, when known
+        plan: EXPLAIN (ANALYZE, BUFFERS) text, when captured
+        source: "dashboard" for named dashboard queries, "cursor" for repository statements
+        context: Extra fields such as the year pair and threshold
+    """
+    entry = {
+        "at": datetime.now().isoformat(timespec="milliseconds"),
+        "name": name,
+        "source": source,
+        "seconds": round(seconds, 6),
+        "rows": rows,
+        "bytes": size_bytes,
+    }
+    if context:
+        entry.update(context)
+
+    with _lock:
+        _records.append(dict(entry, plan=plan) if plan else entry)
+        stats = _summary.setdefault(name, {"name": name, "source": source, "calls": 0, "total_seconds": 0.0,
+                                           "max_seconds": 0.0, "rows": 0, "plan": None})
+        stats["calls"] += 1
+        stats["total_seconds"] += seconds
+        stats["max_seconds"] = max(stats["max_seconds"], seconds)
+        stats["rows"] += rows if rows and rows > 0 else 0
+        if plan:
+            stats["plan"] = plan
+
+    logger.log(logging.INFO if source == "dashboard" else logging.DEBUG, json.dumps(entry, default=str))
+
+
+def timed_query(query, name, sql, context=None, explain_query=None):
+    """
+    Run sql through a "SQL -> DataFrame" callable and record its timing.
+
+    When EXPLAIN capture is enabled, the plan is fetched with a second
+    EXPLAIN (ANALYZE, BUFFERS) execution after the timed run, through explain_query
+    (defaults to query; pass an uncached callable when query caches its results).
+    """
+    start = time.perf_counter()
+    df = query(sql)
+    seconds = time.perf_counter() - start
+
+    plan = None
+    if explain_enabled():
+        try:
+            plan = explain(explain_query or query, sql)
+        except Exception as e:
+            plan = f"EXPLAIN failed: {e}"
+
+    record(name, seconds, rows=len(df), size_bytes=int(df.memory_usage(deep=True).sum()), plan=plan,
+           context=context)
+    return df
+
+
+def explain(query, sql):
+    """Return the EXPLAIN (ANALYZE, BUFFERS) text plan of a read query."""
+    plan = query("EXPLAIN (ANALYZE, BUFFERS) " + sql.strip().rstrip(";"))
+    return "\n".join(plan.iloc[:, 0].astype(str))
+
+
+def summary():
+    """Aggregated stats per query name, slowest total time first."""
+    with _lock:
+        rows = [dict(stats) for stats in _summary.values()]
+    for stats in rows:
+        stats["mean_seconds"] = stats["total_seconds"] / stats["calls"]
+    return sorted(rows, key=lambda stats: stats["total_seconds"], reverse=True)
+
+
+def recent(limit=200):
+    """Most recent query records, newest first."""
+    with _lock:
+        return list(_records)[-limit:][::-1]
+
+
+def reset():
+    with _lock:
+        _records.clear()
+        _summary.clear()
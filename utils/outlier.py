@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+import utils.tracing as tr
+
+QUARTILE_COLUMNS = ["q1", "median", "q3", "iqr", "lower_bound", "upper_bound"]
+
+
+@tr.traced("pandas")
+def iqr_outliers(
+    df,
+    gap_column="price_gap_percent",
+    prefix_length=5,
+    multiplier=1.5,
+    missing_label="No Comparison Available",
+    deviation=True,
+):
+    """
+    Flag per-part price gap outliers with group-wise IQR bounds.
+
+    Vectorized equivalent of the PERCENTILE_CONT CTEs in abnormal_cal_in_house_per_part and
+    abnormal_cal_out_house_per_part: rows are grouped on the first prefix_length characters of
+    part_no, quartiles are taken over the non-null gaps of groups with more than one record, and
+    gaps outside [q1 - multiplier * iqr, q3 + multiplier * iqr] are flagged.
+
+    Args:
+        df: Two-year cost frame with part_no and gap_column (e.g. from per_part_costs_in_house)
+        gap_column: Column holding the year-over-year gap in percent
+        prefix_length: Number of part_no characters that form a group (part_num)
+        multiplier: IQR multiplier for the bounds (1.5 = Tukey fences, 3.0 = far out)
+        missing_label: price_status for rows without a gap; None keeps them "Normal"
+        deviation: Add deviation_from_normal_range (distance outside the bounds)
+
+    Returns:
+        DataFrame sorted by part_num with q1, median, q3, iqr, lower_bound, upper_bound and
+        price_status columns appended
+    """
+    result = df.copy()
+    result.insert(0, "part_num", result["part_no"].astype(str).str[:prefix_length])
+
+    gaps = pd.to_numeric(result[gap_column], errors="coerce").astype(float)
+    result[gap_column] = gaps
+
+    # Groups with a single record get no statistics, as in the SQL valid_parts CTE
+    group_sizes = result.groupby("part_num")["part_no"].transform("size")
+    grouped = gaps.where(group_sizes > 1).groupby(result["part_num"])
+
+    result["q1"] = grouped.transform("quantile", 0.25)
+    result["median"] = grouped.transform("quantile", 0.5)
+    result["q3"] = grouped.transform("quantile", 0.75)
+    result["iqr"] = result["q3"] - result["q1"]
+    result["lower_bound"] = result["q1"] - multiplier * result["iqr"]
+    result["upper_bound"] = result["q3"] + multiplier * result["iqr"]
+
+    below = (gaps < result["lower_bound"]).to_numpy()
+    above = (gaps > result["upper_bound"]).to_numpy()
+    missing = gaps.isna().to_numpy()
+
+    conditions = [below, above]
+    choices = ["Abnormally Low", "Abnormally High"]
+    if missing_label is not None:
+        conditions.insert(0, missing)
+        choices.insert(0, missing_label)
+    result["price_status"] = np.select(conditions, choices, default="Normal")
+
+    if deviation:
+        result["deviation_from_normal_range"] = np.select(
+            [missing, below, above],
+            [np.nan, gaps - result["lower_bound"], gaps - result["upper_bound"]],
+            default=0.0,
+        )
+
+    return result.sort_values("part_num", kind="stable").reset_index(drop=True)
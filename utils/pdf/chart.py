@@ -4,20 +4,16 @@ import io
 from plotly.subplots import make_subplots
 import plotly.express as px
 
+import utils.categorical as uc
+import utils.summary as sm
+
 
 def grouped_bar_chart(
     df: pd.DataFrame, source, boundaries: str, width: int = 800, height: int = 480, legend_param=True
 ):
-    # Get unique sources
-    sources = df[source].unique()
-
-    # Count total items per source to determine sorting
-    source_counts = {}
-    for i in sources:
-        source_counts[i] = df[df[source] == i].shape[0]
-
-    # Sort sources by total count (descending)
-    sources = sorted(sources, key=lambda x: source_counts[x], reverse=True)
+    # Count every source once; sources sorted by total count (descending)
+    cube = sm.status_cube(df, source)
+    sources = cube.totals().index.tolist()
 
     # Count statuses by source
     normal_counts = []
@@ -25,16 +21,13 @@ def grouped_bar_chart(
     below_counts = []
 
     for i in sources:
-        source_data = df[df[source] == i]
+        status_counts = cube.status_counts(i)
         # Count normal statuses
-        normal_count = source_data[source_data["Status"] == "Normal"].shape[0]
-        normal_counts.append(normal_count)
+        normal_counts.append(status_counts.get("Normal", 0))
         # Count above threshold statuses
-        above_count = source_data[source_data["Status"] == f"Abnormal Above {boundaries}%"].shape[0]
-        above_counts.append(above_count)
+        above_counts.append(status_counts.get(f"Abnormal Above {boundaries}%", 0))
         # Count below threshold statuses
-        below_count = source_data[source_data["Status"] == f"Abnormal Below -{boundaries}%"].shape[0]
-        below_counts.append(below_count)
+        below_counts.append(status_counts.get(f"Abnormal Below -{boundaries}%", 0))
 
     # Create a figure
     fig = go.Figure()
@@ -107,7 +100,7 @@ def grouped_bar_chart(
 
 def single_pie_chart(df, boundaries, column_status, title, height=400, width=400, legend_param=False):
     # Get status counts
-    status_counts = df[column_status].value_counts().reset_index()
+    status_counts = uc.observed_counts(df[column_status]).reset_index()
     status_counts.columns = ["Status", "count"]
 
     # Define color map
@@ -168,10 +161,10 @@ def single_pie_chart(df, boundaries, column_status, title, height=400, width=400
 
 def grouped_pie_chart(df, boundaries, width=900, height=300):
     categories = {
-        "LVA": df["LVA Status"].value_counts(),
-        "Non LVA": df["Non LVA Status"].value_counts(),
-        "Tooling": df["Tooling Status"].value_counts(),
-        "Process Cost": df["Process Cost Status"].value_counts(),
+        "LVA": uc.observed_counts(df["LVA Status"]),
+        "Non LVA": uc.observed_counts(df["Non LVA Status"]),
+        "Tooling": uc.observed_counts(df["Tooling Status"]),
+        "Process Cost": uc.observed_counts(df["Process Cost Status"]),
     }
     category_names = list(categories.keys())
     num_categories = len(category_names)
@@ -241,33 +234,26 @@ def grouped_pie_chart(df, boundaries, width=900, height=300):
 def grouped_bar_chart_dest(
     df: pd.DataFrame, source, boundaries: str, width: int = 800, height: int = 480, legend_param=True
 ):
-    # Get unique sources
-    sources = df[source].unique()
-
-    # Count total items per source to determine sorting
-    source_counts = {}
-    for i in sources:
-        source_counts[i] = df[df[source] == i].shape[0]
-
-    # Sort sources by total count (descending)
-    sources = sorted(sources, key=lambda x: source_counts[x], reverse=True)
+    # Count every source once; sources sorted by total count (descending)
+    cube = sm.status_cube(df, source)
+    sources = cube.totals().index.tolist()
 
     # Calculate percentages by source
     normal_percentages = []
     abnormal_percentages = []
 
     for i in sources:
-        source_data = df[df[source] == i]
-        total_count = source_data.shape[0]
+        status_counts = cube.status_counts(i)
+        total_count = int(status_counts.sum())
 
         # Count normal statuses
-        normal_count = source_data[source_data["Status"] == "Normal"].shape[0]
+        normal_count = status_counts.get("Normal", 0)
         normal_percentage = (normal_count / total_count * 100) if total_count > 0 else 0
         normal_percentages.append(normal_percentage)
 
         # Count and combine both abnormal statuses (above and below)
-        above_count = source_data[source_data["Status"] == f"Abnormal Above {boundaries}%"].shape[0]
-        below_count = source_data[source_data["Status"] == f"Abnormal Below -{boundaries}%"].shape[0]
+        above_count = status_counts.get(f"Abnormal Above {boundaries}%", 0)
+        below_count = status_counts.get(f"Abnormal Below -{boundaries}%", 0)
         abnormal_count = above_count + below_count
         abnormal_percentage = (abnormal_count / total_count * 100) if total_count > 0 else 0
         abnormal_percentages.append(abnormal_percentage)
@@ -2,6 +2,7 @@ import pandas as pd
 import io
 from fpdf import XPos, YPos
 
+import utils.categorical as uc
 import utils.pdf.chart as ct
 from utils.pdf.base_pdf import BasePDFReport
 from utils.pdf.in_house_report import InHousePDFReport
@@ -127,8 +128,8 @@ class CompletePDFReport(BasePDFReport):
         self.add_section_title("In House")
 
         # Prepare data for the In-House section
-        in_house_abnormal = self.df_inhouse["Total Cost Status"].value_counts()
-        in_house_explanation = self.df_inhouse["Explanation Status"].value_counts()
+        in_house_abnormal = uc.observed_counts(self.df_inhouse["Total Cost Status"])
+        in_house_explanation = uc.observed_counts(self.df_inhouse["Explanation Status"])
 
         in_house_left_stats = [
             ("Approved", in_house_explanation.get("Approved", 0)),
@@ -186,8 +187,8 @@ class CompletePDFReport(BasePDFReport):
         self.add_section_title("Out House")
 
         # Prepare data for the Out-House section
-        out_house_abnormal = self.df_outhouse["Status"].value_counts()
-        out_house_explanation = self.df_outhouse["Explanation Status"].value_counts()
+        out_house_abnormal = uc.observed_counts(self.df_outhouse["Status"])
+        out_house_explanation = uc.observed_counts(self.df_outhouse["Explanation Status"])
 
         out_house_left_stats = [
             ("Approved", out_house_explanation.get("Approved", 0)),
@@ -268,8 +269,8 @@ class CompletePDFReport(BasePDFReport):
         self.add_section_title("Packing")
 
         # Prepare data for the Packing section
-        packing_abnormal = self.df_packing["Status"].value_counts()
-        packing_explanation = self.df_packing["Explanation Status"].value_counts()
+        packing_abnormal = uc.observed_counts(self.df_packing["Status"])
+        packing_explanation = uc.observed_counts(self.df_packing["Explanation Status"])
 
         packing_left_stats = [
             ("Approved", packing_explanation.get("Approved", 0)),
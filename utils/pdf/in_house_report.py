@@ -1,5 +1,6 @@
 import pandas as pd
 from fpdf import XPos, YPos
+import utils.categorical as uc
 import utils.pdf.chart as ct
 from utils.pdf.base_pdf import BasePDFReport
 
@@ -40,8 +41,8 @@ class InHousePDFReport(BasePDFReport):
         self.add_section_title("In House")
         
         # Prepare data for the data section
-        in_house_abnormal = self.df_inhouse["Status Abnormal"].value_counts()
-        in_house_explanation = self.df_inhouse["Explanation Status"].value_counts()
+        in_house_abnormal = uc.observed_counts(self.df_inhouse["Status Abnormal"])
+        in_house_explanation = uc.observed_counts(self.df_inhouse["Explanation Status"])
         
         in_house_left_stats = [
             ("Approved", in_house_explanation.get("Approved", 0)),
@@ -1,6 +1,7 @@
 import pandas as pd
 from fpdf import XPos, YPos
 
+import utils.categorical as uc
 import utils.pdf.chart as ct
 from utils.pdf.base_pdf import BasePDFReport
 
@@ -41,8 +42,8 @@ class OutHousePDFReport(BasePDFReport):
         self.add_section_title("Out House")
         
         # Prepare data for the data section
-        out_house_abnormal = self.df_outhouse["Status"].value_counts()
-        out_house_explanation = self.df_outhouse["Explanation Status"].value_counts()
+        out_house_abnormal = uc.observed_counts(self.df_outhouse["Status"])
+        out_house_explanation = uc.observed_counts(self.df_outhouse["Explanation Status"])
         
         out_house_left_stats = [
             ("Approved", out_house_explanation.get("Approved", 0)),
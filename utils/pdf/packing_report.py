@@ -1,7 +1,9 @@
 import pandas as pd
 from fpdf import XPos, YPos
 
+import utils.categorical as uc
 import utils.pdf.chart as ct
+import utils.summary as sm
 from utils.pdf.base_pdf import BasePDFReport
 
 
@@ -36,12 +38,8 @@ class PackingPDFReport(BasePDFReport):
         Returns:
             tuple: Two DataFrames, each containing a subset of destinations.
         """
-        # Count items per destination
-        destination_counts = df["destination"].value_counts().reset_index()
-        destination_counts.columns = ["destination", "count"]
-        
-        # Sort destinations by count in descending order
-        sorted_destinations = destination_counts["destination"].tolist()
+        # Destinations sorted by item count in descending order, from the status count cube
+        sorted_destinations = sm.status_cube(df, "destination").totals().index.tolist()
         
         # Calculate how many destination codes should go in each group
         codes_per_group = len(sorted_destinations) // 2
@@ -71,8 +69,8 @@ class PackingPDFReport(BasePDFReport):
         self.add_section_title("Packing")
         
         # Prepare data for the data section
-        packing_abnormal = self.df_packing["Status"].value_counts()
-        packing_explanation = self.df_packing["Explanation Status"].value_counts()
+        packing_abnormal = uc.observed_counts(self.df_packing["Status"])
+        packing_explanation = uc.observed_counts(self.df_packing["Explanation Status"])
         
         packing_left_stats = [
             ("Approved", packing_explanation.get("Approved", 0)),
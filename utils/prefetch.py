@@ -0,0 +1,93 @@
+import contextvars
+import logging
+import threading
+from concurrent.futures import Future
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+import utils.tracing as tr
+
+logger = logging.getLogger("msp.prefetch")
+
+# Each session runs its own prefetches on short-lived threads, so one session's loads never
+# queue behind another's; a session has at most one pending prefetch per section loader.
+MAX_PENDING_PER_SESSION = 3
+
+
+def _run_traced(loader, args):
+    # Recorded in its own trace; wait_for merges it into the trace of the section that needs it
+    with tr.trace(f"prefetch.{loader.__name__}", "prefetch") as trace:
+        loader(*args)
+    return trace
+
+
+def _prefetch_key(loader, args):
+    return (loader.__name__,) + tuple(tuple(arg) if isinstance(arg, list) else arg for arg in args)
+
+
+def _submit(loader, args):
+    future = Future()
+    ctx = get_script_run_ctx(suppress_warning=True)
+    # Carries the session's context variables (e.g. its EXPLAIN switch) into the thread
+    context = contextvars.copy_context()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(context.run(_run_traced, loader, args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    thread = threading.Thread(target=run, name=f"prefetch-{loader.__name__}", daemon=True)
+    # Lets the loader's st.cache_data / st.connection calls see the calling session
+    if ctx is not None:
+        add_script_run_ctx(thread, ctx)
+    thread.start()
+    return future
+
+
+def prefetch(loader, *args):
+    """
+    Run a cached section loader in a background thread, once per session and argument set.
+
+    Finished prefetches of the same loader for other arguments (an earlier year pair or
+    threshold) are dropped, and nothing new is started while MAX_PENDING_PER_SESSION
+    prefetches of the session are still running; the section then loads on demand.
+
+    Args:
+        loader: Cached section loader, e.g. get_packing_data
+        *args: Arguments forwarded to the loader
+
+    Returns:
+        concurrent.futures.Future for the loader call, or None if not started
+    """
+    futures = st.session_state.setdefault("prefetch_futures", {})
+    key = _prefetch_key(loader, args)
+    for stale in [other for other, future in futures.items() if other[0] == key[0] and other != key and future.done()]:
+        del futures[stale]
+    if key not in futures:
+        if sum(not future.done() for future in futures.values()) >= MAX_PENDING_PER_SESSION:
+            return None
+        futures[key] = _submit(loader, args)
+    return futures[key]
+
+
+def wait_for(loader, *args):
+    """
+    Block until a pending prefetch of loader(*args) has finished, if one was started.
+
+    Calling the loader afterwards is then a cache hit instead of a second query. The future
+    is removed from the session once consumed.
+    """
+    future = st.session_state.get("prefetch_futures", {}).pop(_prefetch_key(loader, args), None)
+    if future is None:
+        return
+    try:
+        with tr.span(f"wait.{loader.__name__}", "prefetch"):
+            prefetch_trace = future.result()
+        if tr.current_trace() is not None:
+            tr.current_trace().merge(prefetch_trace)
+    except Exception:
+        logger.exception("Prefetch of %s failed", loader.__name__)
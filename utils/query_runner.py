@@ -0,0 +1,57 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+import utils.async_query as aq
+import utils.instrumentation as qi
+import utils.tracing as tr
+
+
+def run_queries(conn, queries, prefix=None, context=None):
+    """
+    Run independent named queries concurrently and join the results.
+
+    Each query checks out its own connection from the st.connection SQLAlchemy pool, so the
+    total latency is roughly that of the slowest query instead of the sum. Every query is timed
+    through utils.instrumentation under "<prefix>.<name>". An AsyncQueryPool runs the set with
+    asyncio.gather on its own loop instead of a thread per query.
+
+    Args:
+        conn: st.connection("postgresql", type="sql") instance, or a utils.async_query.AsyncQueryPool
+        queries: Mapping of result name to SQL string
+        prefix: Optional section name used in the recorded query names
+        context: Optional extra fields for the query log (e.g. years, threshold)
+
+    Returns:
+        Dict of result name to DataFrame, in the same order as queries
+
+    Raises:
+        The first exception raised by any query, after all of them have finished.
+    """
+    if isinstance(conn, aq.AsyncQueryPool):
+        return conn.run_queries(queries, prefix=prefix, context=context)
+
+    ctx = get_script_run_ctx(suppress_warning=True)
+
+    def attach_ctx():
+        # Lets conn.query's own st.cache_data see the calling session
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+
+    def explain_query(sql):
+        # EXPLAIN ANALYZE output must not come from conn.query's result cache
+        return conn.query(sql, ttl=0)
+
+    def run(name, sql):
+        query_name = f"{prefix}.{name}" if prefix else name
+        with tr.span(query_name, "query"):
+            return qi.timed_query(conn.query, query_name, sql, context=context, explain_query=explain_query)
+
+    with ThreadPoolExecutor(max_workers=max(len(queries), 1), initializer=attach_ctx) as executor:
+        # Each query runs in a copy of the caller's context so its span joins the active trace
+        futures = {
+            name: executor.submit(contextvars.copy_context().run, run, name, sql) for name, sql in queries.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
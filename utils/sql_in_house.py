@@ -56,6 +56,7 @@ def abnormal_cal(years, boundaries):
             ) as rn
             FROM
             in_house_explanations
+            WHERE year_item IN ({years})
         ) ie ON ih.id = ie.in_house_detail_id
         AND ie.rn = 1
         WHERE
@@ -180,6 +181,7 @@ def full_abnormal_cal(years, boundaries):
             ) as rn
             FROM
             in_house_explanations
+            WHERE year_item IN ({years})
         ) ie ON ih.id = ie.in_house_detail_id
         AND ie.rn = 1
         WHERE
@@ -397,3 +399,102 @@ def abnormal_cal_in_house_per_part(years):
     """.format(years=",".join(map(str, years)), year1=years[0], year2=years[1])
 
     return query
+
+
+def per_part_costs_in_house(years):
+    query = """
+    WITH dataframe AS (SELECT i.part_no,
+                              i.part_name,
+                              (ih.local_oh + ih.raw_material)           AS lva,
+                              (ih.jsp + ih.msp)                         AS non_lva,
+                              (ih.tooling_oh + ih.exclusive_investment) AS tooling,
+                              ih.total_process_cost                     AS process_cost,
+                              ih.total_cost                             AS total_cost,
+                              ih.year_item
+                       FROM in_house i
+                                JOIN in_house_detail ih ON i.id = ih.in_house_item
+                       WHERE ih.year_item IN ({years}))
+    SELECT COALESCE(d1.part_no, d2.part_no)     AS part_no,
+           COALESCE(d1.part_name, d2.part_name) AS part_name,
+           d1.lva          AS lva_{year1},
+           d2.lva          AS lva_{year2},
+           d1.non_lva      AS non_lva_{year1},
+           d2.non_lva      AS non_lva_{year2},
+           d1.process_cost AS process_{year1},
+           d2.process_cost AS process_{year2},
+           d1.tooling      AS tooling_{year1},
+           d2.tooling      AS tooling_{year2},
+           d1.total_cost   AS total_cost_{year1},
+           d2.total_cost   AS total_cost_{year2},
+           CASE
+               WHEN d1.total_cost IS NULL OR d2.total_cost IS NULL THEN NULL
+               ELSE ROUND(((d2.total_cost - d1.total_cost) / NULLIF(d1.total_cost, 0)) * 100, 2)
+           END AS "price_gap_percent"
+    FROM (SELECT * FROM dataframe WHERE year_item = {year1}) d1
+             RIGHT JOIN
+         (SELECT * FROM dataframe WHERE year_item = {year2}) d2
+         ON d1.part_no = d2.part_no
+    """.format(years=",".join(map(str, years)), year1=years[0], year2=years[1])
+
+    return query
+
+
+def total_cost_trend_in_house(years):
+    """
+    Consecutive-year total cost gap and CAGR per part over any number of years, in one scan.
+
+    Returns one row per part and year (long format); see utils.dashboard_data.pivot_trend.
+    """
+    query = """
+    WITH
+    dataframe AS (
+        SELECT
+        i.part_no,
+        i.part_name,
+        ih.year_item,
+        ih.total_cost AS cost
+        FROM
+        in_house i
+        JOIN in_house_detail ih ON i.id = ih.in_house_item
+        WHERE
+        ih.year_item IN ({years})
+    ),
+    trend AS (
+        SELECT
+        part_no,
+        part_name,
+        year_item,
+        cost,
+        LAG(cost) OVER part_years AS previous_cost,
+        LAG(year_item) OVER part_years AS previous_year,
+        FIRST_VALUE(cost) OVER part_span AS first_cost,
+        FIRST_VALUE(year_item) OVER part_span AS first_year,
+        LAST_VALUE(cost) OVER part_span AS last_cost,
+        LAST_VALUE(year_item) OVER part_span AS last_year
+        FROM
+        dataframe
+        WINDOW
+        part_years AS (PARTITION BY part_no ORDER BY year_item),
+        part_span AS (
+            PARTITION BY part_no ORDER BY year_item ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING
+        )
+    )
+    SELECT
+    part_no,
+    part_name,
+    year_item,
+    cost,
+    previous_year,
+    ROUND(((cost - previous_cost) / NULLIF(previous_cost, 0)) * 100, 2) AS gap_percent,
+    CASE
+        WHEN last_year > first_year AND first_cost > 0 AND last_cost > 0
+        THEN ROUND((POWER(last_cost / first_cost, 1.0 / (last_year - first_year)) - 1) * 100, 2)
+    END AS cagr_percent
+    FROM
+    trend
+    ORDER BY
+    part_no,
+    year_item
+    """.format(years=",".join(map(str, years)))
+
+    return query
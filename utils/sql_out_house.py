@@ -53,6 +53,7 @@ def abnormal_cal_out_house(years, boundaries):
             ) as rn
             FROM
             out_house_explanations
+            WHERE year_item IN ({years})
         ) oe ON od.id = oe.out_house_detail_id
         AND oe.rn = 1
             WHERE
@@ -224,3 +225,100 @@ def abnormal_cal_out_house_per_part(years):
     """.format(years=",".join(map(str, years)), year1=years[0], year2=years[1])
 
     return q_abnormal
+
+
+def per_part_prices_out_house(years):
+    query = """
+    WITH
+    dataframe AS (
+        SELECT
+        o.part_no,
+        o.part_name,
+        oh.price,
+        oh.source,
+        oh.year_item
+        FROM
+        out_house o
+        JOIN out_house_detail oh ON o.id = oh.out_house_item
+        WHERE
+        oh.year_item IN ({years})
+    )
+    SELECT
+    COALESCE(d1.part_no, d2.part_no) AS part_no,
+    COALESCE(d1.part_name, d2.part_name) AS part_name,
+    d2.source,
+    d1.price AS "price_{year1}",
+    d2.price AS "price_{year2}",
+    CASE
+        WHEN d1.price IS NULL THEN NULL
+        ELSE ROUND(((d2.price - d1.price) / NULLIF(d1.price, 0)) * 100, 2)
+    END AS "price_gap_percent"
+    FROM
+    (SELECT * FROM dataframe WHERE year_item = {year1}) d1
+    RIGHT JOIN
+    (SELECT * FROM dataframe WHERE year_item = {year2}) d2
+    ON d1.part_no = d2.part_no
+    """.format(years=",".join(map(str, years)), year1=years[0], year2=years[1])
+
+    return query
+
+
+def price_trend_out_house(years):
+    """
+    Consecutive-year price gap and CAGR per part over any number of years, in one scan.
+
+    Returns one row per part and year (long format); see utils.dashboard_data.pivot_trend.
+    """
+    query = """
+    WITH
+    dataframe AS (
+        SELECT
+        o.part_no,
+        o.part_name,
+        oh.year_item,
+        oh.price AS cost
+        FROM
+        out_house o
+        JOIN out_house_detail oh ON o.id = oh.out_house_item
+        WHERE
+        oh.year_item IN ({years})
+    ),
+    trend AS (
+        SELECT
+        part_no,
+        part_name,
+        year_item,
+        cost,
+        LAG(cost) OVER part_years AS previous_cost,
+        LAG(year_item) OVER part_years AS previous_year,
+        FIRST_VALUE(cost) OVER part_span AS first_cost,
+        FIRST_VALUE(year_item) OVER part_span AS first_year,
+        LAST_VALUE(cost) OVER part_span AS last_cost,
+        LAST_VALUE(year_item) OVER part_span AS last_year
+        FROM
+        dataframe
+        WINDOW
+        part_years AS (PARTITION BY part_no ORDER BY year_item),
+        part_span AS (
+            PARTITION BY part_no ORDER BY year_item ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING
+        )
+    )
+    SELECT
+    part_no,
+    part_name,
+    year_item,
+    cost,
+    previous_year,
+    ROUND(((cost - previous_cost) / NULLIF(previous_cost, 0)) * 100, 2) AS gap_percent,
+    CASE
+        WHEN last_year > first_year AND first_cost > 0 AND last_cost > 0
+        THEN ROUND((POWER(last_cost / first_cost, 1.0 / (last_year - first_year)) - 1) * 100, 2)
+    END AS cagr_percent
+    FROM
+    trend
+    ORDER BY
+    part_no,
+    year_item
+    """.format(years=",".join(map(str, years)))
+
+    return query
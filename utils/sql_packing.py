@@ -54,6 +54,7 @@ def packing_max_abnormal_cal(years, boundaries):
         ) as rn
         FROM
         packing_explanations
+        WHERE year_item IN ({years})
     ) pe ON pd.id = pe.packing_detail_id
     AND pe.rn = 1
     WHERE pd.year_item IN ({years})
@@ -158,3 +159,75 @@ FROM gap_cal;
     """.format(years=",".join(map(str, years)), year1=years[0], year2=years[1], boundaries=boundaries)
 
     return max_gap_price
+
+
+def max_total_cost_trend_packing(years):
+    """
+    Consecutive-year gap and CAGR of the max total cost per part and destination over any
+    number of years, in one scan.
+
+    Returns one row per part and year (long format); see utils.dashboard_data.pivot_trend.
+    """
+    query = """
+    WITH
+    dataframe AS (
+        SELECT
+        p.part_no,
+        p.part_name,
+        pd.destination,
+        pd.year_item,
+        MAX(pd.labor_cost + pd.material_cost + pd.inland_cost) AS cost
+        FROM
+        packing p
+        JOIN packing_detail pd ON p.id = pd.packing_item
+        WHERE
+        pd.year_item IN ({years})
+        GROUP BY
+        p.part_no,
+        p.part_name,
+        pd.destination,
+        pd.year_item
+    ),
+    trend AS (
+        SELECT
+        part_no,
+        part_name,
+        destination,
+        year_item,
+        cost,
+        LAG(cost) OVER part_years AS previous_cost,
+        LAG(year_item) OVER part_years AS previous_year,
+        FIRST_VALUE(cost) OVER part_span AS first_cost,
+        FIRST_VALUE(year_item) OVER part_span AS first_year,
+        LAST_VALUE(cost) OVER part_span AS last_cost,
+        LAST_VALUE(year_item) OVER part_span AS last_year
+        FROM
+        dataframe
+        WINDOW
+        part_years AS (PARTITION BY part_no, destination ORDER BY year_item),
+        part_span AS (
+            PARTITION BY part_no, destination ORDER BY year_item
+            ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING
+        )
+    )
+    SELECT
+    part_no,
+    part_name,
+    destination,
+    year_item,
+    cost,
+    previous_year,
+    ROUND(((cost - previous_cost) / NULLIF(previous_cost, 0)) * 100, 2) AS gap_percent,
+    CASE
+        WHEN last_year > first_year AND first_cost > 0 AND last_cost > 0
+        THEN ROUND((POWER(last_cost / first_cost, 1.0 / (last_year - first_year)) - 1) * 100, 2)
+    END AS cagr_percent
+    FROM
+    trend
+    ORDER BY
+    part_no,
+    destination,
+    year_item
+    """.format(years=",".join(map(str, years)))
+
+    return query
@@ -0,0 +1,131 @@
+"""
+Part search and per-part history queries (see database/migrations/002_part_search_indexes.sql).
+
+The queries take SQLAlchemy-style named parameters (:term, :pattern, ...), to be passed as
+conn.query(sql, params={...}), since the search term comes straight from the user.
+"""
+SECTIONS = ["in_house", "out_house", "packing"]
+SEARCH_MODES = ["prefix", "contains", "name"]
+
+
+def _escape_like(term):
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_params(term, mode, limit=50):
+    """Parameters for search_parts: the LIKE pattern of the mode, the raw term and the limit."""
+    term = term.strip()
+    pattern = {
+        "prefix": f"{_escape_like(term)}%",
+        "contains": f"%{_escape_like(term)}%",
+        "name": term,
+    }[mode]
+    return {"term": term, "pattern": pattern, "limit": int(limit)}
+
+
+def search_parts(mode):
+    """
+    Parts of all three sections matching the search term.
+
+    Args:
+        mode: "prefix" (part_no starts with, btree text_pattern_ops), "contains" (part_no
+            substring, trigram GIN) or "name" (fuzzy part_name, trigram similarity)
+
+    Returns:
+        SQL with section, part_no, part_name and score columns, best matches (prefix: part_no
+        order) first
+    """
+    condition = {
+        "prefix": '"part_no" LIKE :pattern',
+        "contains": '"part_no" ILIKE :pattern',
+        "name": '"part_name" % :pattern',
+    }[mode]
+    score = 'similarity("part_name", :term)' if mode == "name" else 'similarity("part_no", :term)'
+    # Prefix matches come off the btree in part_no order, so each section can stop at the limit
+    order = '"part_no"' if mode == "prefix" else '"score" DESC, "part_no"'
+    query = """
+    SELECT "section", "part_no", "part_name", "score"
+    FROM (
+        {selects}
+    ) AS matches
+    ORDER BY {order}
+    LIMIT :limit
+    """.format(order=order, selects="\n        UNION ALL\n        ".join(
+        f"""(SELECT '{section}' AS "section", "part_no", "part_name", {score} AS "score"
+         FROM "{section}" WHERE {condition} ORDER BY {order} LIMIT :limit)"""
+        for section in SECTIONS
+    ))
+
+    return query
+
+
+def part_history(section):
+    """
+    Per-year costs and status of one part (:part_no) in one section, oldest year first.
+
+    The in-house cost groups are the ones the dashboard compares (see abnormal_cal).
+    """
+    query = {
+        "in_house": """
+        SELECT
+            ih.year_item AS "Year",
+            (ih.local_oh + ih.raw_material) AS "LVA",
+            (ih.jsp + ih.msp) AS "Non LVA",
+            (ih.tooling_oh + ih.exclusive_investment) AS "Tooling",
+            ih.total_process_cost AS "Process Cost",
+            ih.total_cost AS "Total Cost",
+            ih.status AS "Status",
+            ih.created_at AS "Uploaded At"
+        FROM in_house i
+        JOIN in_house_detail ih ON i.id = ih.in_house_item
+        WHERE i.part_no = :part_no
+        ORDER BY ih.year_item
+        """,
+        "out_house": """
+        SELECT
+            od.year_item AS "Year",
+            od.source AS "Source",
+            od.price AS "Price",
+            od.status AS "Status",
+            od.created_at AS "Uploaded At"
+        FROM out_house o
+        JOIN out_house_detail od ON o.id = od.out_house_item
+        WHERE o.part_no = :part_no
+        ORDER BY od.year_item, od.source
+        """,
+        "packing": """
+        SELECT
+            pd.year_item AS "Year",
+            pd.destination AS "Destination",
+            pd.model AS "Model",
+            pd.labor_cost AS "Labor Cost",
+            pd.material_cost AS "Material Cost",
+            pd.inland_cost AS "Inland Cost",
+            (pd.labor_cost + pd.material_cost + pd.inland_cost) AS "Total Cost",
+            pd.status AS "Status",
+            pd.created_at AS "Uploaded At"
+        FROM packing p
+        JOIN packing_detail pd ON p.id = pd.packing_item
+        WHERE p.part_no = :part_no
+        ORDER BY pd.year_item, pd.destination, pd.model
+        """,
+    }[section]
+
+    return query
+
+
+def explanation_timeline(section):
+    """Every explanation recorded for one part (:part_no) in one section, newest first."""
+    query = """
+    SELECT
+        d.year_item AS "Year",
+        e.explanation AS "Explanation",
+        e.explained_at AS "Explained At"
+    FROM "{section}" p
+    JOIN "{section}_detail" d ON p.id = d."{section}_item"
+    JOIN "{section}_explanations" e ON d.id = e."{section}_detail_id"
+    WHERE p.part_no = :part_no
+    ORDER BY e.explained_at DESC
+    """.format(section=section)
+
+    return query
@@ -0,0 +1,319 @@
+"""
+Bounded-memory Excel/CSV exports straight from a server-side cursor.
+
+The dashboard exports load the whole result into a DataFrame and then copy it cell by cell
+into an in-memory openpyxl workbook. The functions here read the same queries from a named
+(server-side) psycopg2 cursor in batches of `itersize` rows and append each batch to a
+write-only workbook (rows are spooled to a temporary file per sheet) or a CSV writer, so
+memory stays at about one batch however many parts and years are exported. The sheets match
+the layout of the utils/formatting.py converters: the same two header rows, borders and gap
+colouring.
+
+Per-part exports need the IQR bounds of each 5-character part_no group, so their query is
+ordered by group and each group is flagged with utils.outlier.iqr_outliers once it is
+complete; memory is then bounded by the largest group.
+"""
+import csv
+import uuid
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
+from openpyxl.utils import get_column_letter
+
+import utils.categorical as uc
+import utils.outlier as ol
+import utils.sql_in_house as us
+import utils.sql_out_house as uo
+import utils.sql_packing as up
+
+BATCH_SIZE = 5000
+PREFIX_LENGTH = 5
+
+THIN_BORDER = Border(left=Side(style="thin"), right=Side(style="thin"), top=Side(style="thin"),
+                     bottom=Side(style="thin"))
+HEADER_FILL = PatternFill(start_color="CCFFCC", end_color="CCFFCC", fill_type="solid")
+ABOVE_FILL = PatternFill(start_color="FFCCCC", end_color="FFCCCC", fill_type="solid")
+BELOW_FILL = PatternFill(start_color="CCCCFF", end_color="CCCCFF", fill_type="solid")
+SEPARATOR_FILL = PatternFill(start_color="808080", end_color="808080", fill_type="solid")
+
+
+def stream_frames(connection, sql, itersize=BATCH_SIZE):
+    """
+    Yield the result of sql as DataFrames of at most itersize rows.
+
+    Args:
+        connection: psycopg2 connection (named cursors need an open transaction, which
+            psycopg2 starts implicitly)
+        sql: Query to run
+        itersize: Rows fetched from the server per round trip and per yielded batch
+    """
+    with connection.cursor(name=f"export_{uuid.uuid4().hex}") as cursor:
+        cursor.itersize = itersize
+        cursor.execute(sql)
+        while True:
+            rows = cursor.fetchmany(itersize)
+            if not rows:
+                break
+            columns = [column[0] for column in cursor.description]
+            # coerce_float turns NUMERIC Decimals into floats, as the dashboard frames have them
+            yield pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+
+
+def iqr_groups(batches, prefix_length=PREFIX_LENGTH, **options):
+    """
+    Run iqr_outliers over part_no-prefix groups of batches ordered by prefix.
+
+    The last group of a batch may continue in the next one, so it is carried over until a
+    batch starts with another prefix.
+    """
+    pending = None
+    for batch in batches:
+        if pending is not None:
+            batch = pd.concat([pending, batch], ignore_index=True)
+        prefixes = batch["part_no"].astype(str).str[:prefix_length]
+        last = prefixes.iloc[-1]
+        complete = (prefixes != last).to_numpy()
+        pending = batch[~complete]
+        if complete.any():
+            yield ol.iqr_outliers(batch[complete], prefix_length=prefix_length, **options)
+    if pending is not None and len(pending):
+        yield ol.iqr_outliers(pending, prefix_length=prefix_length, **options)
+
+
+def _header_cell(ws, value):
+    cell = WriteOnlyCell(ws, value=value)
+    cell.alignment = Alignment(horizontal="center", vertical="center")
+    cell.font = Font(bold=True)
+    cell.fill = HEADER_FILL
+    cell.border = THIN_BORDER
+    return cell
+
+
+class _Sheet:
+    """
+    Write-only worksheet with the two-row header layout of the utils/formatting.py exports.
+
+    Args:
+        wb: Write-only Workbook
+        title: Sheet title
+        headers: (value, start_row, start_col, end_row, end_col) per header, as passed to
+            utils.formatting.create_styled_header
+        width: Number of columns
+        gap_columns: 1-based columns coloured against the boundary
+        boundary: Abnormal threshold in percent
+    """
+
+    def __init__(self, wb, title, headers, width, gap_columns, boundary):
+        self.ws = wb.create_sheet(title=title)
+        self.width = width
+        self.gap_columns = set(gap_columns)
+        self.boundary = boundary
+
+        grid = {}
+        for value, start_row, start_col, end_row, end_col in headers:
+            grid[(start_row, start_col)] = value
+            if start_row != end_row or start_col != end_col:
+                self.ws.merged_cells.add(
+                    f"{get_column_letter(start_col)}{start_row}:{get_column_letter(end_col)}{end_row}"
+                )
+        for row in (1, 2):
+            self.ws.append([
+                _header_cell(self.ws, grid[(row, col)]) if (row, col) in grid else self._cell(None)
+                for col in range(1, width + 1)
+            ])
+
+    def _cell(self, value, fill=None):
+        cell = WriteOnlyCell(self.ws, value=None if pd.isna(value) else value)
+        cell.border = THIN_BORDER
+        if fill is not None:
+            cell.fill = fill
+        return cell
+
+    def append(self, values):
+        cells = []
+        for col, value in enumerate(values, 1):
+            fill = None
+            if col in self.gap_columns and isinstance(value, (int, float)):
+                if value > self.boundary:
+                    fill = ABOVE_FILL
+                elif value < -self.boundary:
+                    fill = BELOW_FILL
+            cells.append(self._cell(value, fill))
+        self.ws.append(cells)
+
+    def separator(self):
+        self.ws.append([self._cell("", SEPARATOR_FILL) for _ in range(self.width)])
+
+
+def _year_headers(labels, first_col, previous, current, with_gap):
+    """Cost group headers: label over (previous, current[, Gap (%)]) sub-headers."""
+    headers = []
+    step = 3 if with_gap else 2
+    for i, label in enumerate(labels):
+        col = first_col + i * step
+        headers += [(label, 1, col, 1, col + step - 1), (f"{previous}", 2, col, 2, col),
+                    (f"{current}", 2, col + 1, 2, col + 1)]
+        if with_gap:
+            headers.append(("Gap (%)", 2, col + 2, 2, col + 2))
+    return headers
+
+
+def _layout(section, kind, previous, current):
+    """(columns or None for "all", headers, width, gap_columns, sheet_column) of one export."""
+    if section == "in_house" and kind == "per_part":
+        columns = ["part_num", "part_no", "part_name"] + [
+            f"{cost}_{year}" for cost in ("lva", "non_lva", "process", "tooling", "total_cost")
+            for year in (previous, current)
+        ] + ["price_gap_percent"]
+        headers = [("Part No", 1, 1, 2, 1), ("Part No", 1, 2, 2, 2), ("Part Name", 1, 3, 2, 3),
+                   ("Gap (%)", 1, 14, 2, 14)]
+        headers += _year_headers(["LVA", "Non LVA", "Process Cost", "Tooling Cost", "Total Cost"], 4, previous,
+                                 current, with_gap=False)
+        return columns, headers, 14, [14], None
+    if section == "in_house":
+        headers = [("Part No", 1, 1, 2, 1), ("Part Name", 1, 2, 2, 2)]
+        headers += _year_headers(["LVA", "Non LVA", "Tooling", "Process Cost", "Total Cost"], 3, previous, current,
+                                 with_gap=True)
+        return None, headers, 17, [5, 8, 11, 14, 17], None
+    if section == "out_house" and kind == "per_part":
+        columns = ["part_num", "part_no", "part_name", "source", f"price_{previous}", f"price_{current}",
+                   "price_gap_percent"]
+        headers = [("5 Part No", 1, 1, 2, 1), ("Part No", 1, 2, 2, 2), ("Part Name", 1, 3, 2, 3),
+                   ("Source", 1, 4, 2, 4)]
+        headers += _year_headers(["Price"], 5, previous, current, with_gap=True)
+        return columns, headers, 7, [7], None
+    if section == "out_house":
+        headers = [("Part No", 1, 1, 2, 1), ("Part Name", 1, 2, 2, 2), ("Source", 1, 3, 2, 3)]
+        headers += _year_headers(["Price"], 4, previous, current, with_gap=True)
+        return None, headers, 6, [6], "source"
+    columns = ["part_no", "part_name", "destination"] + [
+        f"{cost} {year}" for cost in ("Labor Cost", "Material Cost", "Inland Cost", "Max Total Cost")
+        for year in (previous, current)
+    ] + ["Gap Total Cost"]
+    headers = [("Part No", 1, 1, 2, 1), ("Part Name", 1, 2, 2, 2), ("Destination", 1, 3, 2, 3),
+               ("Gap Total Cost (%)", 1, 12, 2, 12)]
+    headers += _year_headers(["Labor Cost", "Material Cost", "Inland Cost", "Total Cost"], 4, previous, current,
+                             with_gap=False)
+    return columns, headers, 12, [12], None
+
+
+# Status columns the dashboard drops from the full and filtered exports
+STATUS_COLUMNS = {"in_house": ["Status Abnormal", "Explanation Status"], "out_house": ["Status", "Explanation Status"],
+                  "packing": []}
+SHEET_TITLES = {"in_house": "In House", "out_house": "Out House", "packing": "packing"}
+
+
+def export_batches(connection, section, kind, years, boundary, itersize=BATCH_SIZE):
+    """
+    Yield the rows of one dashboard export as DataFrames with the exported columns.
+
+    Args:
+        section: "in_house", "out_house" or "packing"
+        kind: "" (all rows), "filtered" (abnormal rows only) or "per_part" (IQR outliers;
+            in_house and out_house only)
+        years: [previous, current]
+        boundary: Abnormal threshold in percent
+    """
+    previous, current = years
+    columns = _layout(section, kind, previous, current)[0]
+
+    if kind == "per_part":
+        if section == "in_house":
+            sql, options = us.per_part_costs_in_house(years), {}
+        elif section == "out_house":
+            sql, options = uo.per_part_prices_out_house(years), {"missing_label": None, "deviation": False}
+        else:
+            raise ValueError("The packing section has no per-part export")
+        ordered = f"SELECT * FROM ({sql}) AS export ORDER BY LEFT(part_no, {PREFIX_LENGTH}), part_no"
+        for group in iqr_groups(stream_frames(connection, ordered, itersize), **options):
+            yield group[columns]
+        return
+
+    sql = {
+        "in_house": us.abnormal_cal,
+        "out_house": uo.abnormal_cal_out_house,
+        "packing": up.packing_max_abnormal_cal,
+    }[section](years, boundary)
+    for batch in stream_frames(connection, sql, itersize):
+        if kind == "filtered":
+            status = "Status Abnormal" if section == "in_house" else "Status"
+            mask = (
+                uc.status_mask(batch[status], "Abnormal") if section == "in_house"
+                else uc.status_mask(batch[status], f"Abnormal Above {boundary}%")
+                | uc.status_mask(batch[status], f"Abnormal Below -{boundary}%")
+            )
+            batch = batch[mask]
+        batch = batch.drop(STATUS_COLUMNS[section], axis=1)
+        yield batch[columns] if columns else batch
+
+
+def write_excel(connection, section, kind, years, boundary, output, itersize=BATCH_SIZE):
+    """
+    Stream one dashboard export into an xlsx file.
+
+    Args:
+        output: File path or binary file object
+        (others as in export_batches)
+
+    Returns:
+        Number of data rows written
+    """
+    previous, current = years
+    _, headers, width, gap_columns, sheet_column = _layout(section, kind, previous, current)
+    wb = Workbook(write_only=True)
+    sheets = {}
+    rows = 0
+
+    for batch in export_batches(connection, section, kind, years, int(boundary), itersize):
+        if sheet_column:
+            # One sheet per source, created when the source first appears
+            parts = batch.groupby(sheet_column, sort=False)
+        elif kind == "per_part":
+            parts = ((None, group) for _, group in batch.groupby("part_num", sort=False))
+        else:
+            parts = [(None, batch)]
+
+        for sheet_key, part in parts:
+            if sheet_key not in sheets:
+                title = str(sheet_key) if sheet_column else SHEET_TITLES[section]
+                sheets[sheet_key] = _Sheet(wb, title, headers, width, gap_columns, int(boundary))
+            # Grey row between part_num groups, as in the per-part converters
+            if kind == "per_part" and rows:
+                sheets[sheet_key].separator()
+            for values in part.itertuples(index=False):
+                sheets[sheet_key].append(values)
+            rows += len(part)
+
+    if not sheets:
+        _Sheet(wb, "Empty", headers, width, gap_columns, int(boundary))
+    wb.save(output)
+    return rows
+
+
+def write_csv(connection, section, kind, years, boundary, output, itersize=BATCH_SIZE):
+    """
+    Stream one dashboard export into a CSV file with the query's column names as header.
+
+    Args:
+        output: File path or text file object
+        (others as in export_batches)
+
+    Returns:
+        Number of data rows written
+    """
+    if isinstance(output, str):
+        with open(output, "w", newline="", encoding="utf-8") as csv_file:
+            return write_csv(connection, section, kind, years, boundary, csv_file, itersize)
+
+    writer = csv.writer(output)
+    rows = 0
+    header = False
+    for batch in export_batches(connection, section, kind, years, int(boundary), itersize):
+        if not header:
+            writer.writerow(batch.columns)
+            header = True
+        writer.writerows(batch.itertuples(index=False))
+        rows += len(batch)
+    return rows
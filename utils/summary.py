@@ -0,0 +1,150 @@
+"""
+Pre-aggregated status counts of an abnormal frame.
+
+The per-source / per-destination panels, their pie charts and the packing PDF split all
+count the same three columns of the same frame. A StatusCube counts (dimension value x
+Status x Explanation Status) once, in a single pass over the categorical codes, after which
+every selection is an array lookup instead of a filter over the full frame.
+"""
+import numpy as np
+import pandas as pd
+
+import utils.categorical as uc
+import utils.tracing as tr
+
+
+class StatusCube:
+    """
+    Row counts per (dimension value, Status, Explanation Status).
+
+    Rows with a missing value in any of the three columns are counted in an extra slot of
+    that axis, so the totals still match len() of the (filtered) frame.
+    """
+
+    def __init__(self, dimension, values, statuses, explanation_statuses, counts):
+        self.dimension = dimension
+        self.statuses = list(statuses)
+        self.explanation_statuses = list(explanation_statuses)
+        self.counts = counts
+        self._index = {value: position for position, value in enumerate(values)}
+
+    def __len__(self):
+        return int(self.counts.sum())
+
+    def values(self):
+        """Dimension values with at least one row, in category (sorted) order."""
+        totals = self.counts.sum(axis=(1, 2))
+        return [value for value, position in self._index.items() if totals[position] > 0]
+
+    def _slice(self, value):
+        if value is None:
+            return self.counts.sum(axis=0)
+        position = self._index.get(value)
+        if position is None:
+            return np.zeros(self.counts.shape[1:], dtype=self.counts.dtype)
+        return self.counts[position]
+
+    def total(self, value=None):
+        """Number of rows of one dimension value (all rows when value is None)."""
+        return int(self._slice(value).sum())
+
+    def status_counts(self, value=None):
+        """
+        Status counts of one dimension value, shaped like uc.value_counts(df["Status"]).
+
+        Args:
+            value: Dimension value (e.g. a source or destination); None counts every row
+
+        Returns:
+            Series of counts indexed by status label, named "count"
+        """
+        counts = self._slice(value)[:-1].sum(axis=1)
+        return pd.Series(counts, index=pd.Index(self.statuses, name="Status"), name="count")
+
+    def explanation_counts(self, value=None):
+        """Explanation Status counts of one dimension value (all rows when value is None)."""
+        counts = self._slice(value)[:, :-1].sum(axis=0)
+        return pd.Series(counts, index=pd.Index(self.explanation_statuses, name="Explanation Status"), name="count")
+
+    def totals(self):
+        """Rows per dimension value, largest first (ties keep category order)."""
+        totals = pd.Series(self.counts[:-1].sum(axis=(1, 2)), index=pd.Index(list(self._index), name=self.dimension))
+        return totals[totals > 0].sort_values(ascending=False, kind="stable").rename("count")
+
+
+def _codes(series):
+    series = uc.as_category(series)
+    codes = series.cat.codes.to_numpy().astype(np.int64)
+    categories = list(series.cat.categories)
+    # Missing values go to the extra slot after the last category
+    codes[codes < 0] = len(categories)
+    return codes, categories
+
+
+@tr.traced("pandas")
+def status_cube(df, dimension, status_column="Status", explanation_column="Explanation Status"):
+    """
+    Count a categorized abnormal frame (see uc.categorize_out_house / categorize_packing).
+
+    Args:
+        df: Frame with the dimension, status and explanation status columns
+        dimension: Column to break the counts down by, e.g. "source" or "destination"
+        status_column: Threshold status column
+        explanation_column: Explanation status column (optional)
+
+    Returns:
+        StatusCube
+    """
+    dimension_codes, values = _codes(df[dimension])
+    status_codes, statuses = _codes(df[status_column])
+    if explanation_column in df.columns:
+        explanation_codes, explanation_statuses = _codes(df[explanation_column])
+    else:
+        # Every row lands in the missing slot, explanation_counts() is then empty
+        explanation_codes, explanation_statuses = np.zeros(len(df), dtype=np.int64), []
+
+    shape = (len(values) + 1, len(statuses) + 1, len(explanation_statuses) + 1)
+    flat = np.ravel_multi_index((dimension_codes, status_codes, explanation_codes), shape)
+    counts = np.bincount(flat, minlength=int(np.prod(shape))).reshape(shape)
+    return StatusCube(dimension, values, statuses, explanation_statuses, counts)
+
+
+SECTION_DIMENSIONS = {"out_house": "source", "packing": "destination"}
+
+
+def _as_dict(counts):
+    return {str(label): int(count) for label, count in counts.items()}
+
+
+def summary_counts(section, frames):
+    """
+    Status and explanation status counts of a section, as plain dicts (JSON-ready).
+
+    Args:
+        section: "in_house", "out_house" or "packing"
+        frames: Frame tuple of the section as returned by the get_*_data loaders
+
+    Returns:
+        Dict with "total", "status" and "explanation" counts, plus the counts per cost group
+        (in_house) or per source / destination
+    """
+    abnormal_cal = frames[1]
+    if section == "in_house":
+        full_abnormal_cal = frames[2]
+        return {
+            "total": len(abnormal_cal),
+            "status": _as_dict(uc.value_counts(abnormal_cal["Status Abnormal"])),
+            "explanation": _as_dict(uc.value_counts(abnormal_cal["Explanation Status"])),
+            "cost_groups": {
+                column: _as_dict(uc.value_counts(full_abnormal_cal[column])) for column in uc.IN_HOUSE_STATUS_COLUMNS
+            },
+        }
+
+    dimension = SECTION_DIMENSIONS[section]
+    cube = status_cube(abnormal_cal, dimension)
+    return {
+        "total": len(cube),
+        "status": _as_dict(cube.status_counts()),
+        "explanation": _as_dict(cube.explanation_counts()),
+        f"per_{dimension}": {str(value): _as_dict(cube.status_counts(value)) for value in cube.values()},
+    }
@@ -0,0 +1,174 @@
+"""
+Hierarchical timing spans for the dashboard render.
+
+A Trace collects nested spans (query, pandas, plotly, excel, ...) for one section render.
+Spans are only recorded while a trace is active in the current context, so the decorators
+below cost a single ContextVar lookup when tracing is off. Traces export to the Chrome trace
+event format and can be opened in chrome://tracing or https://ui.perfetto.dev.
+"""
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_depth = contextvars.ContextVar("current_depth", default=0)
+
+
+class Trace:
+    def __init__(self, name):
+        self.name = name
+        self.spans = []
+        self.merged = False
+        self._lock = threading.Lock()
+
+    def add(self, name, category, start, end, depth, args=None):
+        with self._lock:
+            self.spans.append({
+                "name": name,
+                "category": category,
+                "start": start,
+                "end": end,
+                "depth": depth,
+                "thread": threading.current_thread().name,
+                "args": args or {},
+            })
+
+    def merge(self, other):
+        """
+        Append the spans of another trace, e.g. a background prefetch awaited by this one.
+
+        A trace is merged at most once, so a finished prefetch that is awaited again on a later
+        rerun does not repeat its spans.
+        """
+        if other is None or other is self or other.merged:
+            return
+        other.merged = True
+        with self._lock:
+            self.spans.extend(other.spans)
+
+    def breakdown(self):
+        """
+        Spans in start order with their duration and self time.
+
+        Returns:
+            List of dicts with name, category, thread, depth, start_ms (relative to the trace
+            start), duration_ms and self_ms (duration minus direct children on the same thread)
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: (span["start"], span["depth"]))
+        if not spans:
+            return []
+
+        origin = spans[0]["start"]
+        rows = []
+        for index, span in enumerate(spans):
+            children = sum(
+                child["end"] - child["start"]
+                for child in spans[index + 1:]
+                if child["thread"] == span["thread"] and child["depth"] == span["depth"] + 1
+                and span["start"] <= child["start"] and child["end"] <= span["end"]
+            )
+            duration = span["end"] - span["start"]
+            rows.append({
+                "name": span["name"],
+                "category": span["category"],
+                "thread": span["thread"],
+                "depth": span["depth"],
+                "start_ms": (span["start"] - origin) * 1000,
+                "duration_ms": duration * 1000,
+                "self_ms": max(duration - children, 0) * 1000,
+            })
+        return rows
+
+    def chrome_events(self):
+        """Spans as Chrome trace "complete" (ph=X) events, one tid per thread."""
+        with self._lock:
+            spans = list(self.spans)
+        threads = {}
+        events = []
+        for span in spans:
+            tid = threads.setdefault(span["thread"], len(threads) + 1)
+            events.append({
+                "name": span["name"],
+                "cat": span["category"],
+                "ph": "X",
+                "ts": span["start"] * 1e6,
+                "dur": (span["end"] - span["start"]) * 1e6,
+                "pid": os.getpid(),
+                "tid": tid,
+                "args": span["args"],
+            })
+        for thread_name, tid in threads.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid,
+                           "args": {"name": thread_name}})
+        return events
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextlib.contextmanager
+def trace(name, category="section"):
+    """
+    Start a new trace with a root span and make it current for the enclosed block.
+
+    Yields:
+        The Trace being recorded
+    """
+    new_trace = Trace(name)
+    trace_token = _current_trace.set(new_trace)
+    depth_token = _current_depth.set(0)
+    try:
+        with span(name, category):
+            yield new_trace
+    finally:
+        _current_depth.reset(depth_token)
+        _current_trace.reset(trace_token)
+
+
+@contextlib.contextmanager
+def span(name, category="app", **args):
+    """Time the enclosed block as a child of the enclosing span; no-op without an active trace."""
+    active = _current_trace.get()
+    if active is None:
+        yield
+        return
+
+    depth = _current_depth.get()
+    token = _current_depth.set(depth + 1)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        _current_depth.reset(token)
+        active.add(name, category, start, end, depth, args)
+
+
+def traced(category):
+    """Decorator recording each call of the function as a span named after it."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_trace.get() is None:
+                return func(*args, **kwargs)
+            with span(func.__name__, category):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def to_chrome_json(traces):
+    """Serialize traces to a single Chrome trace JSON document."""
+    events = []
+    for item in traces:
+        events.extend(item.chrome_events())
+    return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
@@ -0,0 +1,37 @@
+import streamlit as st
+
+
+def progress_reporter(file_name):
+    """
+    Create a progress bar and return a callback that renders import progress events into it.
+
+    Args:
+        file_name: Name of the uploaded file, shown until the first rows are processed
+
+    Returns:
+        Callable to pass as progress_callback to the repository import/update functions
+    """
+    bar = st.progress(0.0, text=f"Reading {file_name}...")
+
+    def report(event):
+        fraction = event["processed"] / event["total"] if event["total"] else 1.0
+        bar.progress(
+            min(fraction, 1.0),
+            text=(
+                f"{event['processed']:,} / {event['total']:,} rows · {event['written']:,} written · "
+                f"{event['skipped']:,} skipped · {event['failed']:,} failed · {event['rows_per_sec']:,.0f} rows/s"
+            ),
+        )
+
+    return report
+
+
+def display_import_stats(stats):
+    """Show the final throughput and row counters of an import/update run."""
+    m = st.columns(5, border=True)
+    m[0].metric(label="Rows/sec", value=f"{stats['rows_per_sec']:,.1f}")
+    m[1].metric(label="Elapsed", value=f"{stats['elapsed_seconds']:,.1f} s",
+                help=f"Reading the Excel file took {stats['parse_seconds']:,.1f} s")
+    m[2].metric(label="Written", value=f"{stats['written']:,}")
+    m[3].metric(label="Skipped", value=f"{stats['skipped']:,}")
+    m[4].metric(label="Failed", value=f"{stats['failed']:,}")
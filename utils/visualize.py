@@ -1,8 +1,54 @@
 import streamlit as st
 import plotly.express as px
+import plotly.io as pio
 import pandas as pd
 
+import utils.cache_manager as cm
+import utils.categorical as uc
+import utils.summary as sm
+import utils.tracing as tr
 
+FIGURE_TTL = "1h"
+
+
+def _counts_spec(data):
+    """JSON-ready form of the counts a chart is built from, for the figure cache key."""
+    if isinstance(data, pd.DataFrame):
+        return data.astype(object).to_dict("split")
+    return {"index": [str(label) for label in data.index], "data": data.tolist()}
+
+
+def cached_figure(kind, data, title, color_map, build):
+    """
+    Figure for (counts, title, color map) from the shared figure cache.
+
+    The figure JSON is stored in the process-wide cache manager, so every rerun and every
+    session asking for the same chart skips Plotly Express; a hit only parses the JSON back
+    into a fresh Figure, which callers may modify.
+
+    Args:
+        kind: Chart builder name, part of the key
+        data: Counts the chart is built from (Series or DataFrame)
+        title: Chart title
+        color_map: Color mapping (holds the boundary through its labels)
+        build: Function returning the Plotly figure on a miss
+    """
+    key = cm.cache_key("figures", [kind, _counts_spec(data), title, color_map], {})
+    spec = cm.shared().get_or_build(key, lambda: build().to_json(), "figures", ttl=FIGURE_TTL)
+    return pio.from_json(spec)
+
+
+def _observed(data):
+    """
+    Counts without the zero rows: the category counts (uc.value_counts, StatusCube) keep absent
+    statuses at 0, which would show as empty slices and legend entries.
+    """
+    if isinstance(data, pd.DataFrame):
+        return data[data["count"] > 0] if "count" in data.columns else data
+    return data[data > 0]
+
+
+@tr.traced("plotly")
 def create_status_pie_chart(data, title, color_map=None):
     """
     Create a pie chart for status distribution.
@@ -22,24 +68,29 @@ def create_status_pie_chart(data, title, color_map=None):
             "Abnormal Below": "#636EFA",
         }
 
-    # Check if data is a DataFrame or Series
-    is_dataframe = isinstance(data, pd.DataFrame)
+    data = _observed(data)
 
-    fig = px.pie(
-        data,
-        names="Status" if (is_dataframe and "Status" in data.columns) else data.index,
-        values="count" if (is_dataframe and "count" in data.columns) else data.values,
-        title=title,
-        color="Status" if (is_dataframe and "Status" in data.columns) else data.index,
-        color_discrete_map=color_map,
-    )
+    def build():
+        # Check if data is a DataFrame or Series
+        is_dataframe = isinstance(data, pd.DataFrame)
 
-    fig.update_traces(textposition="inside", textinfo="percent+label")
-    fig.update_layout(title_x=0, margin=dict(l=0, r=0, t=50, b=0), height=400)
+        fig = px.pie(
+            data,
+            names="Status" if (is_dataframe and "Status" in data.columns) else data.index,
+            values="count" if (is_dataframe and "count" in data.columns) else data.values,
+            title=title,
+            color="Status" if (is_dataframe and "Status" in data.columns) else data.index,
+            color_discrete_map=color_map,
+        )
 
-    return fig
+        fig.update_traces(textposition="inside", textinfo="percent+label")
+        fig.update_layout(title_x=0, margin=dict(l=0, r=0, t=50, b=0), height=400)
+        return fig
 
+    return cached_figure("status_pie", data, title, color_map, build)
 
+
+@tr.traced("plotly")
 def display_pie_with_metrics(df, title, boundaries):
     """
     Display a pie chart with metrics in a two-column layout.
@@ -80,6 +131,7 @@ def display_pie_with_metrics(df, title, boundaries):
                 st.metric(label=status, value=value)
 
 
+@tr.traced("plotly")
 def display_simple_pie_chart(df, title, col_ratio=None):
     """
     Display a simple pie chart in a container with optional column ratio.
@@ -96,13 +148,17 @@ def display_simple_pie_chart(df, title, col_ratio=None):
 
         cols = st.columns(col_ratio, gap="large")
 
-        # Middle column for the pie chart
-        with cols[1]:
+        def build():
             fig = px.pie(df, names="destination", values="count")
             fig.update_layout(title_text=title, title_x=0, margin=dict(l=0, r=0, t=50, b=50), height=400)
-            st.plotly_chart(fig, use_container_width=True)
+            return fig
+
+        # Middle column for the pie chart
+        with cols[1]:
+            st.plotly_chart(cached_figure("destination_pie", df, title, None, build), use_container_width=True)
 
 
+@tr.traced("pandas")
 def get_status_counts(df, group_by_field=None):
     """
     Get status counts from a DataFrame.
@@ -115,11 +171,12 @@ def get_status_counts(df, group_by_field=None):
         DataFrame with status counts
     """
     if group_by_field:
-        return df.groupby([group_by_field, "Status"]).size().reset_index(name="count")
+        return df.groupby([group_by_field, "Status"], observed=True).size().reset_index(name="count")
     else:
-        return df.groupby("Status").size().reset_index(name="count")
+        return df.groupby("Status", observed=True).size().reset_index(name="count")
 
 
+@tr.traced("plotly")
 def create_status_pie_charts(df, boundaries):
     """
     Create multiple pie charts for each unique value in a field and an overall chart.
@@ -138,32 +195,33 @@ def create_status_pie_charts(df, boundaries):
         f"Abnormal Below -{boundaries}%": "#636EFA",
     }
 
-    # Get status counts by destination
-    status_by_destination = get_status_counts(df, "destination")
+    # Count every destination in one pass
+    cube = sm.status_cube(df, "destination")
 
     # Create a dictionary to store pie charts
     pie_charts = {}
 
     # Create pie charts for each destination
-    for dest in df["destination"].unique():
-        dest_data = status_by_destination[status_by_destination["destination"] == dest]
+    for dest in cube.values():
+        dest_data = cube.status_counts(dest).reset_index()
         fig = create_status_pie_chart(dest_data, f"{dest}", color_map)
         pie_charts[dest] = fig
 
     # Create overall pie chart
-    overall_status = get_status_counts(df)
+    overall_status = cube.status_counts().reset_index()
     overall_fig = create_status_pie_chart(overall_status, "Overall Status Distribution", color_map)
     pie_charts["Overall"] = overall_fig
 
     return pie_charts, df
 
 
+@tr.traced("plotly")
 def create_filtered_pie_chart(data, filter_field, filter_value, boundaries):
     """
     Create a pie chart for a filtered subset of data.
 
     Args:
-        data: DataFrame with Status column
+        data: DataFrame with Status column, or a StatusCube of it over filter_field
         filter_field: Field name to filter on
         filter_value: Value to filter for
         boundaries: Boundary percentage for abnormal values
@@ -171,11 +229,12 @@ def create_filtered_pie_chart(data, filter_field, filter_value, boundaries):
     Returns:
         Plotly figure object
     """
-    # Filter data
-    filtered_data = data[data[filter_field] == filter_value]
-
-    # Get status counts
-    status_counts = filtered_data["Status"].value_counts().reset_index()
+    # Get status counts, a lookup when the counts are pre-aggregated
+    if isinstance(data, sm.StatusCube):
+        status_counts = data.status_counts(filter_value)
+    else:
+        status_counts = uc.value_counts(data.loc[uc.status_mask(data[filter_field], filter_value), "Status"])
+    status_counts = status_counts.reset_index()
     status_counts.columns = ["Status", "count"]
 
     # Define color map with dynamic boundaries
@@ -190,21 +249,26 @@ def create_filtered_pie_chart(data, filter_field, filter_value, boundaries):
 
 
 # Specific wrapper functions that use the core functions above
+@tr.traced("plotly")
 def create_pie_chart_packing(data, destination, boundaries):
     return create_filtered_pie_chart(data, "destination", destination, boundaries)
 
 
+@tr.traced("plotly")
 def create_pie_chart_out_house(data, source, boundaries):
     return create_filtered_pie_chart(data, "source", source, boundaries)
 
 
+@tr.traced("plotly")
 def pie_char_with_total_counts(df, title, boundaries):
     display_pie_with_metrics(df, title, boundaries)
 
 
+@tr.traced("plotly")
 def pie_char_with_total_counts_packing(df, title):
     display_simple_pie_chart(df, title)
 
 
+@tr.traced("plotly")
 def create_pie_charts(df, boundaries):
     return create_status_pie_charts(df, boundaries)